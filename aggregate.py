@@ -0,0 +1,98 @@
+"""Summarize close approaches - counts, and the range and mean of their distances and velocities.
+
+An aggregate answers questions like "how many hazardous approaches were there
+each month, and how close did they come?" without building the output of a
+query: the records of the matching approaches - their NEO's designation and
+hazardous flag, their year and month, their distance and velocity - are folded
+into one running `Summary` per group, in a single pass.
+
+Groups are named by `GROUP_BY`: the year (an int), the month (a `YYYY-MM`
+string), the NEO (its designation) or the hazardous flag (a bool). Without a
+grouping, everything is summarized as the group `None`.
+"""
+from collections import namedtuple
+
+
+# The ways approaches can be grouped.
+GROUP_BY = ('year', 'month', 'neo', 'hazardous')
+
+Summary = namedtuple('Summary', ['count', 'distance_min', 'distance_max', 'distance_mean',
+                                 'velocity_min', 'velocity_max', 'velocity_mean'])
+
+
+def month_key(year, month):
+    """Name the group of a month, e.g. '2020-03'."""
+    return f"{year:04d}-{month:02d}"
+
+
+def summarize(records, group_by=None):
+    """Fold a stream of approach records into a `Summary` per group.
+
+    :param records: An iterable of `(designation, hazardous, year, month, distance,
+    velocity)` tuples, one per approach.
+    :param group_by: One of `GROUP_BY`, or None to summarize everything together.
+    :return: A dictionary mapping each group to its `Summary`, in sorted order of the groups.
+    :raise ValueError: If `group_by` isn't one of `GROUP_BY`.
+    """
+    if group_by not in (None,) + GROUP_BY:
+        raise ValueError(f"Can't group by {group_by!r}.")
+    # Months are kept as (year, month) tuples while folding, and only named at the end.
+    position = {None: None, 'neo': 0, 'hazardous': 1, 'year': 2}.get(group_by)
+
+    # Each group is a list of count, minimum, maximum and sum of distance, then velocity.
+    groups = {}
+    for record in records:
+        if group_by == 'month':
+            key = record[2], record[3]
+        else:
+            key = None if position is None else record[position]
+        distance, velocity = record[4], record[5]
+        stats = groups.get(key)
+        if stats is None:
+            groups[key] = [1, distance, distance, distance, velocity, velocity, velocity]
+            continue
+        stats[0] += 1
+        if distance < stats[1]:
+            stats[1] = distance
+        elif distance > stats[2]:
+            stats[2] = distance
+        stats[3] += distance
+        if velocity < stats[4]:
+            stats[4] = velocity
+        elif velocity > stats[5]:
+            stats[5] = velocity
+        stats[6] += velocity
+
+    result = {}
+    for key in sorted(groups, key=sort_key):
+        count, dmin, dmax, dsum, vmin, vmax, vsum = groups[key]
+        name = month_key(*key) if group_by == 'month' else key
+        result[name] = Summary(count, dmin, dmax, dsum / count, vmin, vmax, vsum / count)
+    return result
+
+
+def approach_records(approaches):
+    """Generate the records `summarize` takes from `CloseApproach` objects.
+
+    Approaches without an NEO aren't hazardous.
+    """
+    for approach in approaches:
+        neo, time = approach.neo, approach.time
+        yield (approach._designation, neo.hazardous if neo is not None else False,
+               time.year, time.month, approach.distance, approach.velocity)
+
+
+def sort_key(group):
+    """Order groups, putting a missing (None) group first."""
+    return (group is not None, group)
+
+
+def format_table(summaries, group_by=None):
+    """Format the summaries of `summarize` as a plain text table, one line per group."""
+    header = ('group' if group_by is None else group_by,) + Summary._fields
+    rows = [(str('all' if group is None else group), str(summary.count))
+            + tuple(f"{value:.6g}" for value in summary[1:])
+            for group, summary in summaries.items()]
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    return '\n'.join(' '.join(cell.rjust(width) for cell, width in zip(row, widths))
+                     for row in [header] + rows)
@@ -0,0 +1,337 @@
+"""Serve the NEO database as an HTTP/JSON API, with asyncio and the standard library.
+
+`main.py http` loads the database once and answers:
+
+* `GET /neo/{designation}` - the NEO with that designation (or alias), and its close approaches;
+* `GET /neo?name={name}` - the NEO with that name, likewise;
+* `GET /approaches?...` - the close approaches that match the filters given as
+  parameters, named as in `filters` (`date`, `start_date`, `end_date`,
+  `distance_min`, `distance_max`, `velocity_min`, `velocity_max`,
+  `diameter_min`, `diameter_max` and `hazardous`), plus `limit`, and ordered
+  with `sort_by` (`time`, `distance`, `velocity` or `diameter`), `desc` and `top`:
+
+    $ curl 'localhost:8000/approaches?start_date=2020-01-01&distance_max=0.1&limit=5'
+    $ curl 'localhost:8000/approaches?hazardous=true&sort_by=velocity&desc=true&top=10'
+
+* `GET /count?...` - how many close approaches match the filters, as `{"count": n}`,
+  without building or formatting them:
+
+    $ curl 'localhost:8000/count?hazardous=true&start_date=2020-01-01'
+
+Approaches are formatted as by `write.json_obj`, except that the approaches of
+NEOs that aren't in the database are kept, with their designation and no
+diameter. `/approaches` streams its JSON array with chunked transfer encoding
+as the query produces results, so the first results arrive before the query is
+over and nothing holds the whole response.
+
+Database work runs on a thread pool, a batch of results at a time, so that a
+slow query doesn't stop the event loop from accepting and answering others.
+Connections are kept alive between requests, as HTTP/1.1 expects.
+"""
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import http
+import json
+import math
+import sys
+import urllib.parse
+
+from filters import limit
+from helpers import datetime_to_str
+import filters
+from write import FIELD_NAMES, batches, json_obj
+
+
+# Query results are formatted and sent this many at a time.
+BATCH_SIZE = 500
+
+
+class BadRequest(ValueError):
+    """A request whose parameters can't be understood."""
+
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD parameter."""
+    try:
+        return datetime.datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise BadRequest(f"'{text}' is not a valid date. Use YYYY-MM-DD.")
+
+
+def parse_float(text):
+    """Parse a finite number parameter."""
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        raise BadRequest(f"'{text}' is not a valid number.")
+    return value
+
+
+def parse_bool(text):
+    """Parse a true/false parameter."""
+    value = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+    try:
+        return value[text.lower()]
+    except KeyError:
+        raise BadRequest(f"'{text}' is not true or false.")
+
+
+def parse_limit(text):
+    """Parse a non-negative whole number parameter."""
+    if not text.isdigit():
+        raise BadRequest(f"'{text}' is not a valid limit.")
+    return int(text)
+
+
+def parse_sort_by(text):
+    """Parse the attribute to order results by."""
+    if text not in filters.SORT_ATTRIBUTES:
+        raise BadRequest(f"Can't sort by '{text}'. Use one of {', '.join(filters.SORT_ATTRIBUTES)}.")
+    return text
+
+
+# How to parse each parameter of `/approaches`, by the `filters` key it sets.
+PARAMETERS = {
+    filters.DATE: parse_date,
+    filters.START_DATE: parse_date,
+    filters.END_DATE: parse_date,
+    filters.DISTANCE_MIN: parse_float,
+    filters.DISTANCE_MAX: parse_float,
+    filters.VELOCITY_MIN: parse_float,
+    filters.VELOCITY_MAX: parse_float,
+    filters.DIAMETER_MIN: parse_float,
+    filters.DIAMETER_MAX: parse_float,
+    filters.HAZARDOUS: parse_bool,
+    filters.SORT_BY: parse_sort_by,
+    filters.DESC: parse_bool,
+    filters.TOP: parse_limit,
+}
+
+
+def parse_query(query_string):
+    """Turn the query string of `/approaches` into filters and a limit.
+
+    Empty parameters count as not given; of a repeated one, the last wins.
+
+    :param query_string: The query string of the request URL, without the `?`.
+    :return: A tuple of a dictionary of every filter (with `None` for those not
+    given), as `NEODatabase.query` expects, and the limit, or None.
+    :raise BadRequest: If a parameter is unknown or has an invalid value.
+    """
+    args = dict.fromkeys(PARAMETERS)
+    n = None
+    for key, values in urllib.parse.parse_qs(query_string, keep_blank_values=True).items():
+        if key != 'limit' and key not in PARAMETERS:
+            raise BadRequest(f"Unknown parameter '{key}'.")
+        if not values[-1]:
+            continue
+        if key == 'limit':
+            n = parse_limit(values[-1])
+        else:
+            args[key] = PARAMETERS[key](values[-1])
+    return args, n
+
+
+def null_nan(value):
+    """Return `value`, or None if it is NaN."""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def approach_obj(approach):
+    """Format a `CloseApproach` like `write.json_obj`.
+
+    Approaches of NEOs that aren't in the database keep their designation, and
+    are treated as having no diameter and not being hazardous.
+    """
+    if approach.neo is None:
+        return {FIELD_NAMES[0]: datetime_to_str(approach.time),
+                FIELD_NAMES[1]: approach.distance,
+                FIELD_NAMES[2]: approach.velocity,
+                'neo': {FIELD_NAMES[3]: approach._designation, FIELD_NAMES[4]: '',
+                        FIELD_NAMES[5]: None, FIELD_NAMES[6]: False}}
+    return json_obj(approach)
+
+
+def neo_obj(neo):
+    """Format a `NearEarthObject` and its close approaches as a dictionary."""
+    return {
+        FIELD_NAMES[3]: neo.designation,
+        FIELD_NAMES[4]: neo.name if neo.name != None else '',
+        FIELD_NAMES[5]: null_nan(neo.diameter),
+        FIELD_NAMES[6]: neo.hazardous,
+        'approaches': [{key: value for key, value in approach_obj(approach).items() if key != 'neo'}
+                       for approach in neo.approaches],
+    }
+
+
+def find_neo_obj(lookup, key):
+    """Look up an NEO with `lookup(key)` and format it, or return None if there's none."""
+    neo = lookup(key)
+    return None if neo is None else neo_obj(neo)
+
+
+class APIServer:
+    """An HTTP server answering NEO and close approach requests from a database."""
+    def __init__(self, database, executor=None, batch_size=BATCH_SIZE):
+        """Create a new `APIServer`.
+
+        :param database: The `NEODatabase` (or `SQLiteNEODatabase`) to answer from. It is
+        used from several threads at once.
+        :param executor: The executor to run database work on; by default, a thread pool.
+        :param batch_size: How many query results to format and send at a time.
+        """
+        self.db = database
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor()
+        self._batch_size = batch_size
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """Start listening, and return the `asyncio.Server`."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        """Answer the requests of one connection until it closes, or asks to."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.send_json(writer, http.HTTPStatus.BAD_REQUEST,
+                                         {'error': "Malformed request line."}, keep_alive=False)
+                    break
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                # Requests have no bodies here; skip one if a client sends it anyway.
+                if headers.get('content-length', '0').isdigit():
+                    await reader.readexactly(int(headers.get('content-length', '0')))
+                await self.route(method, target, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def route(self, method, target, writer, keep_alive):
+        """Answer one request."""
+        if method != 'GET':
+            await self.send_json(writer, http.HTTPStatus.METHOD_NOT_ALLOWED,
+                                 {'error': "Only GET is supported."}, keep_alive)
+            return
+        url = urllib.parse.urlsplit(target)
+        path = urllib.parse.unquote(url.path)
+        try:
+            if path == '/approaches':
+                await self.approaches(url.query, writer, keep_alive)
+            elif path == '/count':
+                args, _ = parse_query(url.query)
+                count = await self.run(self.db.count, args)
+                await self.send_json(writer, http.HTTPStatus.OK, {'count': count}, keep_alive)
+            elif path == '/neo':
+                name = urllib.parse.parse_qs(url.query, keep_blank_values=True).get('name', [None])[-1]
+                if name is None:
+                    raise BadRequest("Use /neo/{designation} or /neo?name={name}.")
+                await self.neo(self.db.get_neo_by_name, name, writer, keep_alive)
+            elif path.startswith('/neo/'):
+                await self.neo(self.db.get_neo_by_designation, path[len('/neo/'):], writer,
+                               keep_alive)
+            else:
+                await self.send_json(writer, http.HTTPStatus.NOT_FOUND,
+                                     {'error': f"No such endpoint: {path}"}, keep_alive)
+        except BadRequest as err:
+            await self.send_json(writer, http.HTTPStatus.BAD_REQUEST, {'error': str(err)},
+                                 keep_alive)
+
+    async def run(self, function, *args):
+        """Run a blocking function on the executor."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(function, *args))
+
+    async def neo(self, lookup, key, writer, keep_alive):
+        """Answer a `/neo` request with the NEO found by `lookup(key)`."""
+        obj = await self.run(find_neo_obj, lookup, key)
+        if obj is None:
+            await self.send_json(writer, http.HTTPStatus.NOT_FOUND,
+                                 {'error': f"No matching NEO: {key}"}, keep_alive)
+        else:
+            await self.send_json(writer, http.HTTPStatus.OK, obj, keep_alive)
+
+    async def approaches(self, query_string, writer, keep_alive):
+        """Answer an `/approaches` request, streaming the results as a chunked JSON array."""
+        args, n = parse_query(query_string)
+        # Formatting happens on the executor, along with the query itself.
+        results = batches(map(approach_obj, limit(self.db.query(args), n)), self._batch_size)
+        encode = lambda batch: ', '.join(map(json.dumps, batch)).encode()
+
+        try:
+            first = await self.run(next, results, None)
+        except Exception as err:
+            await self.send_json(writer, http.HTTPStatus.INTERNAL_SERVER_ERROR,
+                                 {'error': str(err)}, keep_alive)
+            return
+        writer.write(self.head(http.HTTPStatus.OK, keep_alive, [
+            ('Content-Type', 'application/json'), ('Transfer-Encoding', 'chunked')]))
+        self.write_chunk(writer, b'[' + (encode(first) if first else b''))
+        batch = first
+        while batch:
+            await writer.drain()
+            batch = await self.run(next, results, None)
+            if batch:
+                self.write_chunk(writer, b', ' + encode(batch))
+        self.write_chunk(writer, b']')
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def head(status, keep_alive, headers):
+        """Format the status line and headers of a response."""
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in headers]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    @staticmethod
+    def write_chunk(writer, data):
+        """Write one chunk of a chunked response."""
+        writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    async def send_json(self, writer, status, obj, keep_alive):
+        """Send a whole JSON response."""
+        body = json.dumps(obj).encode()
+        writer.write(self.head(status, keep_alive, [
+            ('Content-Type', 'application/json'), ('Content-Length', len(body))]) + body)
+        await writer.drain()
+
+
+def serve(database, host='127.0.0.1', port=8000):
+    """Serve the API on `host` and `port` until interrupted."""
+    async def main():
+        server = await APIServer(database).start(host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}. Press Ctrl-C to stop.",
+              file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
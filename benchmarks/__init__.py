@@ -0,0 +1,7 @@
+"""Benchmarks for the NEO database, run from the project root as modules.
+
+    $ python3 -m benchmarks.bench_lookup
+
+The benchmarks generate synthetic data with `benchmarks.synthetic` so that they
+can be run at sizes far beyond the bundled data files.
+"""
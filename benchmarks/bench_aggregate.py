@@ -0,0 +1,95 @@
+"""Compare `NEODatabase.aggregate` with summarizing the output of `query` by hand.
+
+    $ python3 -m benchmarks.bench_aggregate
+    $ python3 -m benchmarks.bench_aggregate --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first, and a store of
+them. Each summary - "hazardous approaches under 0.05 AU per month", and so on -
+is computed by every backend, both ways; the database is rebuilt before each
+run, so that lazily-built approaches are built again.
+"""
+import argparse
+import csv
+import datetime
+import pathlib
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+import aggregate
+import columnar
+import filters
+import store
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+SUMMARIES = {
+    'all': ({}, None),
+    'hazardous<0.05/month': ({filters.HAZARDOUS: True, filters.DISTANCE_MAX: 0.05}, 'month'),
+    'per year': ({}, 'year'),
+    'decade per neo': ({filters.START_DATE: datetime.date(2020, 1, 1),
+                        filters.END_DATE: datetime.date(2029, 12, 31)}, 'neo'),
+}
+
+
+def by_hand(database, args, group_by):
+    """Summarize the approaches `query` returns, as a script reading its output would."""
+    return aggregate.summarize(aggregate.approach_records(database.query(args)), group_by)
+
+
+def timed(make_database, function, args, group_by):
+    """Return the time `function` takes on a fresh database."""
+    database = make_database()
+    start = time.perf_counter()
+    function(database, args, group_by)
+    return time.perf_counter() - start
+
+
+def report(neofile, cadfile, storefile):
+    """Print the time of every summary, by every backend, both ways."""
+    backends = {
+        'objects': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile)),
+        'lazy': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile, lazy=True)),
+        'store': lambda: NEODatabase(*store.open_store(storefile)[1:]),
+    }
+    if columnar.np is not None:
+        backends['columnar store'] = lambda: NEODatabase(*store.open_store(storefile)[1:],
+                                                         columnar=True)
+    print(f"{'summary':>22} {'backend':>15} {'by hand':>9} {'aggregate':>10} {'speedup':>8}")
+    for name, (args, group_by) in SUMMARIES.items():
+        for backend, make_database in backends.items():
+            old = timed(make_database, by_hand, args, group_by)
+            new = timed(make_database, NEODatabase.aggregate, args, group_by)
+            print(f"{name:>22} {backend:>15} {old * 1000:>7.0f}ms {new * 1000:>8.0f}ms "
+                  f"{old / new:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        store.convert(neofile, cadfile, tmp / 'neos.store')
+        report(neofile, cadfile, tmp / 'neos.store')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Compare `main.py query-batch` with running the same queries one after another.
+
+    $ python3 -m benchmarks.bench_batch
+    $ python3 -m benchmarks.bench_batch --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first. A batch of
+`--queries` filter sets, each with its own output file, is then answered:
+
+* by one `main.py query` process per filter set, as a shell script would;
+* by one process, loading once and calling `NEODatabase.query` per filter set;
+* by one process, loading once and calling `NEODatabase.query_batch`;
+* by one `main.py query-batch` process.
+
+The processes share a warm snapshot directory, so each of them starts from a
+snapshot rather than the data files. Times are the best of `--repeat` runs.
+"""
+import argparse
+import csv
+import datetime
+import io
+import pathlib
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from database import NEODatabase
+from main import WRITERS, make_parser, query_batch
+import snapshot
+from filters import limit
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+
+def make_batch(n, outdir, seed=0):
+    """Return `n` random filter sets as `query` flags, each with its own output file."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        flags = []
+        if rng.random() < 0.5:
+            start = datetime.date(rng.randrange(1900, 2190), 1, 1)
+            flags += ['--start-date', start.isoformat(),
+                      '--end-date', start.replace(year=start.year + rng.randrange(1, 10)).isoformat()]
+        if rng.random() < 0.5:
+            flags += ['--max-distance', f'{rng.uniform(0.01, 0.2):.3f}']
+        if rng.random() < 0.5:
+            flags += ['--min-velocity', f'{rng.uniform(1, 40):.1f}']
+        if rng.random() < 0.3:
+            flags += [rng.choice(['--hazardous', '--not-hazardous'])]
+        flags += ['--outfile', str(outdir / f'{i}.{rng.choice(["csv", "json"])}')]
+        lines.append(flags)
+    return lines
+
+
+def timed(function, repeat):
+    """Return the best time of `repeat` calls of `function`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(neofile, cadfile, queries, repeat):
+    """Print the time each way of answering the batch takes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        outdir = tmp / 'out'
+        outdir.mkdir()
+        lines = make_batch(queries, outdir)
+        batchfile = tmp / 'batch.txt'
+        batchfile.write_text('\n'.join(' '.join(flags) for flags in lines) + '\n')
+        common = [sys.executable, str(PROJECT_ROOT / 'main.py'), '--neofile', str(neofile),
+                  '--cadfile', str(cadfile), '--snapshot-dir', str(tmp / 'snapshots')]
+        # Build the snapshot, so that every run below starts from it.
+        subprocess.run(common + ['inspect', '--pdes', 'none'], check=True, capture_output=True)
+
+        _, _, query_parser = make_parser()
+        batch = [query_parser.parse_args(flags) for flags in lines]
+
+        def load():
+            neos, approaches = snapshot.load(neofile, cadfile, tmp / 'snapshots')
+            return NEODatabase(neos, approaches, cache_entries=0)
+
+        def sequential():
+            db = load()
+            for args in batch:
+                WRITERS[args.outfile.suffix](limit(db.query(vars(args)), args.limit), args.outfile)
+
+        def in_process():
+            query_batch(load(), batch, stdout=io.StringIO())
+
+        runs = [
+            (f"{queries} x main.py query", lambda: [
+                subprocess.run(common + ['query'] + flags, check=True, capture_output=True)
+                for flags in lines]),
+            ("load + query one after another", sequential),
+            ("load + query_batch", in_process),
+            ("main.py query-batch", lambda: subprocess.run(
+                common + ['query-batch', str(batchfile)], check=True, capture_output=True)),
+        ]
+        print(f"{queries} queries")
+        print(f"{'':>32} {'time':>8} {'speedup':>8}")
+        baseline = None
+        for name, function in runs:
+            best = timed(function, repeat)
+            baseline = baseline or best
+            print(f"{name:>32} {best:>7.2f}s {baseline / best:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        report(neofile, cadfile, args.queries, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compare the NumPy columnar backend against the object path of `NEODatabase.query`.
+
+    $ python3 -m benchmarks.bench_columnar
+    $ python3 -m benchmarks.bench_columnar --neofile data/neos.csv --cadfile data/cad.json --scale 10
+
+The first dataset is loaded from the data files (the bundled test files if the
+full data isn't available); the second is synthetic, `--scale` times larger.
+"""
+import argparse
+import datetime
+import pathlib
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+import filters
+from benchmarks.synthetic import make_neos, make_approaches
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+DATA_ROOT = PROJECT_ROOT / 'data'
+TESTS_ROOT = PROJECT_ROOT / 'tests'
+
+QUERIES = {
+    'all': {},
+    'max-distance': {filters.DISTANCE_MAX: 0.05},
+    'hazardous-fast': {filters.HAZARDOUS: True, filters.VELOCITY_MIN: 30},
+    'decade+distance': {filters.START_DATE: datetime.date(2020, 1, 1),
+                        filters.END_DATE: datetime.date(2029, 12, 31),
+                        filters.DISTANCE_MIN: 0.01, filters.DISTANCE_MAX: 0.3,
+                        filters.DIAMETER_MAX: 2},
+}
+
+
+def best_of(func, repeat=3):
+    """Return the best wall-clock time, in seconds, of `repeat` calls of `func`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label, neos, approaches):
+    """Print the time of every query through both backends of the same data."""
+    # Without the cache, every run evaluates its query through the backend being timed.
+    database = NEODatabase(neos, approaches, columnar=True, cache_entries=0)
+    columns = database._columns
+
+    def run(args, backend):
+        # Without columns, `query` falls back to the object path.
+        database._columns = backend
+        return sum(1 for _ in database.query(args))
+
+    print(f"{label}: {len(approaches):,} approaches")
+    print(f"{'query':>18} {'rows':>9} {'objects':>10} {'columnar':>10} {'speedup':>8}")
+    for name, args in QUERIES.items():
+        rows = run(args, None)
+        old = best_of(lambda: run(args, None))
+        new = best_of(lambda: run(args, columns))
+        print(f"{name:>18} {rows:>9,} {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {old / new:>7.1f}x")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path, default=DATA_ROOT / 'neos.csv')
+    parser.add_argument('--cadfile', type=pathlib.Path, default=DATA_ROOT / 'cad.json')
+    parser.add_argument('--scale', type=int, default=10)
+    args = parser.parse_args()
+
+    if not (args.neofile.exists() and args.cadfile.exists()):
+        args.neofile = TESTS_ROOT / 'test-neos-2020.csv'
+        args.cadfile = TESTS_ROOT / 'test-cad-2020.json'
+    neos, approaches = load_neos(args.neofile), load_approaches(args.cadfile)
+    compare(f"{args.cadfile.name}", neos, approaches)
+
+    synthetic_neos = make_neos(len(neos) * args.scale)
+    compare(f"synthetic x{args.scale}", synthetic_neos,
+            make_approaches(len(approaches) * args.scale, synthetic_neos))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Compare `NEODatabase.count` with counting the output of `query`.
+
+    $ python3 -m benchmarks.bench_count
+    $ python3 -m benchmarks.bench_count --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first, and a store of
+them. Each count is timed on a fresh database, then repeated on it - by then
+the hazardous index is built, and a count that had to scan is cached.
+"""
+import argparse
+import csv
+import datetime
+import pathlib
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+import columnar
+import filters
+import store
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+COUNTS = {
+    'all': {},
+    'decade': {filters.START_DATE: datetime.date(2020, 1, 1),
+               filters.END_DATE: datetime.date(2029, 12, 31)},
+    'hazardous': {filters.HAZARDOUS: True},
+    'hazardous decade': {filters.START_DATE: datetime.date(2020, 1, 1),
+                         filters.END_DATE: datetime.date(2029, 12, 31), filters.HAZARDOUS: True},
+    'under 0.1 AU': {filters.DISTANCE_MAX: 0.1},
+}
+
+
+def by_query(database, args):
+    """Count the approaches `query` returns."""
+    return sum(1 for _ in database.query(args))
+
+
+def timed(function, database, args):
+    """Return the time `function` takes."""
+    start = time.perf_counter()
+    function(database, args)
+    return time.perf_counter() - start
+
+
+def report(neofile, cadfile, storefile):
+    """Print the time of every count, by every backend, both ways."""
+    backends = {
+        'objects': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile)),
+        'lazy': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile, lazy=True)),
+        'store': lambda: NEODatabase(*store.open_store(storefile)[1:]),
+    }
+    if columnar.np is not None:
+        backends['columnar store'] = lambda: NEODatabase(*store.open_store(storefile)[1:],
+                                                         columnar=True)
+    print(f"{'count':>18} {'backend':>15} {'query':>9} {'count':>9} {'again':>9}")
+    for name, args in COUNTS.items():
+        for backend, make_database in backends.items():
+            old = timed(by_query, make_database(), args)
+            database = make_database()
+            new = timed(NEODatabase.count, database, args)
+            again = timed(NEODatabase.count, database, args)
+            print(f"{name:>18} {backend:>15} {old * 1000:>7.1f}ms {new * 1000:>7.1f}ms "
+                  f"{again * 1000:>7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        store.convert(neofile, cadfile, tmp / 'neos.store')
+        report(neofile, cadfile, tmp / 'neos.store')
+
+
+if __name__ == '__main__':
+    main()
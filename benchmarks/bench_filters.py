@@ -0,0 +1,79 @@
+"""Compare compiled filters against `is_valid_close_approach`, in rows per second.
+
+    $ python3 -m benchmarks.bench_filters
+    $ python3 -m benchmarks.bench_filters --approaches 400000
+
+Both paths check every approach in a list, without the time index, so the
+numbers reflect only the cost of the predicates for 0, 1, 3 and 7 active filters.
+"""
+import argparse
+import time
+
+from database import NEODatabase
+import filters
+from benchmarks.synthetic import make_neos, make_approaches
+
+
+FILTER_SETS = {
+    0: {},
+    1: {filters.DISTANCE_MAX: 0.1},
+    3: {filters.DISTANCE_MAX: 0.1, filters.VELOCITY_MIN: 10, filters.HAZARDOUS: True},
+    7: {filters.DISTANCE_MIN: 0.01, filters.DISTANCE_MAX: 0.4,
+        filters.VELOCITY_MIN: 5, filters.VELOCITY_MAX: 40,
+        filters.DIAMETER_MIN: 0.1, filters.DIAMETER_MAX: 8, filters.HAZARDOUS: False},
+}
+
+
+def make_args(active):
+    """Fill in every filter the `query` parser defines, as `None` unless active."""
+    args = dict.fromkeys((filters.DATE, filters.START_DATE, filters.END_DATE,
+                          filters.DISTANCE_MIN, filters.DISTANCE_MAX,
+                          filters.VELOCITY_MIN, filters.VELOCITY_MAX,
+                          filters.DIAMETER_MIN, filters.DIAMETER_MAX, filters.HAZARDOUS))
+    args.update(active)
+    return args
+
+
+def reference(approaches, args, min_date, max_date):
+    """Count matches the way `NEODatabase.query` used to."""
+    args = filters.clean_args_dict(args, min_date, max_date)
+    return sum(1 for approach in approaches if filters.is_valid_close_approach(approach, args))
+
+
+def compiled(approaches, args):
+    """Count matches with the compiled predicates."""
+    return sum(1 for _ in filters.select(approaches, filters.compile_filters(args)))
+
+
+def rate(func, n, *args):
+    """Return the rows per second of the best of three runs of `func(*args)`."""
+    best = min(_timed(func, *args) for _ in range(3))
+    return n / best
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--approaches', type=int, default=200000)
+    args = parser.parse_args()
+
+    neos = make_neos(max(args.approaches // 16, 1))
+    approaches = make_approaches(args.approaches, neos)
+    database = NEODatabase(neos, approaches)
+    min_date, max_date = database.min_time.date(), database.max_time.date()
+
+    print(f"{'filters':>8} {'reference':>14} {'compiled':>14} {'speedup':>8}   (rows/s)")
+    for count, active in FILTER_SETS.items():
+        query = make_args(active)
+        old = rate(reference, len(approaches), approaches, query, min_date, max_date)
+        new = rate(compiled, len(approaches), approaches, query)
+        print(f"{count:>8} {old:>14,.0f} {new:>14,.0f} {new / old:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
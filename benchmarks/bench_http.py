@@ -0,0 +1,152 @@
+"""Load-test the HTTP/JSON API with many concurrent clients.
+
+    $ python3 -m benchmarks.bench_http
+    $ python3 -m benchmarks.bench_http --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first. `main.py http`
+is started on a free port, and `--clients` concurrent clients, each on its
+own keep-alive connection, send `--requests` requests between them, cycling
+through a mix of NEO lookups and filtered queries. The latency of each
+request - from sending it to reading the last byte of the response - is
+reported as p50 and p99, per kind of request and overall.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import pathlib
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+
+def make_requests(neofile, seed=0):
+    """Return a mix of `(kind, path)` requests against the data in `neofile`."""
+    with open(neofile) as file:
+        reader = csv.DictReader(file)
+        neos = [(row['pdes'], row['name']) for row in reader]
+    rng = random.Random(seed)
+    named = [name for _, name in neos if name] or ['Nope']
+    requests = []
+    for _ in range(200):
+        year, month, day = rng.randint(1950, 2150), rng.randint(1, 12), rng.randint(1, 28)
+        requests += [
+            ('neo/{designation}', f'/neo/{rng.choice(neos)[0]}'.replace(' ', '%20')),
+            ('neo?name=', f'/neo?name={rng.choice(named)}'.replace(' ', '%20')),
+            ('approaches?date=', f'/approaches?date={year}-{month:02}-{day:02}'),
+            ('approaches?range&limit=100',
+             f'/approaches?start_date={year}-01-01&end_date={year + 10}-01-01'
+             f'&distance_max=0.2&hazardous=true&limit=100'),
+        ]
+    rng.shuffle(requests)
+    return requests
+
+
+async def fetch(reader, writer, path):
+    """Send one GET request on a keep-alive connection and read the whole response."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = (await reader.readline()).split()[1]
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding') == 'chunked':
+        while (size := int(await reader.readline(), 16)):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.readexactly(int(headers['content-length']))
+    return int(status)
+
+
+async def load_test(port, requests, clients, total):
+    """Run `clients` concurrent clients sending `total` requests; return the latencies by kind."""
+    queue = itertools.islice(itertools.cycle(requests), total)
+    latencies = {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for kind, path in queue:
+            start = time.perf_counter()
+            status = await fetch(reader, writer, path)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            assert status in (200, 404), (path, status)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, p):
+    """Return the `p`th percentile of `values`."""
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1]
+
+
+def report(neofile, cadfile, clients, total, backend_args):
+    """Start a server, load-test it and print the latencies."""
+    server = subprocess.Popen([sys.executable, str(PROJECT_ROOT / 'main.py'),
+                               '--neofile', str(neofile), '--cadfile', str(cadfile), *backend_args,
+                               'http', '--port', '0'], stderr=subprocess.PIPE, text=True)
+    try:
+        line = server.stderr.readline()
+        if not line.startswith('Serving on'):
+            raise SystemExit(f"The server didn't start: {line}{server.stderr.read()}")
+        port = int(line.split()[2].rstrip('.').rsplit(':', 1)[1])
+
+        latencies, elapsed = asyncio.run(load_test(port, make_requests(neofile), clients, total))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{clients} clients, {total} requests in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} requests/s)")
+    print(f"{'request':>28} {'count':>6} {'p50':>9} {'p99':>9}")
+    everything = []
+    for kind, values in sorted(latencies.items()):
+        everything += values
+        print(f"{kind:>28} {len(values):>6} {percentile(values, 50) * 1000:>7.1f}ms "
+              f"{percentile(values, 99) * 1000:>7.1f}ms")
+    print(f"{'all':>28} {len(everything):>6} {percentile(everything, 50) * 1000:>7.1f}ms "
+          f"{percentile(everything, 99) * 1000:>7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--columnar', action='store_true',
+                        help="Run the server with --columnar.")
+    args = parser.parse_args()
+
+    backend_args = ['--no-snapshot'] + (['--columnar'] if args.columnar else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        report(neofile, cadfile, args.clients, args.requests, backend_args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Measure how long `extract.load_approaches` takes to load close approach data.
+
+    $ python3 -m benchmarks.bench_load
+    $ python3 -m benchmarks.bench_load --cadfile data/cad.json
+
+Without `--cadfile`, a synthetic cad.json of `--approaches` rows is written to a
+temporary directory first. The "strptime" row loads with `datetime.strptime`
+parsing every timestamp, as `helpers.cd_to_datetime` used to.
+"""
+import argparse
+import datetime
+import pathlib
+import tempfile
+import time
+import unittest.mock
+
+from extract import load_approaches
+from benchmarks.synthetic import make_neos, write_cad_json
+
+
+def strptime(calendar_date):
+    """Parse a calendar date the way `helpers.cd_to_datetime` originally did."""
+    return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
+
+
+def timed(func, *args):
+    """Return the wall-clock time, in seconds, of `func(*args)`."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def report(cadfile):
+    """Print the load time of `cadfile` with each timestamp parser."""
+    with unittest.mock.patch('models.cd_to_datetime', strptime):
+        before = timed(load_approaches, cadfile)
+    after = timed(load_approaches, cadfile)
+    print(f"{'parser':>14} {'load time':>10}")
+    print(f"{'strptime':>14} {before:>9.2f}s")
+    print(f"{'cd_to_datetime':>14} {after:>9.2f}s   ({before / after:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--approaches', type=int, default=400000)
+    args = parser.parse_args()
+
+    if args.cadfile:
+        report(args.cadfile)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        cadfile = pathlib.Path(tmp) / 'cad.json'
+        write_cad_json(cadfile, args.approaches, make_neos(25000))
+        report(cadfile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Compare `extract.load_neos` against the `csv.DictReader` loader it replaced.
+
+    $ python3 -m benchmarks.bench_load_neos
+    $ python3 -m benchmarks.bench_load_neos --neofile data/neos.csv
+
+Without `--neofile`, a synthetic neos.csv with the real 75-column header and
+`--neos` rows is written to a temporary directory first.
+"""
+import argparse
+import csv
+import pathlib
+import tempfile
+import time
+import tracemalloc
+
+from extract import load_neos
+from models import NearEarthObject
+from benchmarks.synthetic import make_neos, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+
+def load_neos_dictreader(neo_csv_path):
+    """Load NEOs the way `extract.load_neos` used to, with a dict per row."""
+    neos = []
+    with open(neo_csv_path) as file:
+        for line in csv.DictReader(file):
+            params = {'designation': line['pdes'], 'hazardous': line['pha'] == 'Y'}
+            if line['name'] != '':
+                params['name'] = line['name']
+            if line['diameter'] != '':
+                params['diameter'] = float(line['diameter'])
+            neos.append(NearEarthObject(**params))
+    return neos
+
+
+def measure(load, path):
+    """Return (rows/s, peak traced MB, retained MB) for `load(path)`.
+
+    The difference between the peak and the retained memory is what the loader
+    allocated only temporarily, such as the per-row dictionaries of `DictReader`.
+    """
+    start = time.perf_counter()
+    rows = len(load(path))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    neos = load(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del neos
+    return rows / elapsed, peak / 1e6, retained / 1e6
+
+
+def report(path):
+    """Print the results of both loaders on `path`."""
+    print(f"{'loader':>12} {'rows/s':>12} {'peak MB':>8} {'retained MB':>12}")
+    for name, load in (('DictReader', load_neos_dictreader), ('projected', load_neos)):
+        rate, peak, retained = measure(load, path)
+        print(f"{name:>12} {rate:>12,.0f} {peak:>8.2f} {retained:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    args = parser.parse_args()
+
+    if args.neofile:
+        report(args.neofile)
+        return
+    with open(TEST_NEO_FILE) as file:
+        header = next(csv.reader(file))
+    with tempfile.TemporaryDirectory() as tmp:
+        neofile = pathlib.Path(tmp) / 'neos.csv'
+        write_neos_csv(neofile, make_neos(args.neos), header)
+        report(neofile)
+
+
+if __name__ == '__main__':
+    main()
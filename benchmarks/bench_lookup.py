@@ -0,0 +1,51 @@
+"""Measure `get_neo_by_designation`/`get_neo_by_name` latency as the NEO count grows.
+
+    $ python3 -m benchmarks.bench_lookup
+    $ python3 -m benchmarks.bench_lookup --sizes 10000 100000 1000000
+
+With the alias index the latency should stay flat from 10k to 1M NEOs.
+"""
+import argparse
+import random
+import timeit
+
+from database import NEODatabase
+from benchmarks.synthetic import make_neos
+
+
+def bench(n, lookups=10000, repeat=5):
+    """Return the best per-lookup latency, in microseconds, for each kind of lookup."""
+    neos = make_neos(n)
+    database = NEODatabase(neos, [])
+
+    rng = random.Random(1)
+    sample = rng.sample(neos, min(lookups, n))
+    named = [neo for neo in neos if neo.name][:lookups]
+    cases = {
+        'designation': (database.get_neo_by_designation, [neo.designation for neo in sample]),
+        'name': (database.get_neo_by_name, [neo.name for neo in named]),
+        'alias': (database.get_neo_by_name, [f"{neo.designation} {neo.name}" for neo in named]),
+        'missing': (database.get_neo_by_designation, [f"missing-{i}" for i in range(lookups)]),
+    }
+
+    results = {}
+    for label, (lookup, keys) in cases.items():
+        best = min(timeit.repeat(lambda: [lookup(key) for key in keys], number=1, repeat=repeat))
+        results[label] = best / len(keys) * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'neos':>10} {'designation':>12} {'name':>8} {'alias':>8} {'missing':>8}   (us/lookup)")
+    for n in args.sizes:
+        r = bench(n)
+        print(f"{n:>10} {r['designation']:>12.3f} {r['name']:>8.3f} "
+              f"{r['alias']:>8.3f} {r['missing']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Report the memory used per NEO and per close approach, with and without `__slots__`.
+
+    $ python3 -m benchmarks.bench_memory
+    $ python3 -m benchmarks.bench_memory --neofile data/neos.csv --cadfile data/cad.json
+
+The "__dict__" rows load the same files into classes that share the models'
+`__init__` and methods but have no `__slots__`, as the models used to be.
+Memory is measured with `tracemalloc` and includes each object's attribute
+values (strings, floats and datetimes), not just the instance itself.
+"""
+import argparse
+import gc
+import pathlib
+import tracemalloc
+import unittest.mock
+
+import models
+from extract import load_neos, load_approaches
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TESTS_ROOT = PROJECT_ROOT / 'tests'
+
+
+def without_slots(cls):
+    """Return a copy of a model class that stores its attributes in a `__dict__`."""
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in cls.__slots__ and name not in ('__slots__', '__dict__')}
+    return type(cls.__name__, (), namespace)
+
+
+def measure(load, path):
+    """Return (objects, bytes per object) for the objects built by `load(path)`."""
+    gc.collect()
+    tracemalloc.start()
+    objects = load(path)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(objects), size / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path, default=TESTS_ROOT / 'test-neos-2020.csv')
+    parser.add_argument('--cadfile', type=pathlib.Path, default=TESTS_ROOT / 'test-cad-2020.json')
+    args = parser.parse_args()
+
+    print(f"{'model':>16} {'layout':>9} {'objects':>9} {'bytes/object':>13}")
+    for layout in ('__dict__', '__slots__'):
+        neo_cls, approach_cls = models.NearEarthObject, models.CloseApproach
+        if layout == '__dict__':
+            neo_cls, approach_cls = without_slots(neo_cls), without_slots(approach_cls)
+        with unittest.mock.patch('extract.NearEarthObject', neo_cls), \
+                unittest.mock.patch('extract.CloseApproach', approach_cls):
+            n, per_neo = measure(load_neos, args.neofile)
+            print(f"{'NearEarthObject':>16} {layout:>9} {n:>9,} {per_neo:>13.0f}")
+            n, per_approach = measure(load_approaches, args.cadfile)
+            print(f"{'CloseApproach':>16} {layout:>9} {n:>9,} {per_approach:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
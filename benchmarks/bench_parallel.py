@@ -0,0 +1,85 @@
+"""Measure how loading the data files scales with the number of worker processes.
+
+    $ python3 -m benchmarks.bench_parallel
+    $ python3 -m benchmarks.bench_parallel --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first. Each worker
+count runs `parallel.load` in a fresh interpreter, `--repeat` times, and the
+best time is reported with its speedup over one worker (which reads the files
+serially, in-process). Speedups are bounded by the cores available, which are
+reported too.
+"""
+import argparse
+import csv
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+import parallel
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+WORKERS = (1, 2, 4, 8)
+
+
+def child(workers, neofile, cadfile):
+    """Load the data files with `workers` processes and print the time it took."""
+    start = time.perf_counter()
+    neos, approaches = parallel.load(neofile, cadfile, int(workers))
+    print(time.perf_counter() - start, len(neos), len(approaches))
+
+
+def report(neofile, cadfile, repeat):
+    """Print the load time of every worker count."""
+    print(f"{len(os.sched_getaffinity(0))} cores available")
+    print(f"{'workers':>7} {'load time':>10} {'speedup':>8} {'approaches':>11}")
+    baseline = None
+    for workers in WORKERS:
+        times = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_parallel', '--child',
+                                     str(workers), str(neofile), str(cadfile)],
+                                    check=True, capture_output=True, text=True).stdout
+            elapsed, _, count = output.split()
+            times.append(float(elapsed))
+        best = min(times)
+        baseline = baseline or best
+        print(f"{workers:>7} {best:>9.2f}s {baseline / best:>7.2f}x {int(count):>11,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', nargs=3, metavar=('WORKERS', 'NEOFILE', 'CADFILE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        report(neofile, cadfile, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
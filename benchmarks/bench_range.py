@@ -0,0 +1,97 @@
+"""Compare selective distance and velocity queries with and without the range indexes.
+
+    $ python3 -m benchmarks.bench_range
+    $ python3 -m benchmarks.bench_range --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first, and a store of
+them. Each query runs on a fresh database, once scanning its time slice and once
+through range indexes, as a database built with `range_indexes` has. Building
+the indexes is timed on its own: the "cold" speedup counts it, as a one-shot
+`main.py query` would pay it, and the "warm" speedup doesn't, as a long-running
+shell or server amortizes it.
+"""
+import argparse
+import csv
+import datetime
+import pathlib
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+import filters
+import store
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+# Bounds are tolerant, as in `helpers.eq_floats`: `--max-distance 0.02` only
+# matches distances under about 0.0099.
+QUERIES = {
+    'distance<0.02': {filters.DISTANCE_MAX: 0.02},
+    'velocity>44': {filters.VELOCITY_MIN: 44},
+    'distance<0.05 velocity>40': {filters.DISTANCE_MAX: 0.05, filters.VELOCITY_MIN: 40},
+    'decade distance<0.05': {filters.START_DATE: datetime.date(2020, 1, 1),
+                             filters.END_DATE: datetime.date(2029, 12, 31),
+                             filters.DISTANCE_MAX: 0.05},
+    'distance<0.1': {filters.DISTANCE_MAX: 0.1},
+    'velocity>5': {filters.VELOCITY_MIN: 5},
+}
+
+
+def timed_query(database, args):
+    """Return the number of matches of a query, and the time it takes to list them."""
+    start = time.perf_counter()
+    count = sum(1 for _ in database.query(args))
+    return count, time.perf_counter() - start
+
+
+def report(neofile, cadfile, storefile):
+    """Print the time of every query, by every backend, with and without range indexes."""
+    backends = {
+        'objects': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile)),
+        'lazy': lambda: NEODatabase(load_neos(neofile), load_approaches(cadfile, lazy=True)),
+        'store': lambda: NEODatabase(*store.open_store(storefile)[1:]),
+    }
+    print(f"{'query':>26} {'backend':>8} {'matches':>8} {'scan':>9} {'build':>9} {'index':>9} "
+          f"{'cold':>8} {'warm':>8}")
+    for name, args in QUERIES.items():
+        for backend, make_database in backends.items():
+            count, scan = timed_query(make_database(), args)
+            db = make_database()
+            # What `range_indexes` adds to the construction of the database.
+            start = time.perf_counter()
+            db._index_ranges()
+            build = time.perf_counter() - start
+            _, new = timed_query(db, args)
+            print(f"{name:>26} {backend:>8} {count:>8} {scan * 1000:>7.1f}ms {build * 1000:>7.0f}ms "
+                  f"{new * 1000:>7.1f}ms {scan / (build + new):>7.2f}x {scan / new:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        store.convert(neofile, cadfile, tmp / 'neos.store')
+        report(neofile, cadfile, tmp / 'neos.store')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Measure the startup time of a one-shot command with and without a snapshot.
+
+    $ python3 -m benchmarks.bench_snapshot
+    $ python3 -m benchmarks.bench_snapshot --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first. Each run is a
+fresh `main.py query --limit 1`, timed from the outside:
+
+* "no snapshot" reads the data files, as every run used to;
+* "cold" reads them and also writes the snapshot;
+* "warm" opens the snapshot written by the cold run.
+"""
+import argparse
+import csv
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+
+def run(neofile, cadfile, *options):
+    """Return the wall-clock time of one `main.py query` run."""
+    command = [sys.executable, str(PROJECT_ROOT / 'main.py'), '--neofile', str(neofile),
+               '--cadfile', str(cadfile), *options, 'query', '--limit', '1']
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def report(neofile, cadfile, repeat):
+    """Print the startup time of each mode, the best of `repeat` runs for the repeatable ones."""
+    with tempfile.TemporaryDirectory() as snapshots:
+        plain = min(run(neofile, cadfile, '--no-snapshot') for _ in range(repeat))
+        cold = run(neofile, cadfile, '--snapshot-dir', snapshots)
+        warm = min(run(neofile, cadfile, '--snapshot-dir', snapshots) for _ in range(repeat))
+    print(f"{'startup':>12} {'time':>8}")
+    print(f"{'no snapshot':>12} {plain:>7.2f}s")
+    print(f"{'cold':>12} {cold:>7.2f}s")
+    print(f"{'warm':>12} {warm:>7.2f}s   ({plain / warm:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.neofile and args.cadfile:
+        report(args.neofile, args.cadfile, args.repeat)
+        return
+    with open(TEST_NEO_FILE) as file:
+        header = next(csv.reader(file))
+    with tempfile.TemporaryDirectory() as tmp:
+        neos = make_neos(args.neos)
+        neofile, cadfile = pathlib.Path(tmp) / 'neos.csv', pathlib.Path(tmp) / 'cad.json'
+        write_neos_csv(neofile, neos, header)
+        write_cad_json(cadfile, args.approaches, neos)
+        report(neofile, cadfile, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
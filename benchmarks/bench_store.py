@@ -0,0 +1,101 @@
+"""Compare serving queries from a memory-mapped store against loading the data files.
+
+    $ python3 -m benchmarks.bench_store
+    $ python3 -m benchmarks.bench_store --neofile data/neos.csv --cadfile data/cad.json
+
+Without data files, a synthetic neos.csv and cad.json of `--neos` and
+`--approaches` rows are written to a temporary directory first, and converted
+into a store. Each backend runs the queries of `bench_columnar` in a fresh
+interpreter and reports:
+
+* how long opening the data took, and then all the queries;
+* the private (anonymous) memory of the process - what every worker pays for
+  itself - and the file-backed memory, which processes mapping the same store
+  share through the page cache (from /proc/self/status, so Linux only).
+"""
+import argparse
+import csv
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+import store
+from benchmarks.bench_columnar import QUERIES
+from benchmarks.synthetic import make_neos, write_cad_json, write_neos_csv
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+TEST_NEO_FILE = PROJECT_ROOT / 'tests' / 'test-neos-2020.csv'
+
+BACKENDS = ('data files', 'store', 'store --columnar')
+
+
+def memory():
+    """Return the (private, file-backed) resident memory of this process in MB."""
+    fields = {}
+    with open('/proc/self/status') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            fields[name] = value.split()[0] if value.split() else '0'
+    return int(fields.get('RssAnon', 0)) / 1024, int(fields.get('RssFile', 0)) / 1024
+
+
+def child(backend, neofile, cadfile, path):
+    """Open the data with one backend, run every query, and print the measurements."""
+    start = time.perf_counter()
+    if backend == 'data files':
+        database = NEODatabase(load_neos(neofile), load_approaches(cadfile, lazy=True))
+    else:
+        _, neos, approaches = store.open_store(path)
+        database = NEODatabase(neos, approaches, columnar=backend.endswith('--columnar'))
+    loaded = time.perf_counter()
+    rows = sum(sum(1 for _ in database.query(args)) for args in QUERIES.values())
+    queried = time.perf_counter()
+    print(loaded - start, queried - loaded, rows, *memory())
+
+
+def report(neofile, cadfile, path):
+    """Print the measurements of every backend."""
+    print(f"{'backend':>17} {'open':>7} {'queries':>8} {'rows':>9} {'private':>10} {'shared':>9}")
+    for backend in BACKENDS:
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_store', '--child',
+                                 backend, str(neofile), str(cadfile), str(path)],
+                                check=True, capture_output=True, text=True).stdout
+        opened, queried, rows, private, shared = output.split()
+        print(f"{backend:>17} {float(opened):>6.2f}s {float(queried):>7.2f}s {int(rows):>9,} "
+              f"{float(private):>7.1f} MB {float(shared):>6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neofile', type=pathlib.Path)
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--neos', type=int, default=25000)
+    parser.add_argument('--approaches', type=int, default=400000)
+    parser.add_argument('--child', nargs=4, metavar=('BACKEND', 'NEOFILE', 'CADFILE', 'STORE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        neofile, cadfile = args.neofile, args.cadfile
+        if not (neofile and cadfile):
+            with open(TEST_NEO_FILE) as file:
+                header = next(csv.reader(file))
+            neos = make_neos(args.neos)
+            neofile, cadfile = tmp / 'neos.csv', tmp / 'cad.json'
+            write_neos_csv(neofile, neos, header)
+            write_cad_json(cadfile, args.approaches, neos)
+        store.convert(neofile, cadfile, tmp / 'neos.store')
+        report(neofile, cadfile, tmp / 'neos.store')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Measure the peak memory and time of loading cad.json whole versus streaming it.
+
+    $ python3 -m benchmarks.bench_stream
+    $ python3 -m benchmarks.bench_stream --cadfile data/cad.json
+
+Without `--cadfile`, a synthetic cad.json of `--approaches` rows is written to a
+temporary directory first. Each loader runs in a fresh interpreter, so that its
+peak resident set size isn't hidden by the one before it:
+
+* "json.load" parses the whole document and then builds the approaches, as
+  `extract.load_approaches` used to;
+* "load_approaches" builds the approaches from a `CadReader`;
+* "iter_approaches" only counts the stream, for a lower bound on the reader's cost.
+"""
+import argparse
+import json
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from extract import load_approaches, iter_approaches
+from models import CloseApproach
+from benchmarks.synthetic import make_neos, write_cad_json
+
+
+def load_whole(cad_json_path):
+    """Load close approaches the way `extract.load_approaches` originally did."""
+    with open(cad_json_path) as file:
+        reader = json.load(file)
+    field_to_index = {field: i for i, field in enumerate(reader['fields'])}
+    return [CloseApproach(designation=row[field_to_index['des']],
+                          cd_time=row[field_to_index['cd']],
+                          distance=float(row[field_to_index['dist']]),
+                          velocity=float(row[field_to_index['v_rel']]))
+            for row in reader['data']]
+
+
+LOADERS = {
+    'json.load': load_whole,
+    'load_approaches': load_approaches,
+    'iter_approaches': lambda path: sum(1 for _ in iter_approaches(path)),
+}
+
+
+def child(loader, cadfile):
+    """Run one loader and print its time and peak RSS (ru_maxrss is in KB on Linux)."""
+    start = time.perf_counter()
+    LOADERS[loader](cadfile)
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def report(cadfile):
+    """Print the load time and peak RSS of every loader on `cadfile`."""
+    print(f"{'loader':>16} {'load time':>10} {'peak RSS':>12}")
+    for loader in LOADERS:
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_stream',
+                                 '--child', loader, str(cadfile)],
+                                check=True, capture_output=True, text=True).stdout
+        elapsed, rss = map(float, output.split())
+        print(f"{loader:>16} {elapsed:>9.2f}s {rss:>9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cadfile', type=pathlib.Path)
+    parser.add_argument('--approaches', type=int, default=1000000)
+    parser.add_argument('--child', nargs=2, metavar=('LOADER', 'CADFILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+    elif args.cadfile:
+        report(args.cadfile)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            cadfile = pathlib.Path(tmp) / 'cad.json'
+            write_cad_json(cadfile, args.approaches, make_neos(25000))
+            report(cadfile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Measure the throughput and memory use of the streaming writers in `write`.
+
+    $ python3 -m benchmarks.bench_write
+    $ python3 -m benchmarks.bench_write --rows 1000000 --flush-size 10000
+
+The results are streamed from a small pool of linked approaches, so any growth
+in memory comes from the writer itself rather than from the input.
+"""
+import argparse
+import itertools
+import os
+import resource
+import tempfile
+import time
+
+from database import NEODatabase
+import write
+from benchmarks.synthetic import make_neos, make_approaches
+
+
+def stream(pool, n):
+    """Yield `n` approaches, cycling through `pool`."""
+    return itertools.islice(itertools.cycle(pool), n)
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench(writer, pool, rows, **kwargs):
+    """Write `rows` results with `writer` and return its throughput in MB/s."""
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        writer(stream(pool, rows), os.path.join(tmp, 'results'), **kwargs)
+        elapsed = time.perf_counter() - start
+        size = sum(entry.stat().st_size for entry in os.scandir(tmp))
+    return size / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--flush-size', type=int, default=write.FLUSH_SIZE)
+    args = parser.parse_args()
+
+    neos = make_neos(100)
+    pool = make_approaches(1000, neos)
+    NEODatabase(neos, pool)
+
+    print(f"{'writer':>15} {'rows':>10} {'MB/s':>8} {'peak RSS before':>16} {'after':>8}")
+    for name in ('write_to_csv', 'write_to_json', 'write_to_ndjson'):
+        writer = getattr(write, name)
+        before = peak_rss()
+        rate = bench(writer, pool, args.rows, flush_size=args.flush_size)
+        print(f"{name:>15} {args.rows:>10,} {rate:>8.1f} {before:>13.1f} MB {peak_rss():>5.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Generate synthetic near-Earth objects for the benchmarks.
+
+The generated objects look like the real data closely enough to exercise the
+same code paths: numbered NEOs with and without IAU names, provisional
+designations like "2020 AB12", unknown diameters and a share of PHAs.
+Close approaches are spread evenly over 1900-2200, like the real cad.json.
+"""
+import csv
+import datetime
+import json
+import math
+import random
+import string
+
+from models import NearEarthObject, CloseApproach
+
+
+def make_designation(i):
+    """Return a unique primary designation for the `i`-th synthetic NEO."""
+    if i % 2:
+        return str(i)
+    year = 1900 + (i // 2) % 125
+    letters = string.ascii_uppercase[(i // 250) % 26] + string.ascii_uppercase[(i // 6500) % 26]
+    return f"{year} {letters}{i}"
+
+
+def make_neos(n, seed=0):
+    """Build `n` synthetic `NearEarthObject`s.
+
+    :param n: The number of NEOs to build.
+    :param seed: Seed for the random generator, so runs are reproducible.
+    :return: A list of `NearEarthObject`s.
+    """
+    rng = random.Random(seed)
+    neos = []
+    for i in range(n):
+        params = {'designation': make_designation(i), 'hazardous': rng.random() < 0.1}
+        if i % 20 == 1:
+            params['name'] = f"Name{i}"
+        if rng.random() < 0.3:
+            params['diameter'] = round(rng.uniform(0.01, 10), 3)
+        neos.append(NearEarthObject(**params))
+    return neos
+
+
+def make_cd_times(n, seed=0):
+    """Return `n` sorted NASA-formatted calendar dates, e.g. "2020-Jan-01 00:54"."""
+    rng = random.Random(seed)
+    start = datetime.datetime(1900, 1, 1)
+    span = (datetime.datetime(2200, 1, 1) - start).total_seconds() // 60
+    minutes = sorted(rng.randrange(int(span)) for _ in range(n))
+    return [(start + datetime.timedelta(minutes=m)).strftime("%Y-%b-%d %H:%M") for m in minutes]
+
+
+def make_approaches(n, neos, seed=0):
+    """Build `n` synthetic `CloseApproach`es of the given NEOs, in time order.
+
+    :param n: The number of close approaches to build.
+    :param neos: A sequence of `NearEarthObject`s the approaches belong to.
+    :param seed: Seed for the random generator, so runs are reproducible.
+    :return: A list of unlinked `CloseApproach`es.
+    """
+    rng = random.Random(seed)
+    return [CloseApproach(designation=rng.choice(neos).designation, cd_time=cd_time,
+                          distance=rng.uniform(0.0001, 0.5), velocity=rng.uniform(1, 45))
+            for cd_time in make_cd_times(n, seed)]
+
+
+def write_cad_json(path, n, neos, seed=0):
+    """Write a cad.json-style file of `n` close approaches of the given NEOs.
+
+    The file has the same layout as the API output - `count`, `data`, `fields`
+    and `signature`, in that order - with every value stored as a string.
+
+    :param path: Where to write the file.
+    :param n: The number of close approaches.
+    :param neos: A sequence of `NearEarthObject`s the approaches belong to.
+    :param seed: Seed for the random generator, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    fields = ["des", "orbit_id", "jd", "cd", "dist", "dist_min", "dist_max",
+              "v_rel", "v_inf", "t_sigma_f", "h"]
+    with open(path, 'w') as file:
+        file.write(f'{{"count": "{n}", "data": [\n')
+        for i, cd_time in enumerate(make_cd_times(n, seed)):
+            dist = rng.uniform(0.0001, 0.5)
+            row = [rng.choice(neos).designation, "1", "2451544.5", cd_time, str(dist),
+                   str(dist * 0.99), str(dist * 1.01), str(rng.uniform(1, 45)),
+                   str(rng.uniform(1, 45)), "< 00:01", "20.1"]
+            file.write((",\n" if i else "") + json.dumps(row))
+        file.write(f'\n], "fields": {json.dumps(fields)}, ')
+        file.write('"signature": {"source": "synthetic", "version": "1.1"}}\n')
+
+
+def write_neos_csv(path, neos, header, seed=0):
+    """Write a neos.csv-style file describing the given NEOs.
+
+    Every column of `header` is filled in - `pdes`, `name`, `pha` and `diameter`
+    from the NEOs, and the rest with numbers - so rows are as wide as the real ones.
+
+    :param path: Where to write the file.
+    :param neos: A sequence of `NearEarthObject`s.
+    :param header: The column names, e.g. the header of the real neos.csv.
+    :param seed: Seed for the random generator, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for neo in neos:
+            row = [f"{rng.uniform(0, 100):.6g}" for _ in header]
+            row[header.index('pdes')] = neo.designation
+            row[header.index('name')] = neo.name or ''
+            row[header.index('pha')] = 'Y' if neo.hazardous else 'N'
+            row[header.index('diameter')] = '' if math.isnan(neo.diameter) else str(neo.diameter)
+            writer.writerow(row)
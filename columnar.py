@@ -0,0 +1,221 @@
+"""An optional NumPy backend that evaluates query filters over columns.
+
+The `ColumnarApproaches` class keeps one NumPy array per attribute of the close
+approaches that the filters look at - time, distance, velocity and the index of
+the NEO - in the same order as the approaches they were built from, and one per
+attribute of the NEOs - diameter and hazardous flag. A query becomes a handful of vectorized
+boolean masks, and only the indices of the matching rows come back, so the
+`CloseApproach` objects are only touched for the rows that are returned.
+
+NumPy is not required by the rest of the project. If it isn't installed,
+building a `ColumnarApproaches` raises an `ImportError`.
+"""
+import datetime
+
+from aggregate import GROUP_BY, Summary, month_key, sort_key
+import filters
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Times are stored as whole minutes since this epoch - the data isn't more precise.
+EPOCH = datetime.datetime(1900, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(dt):
+    """Convert a naive datetime into whole minutes since `EPOCH`."""
+    return (dt - EPOCH) // datetime.timedelta(minutes=1)
+
+
+def date_to_minutes(date):
+    """Convert a date into minutes since `EPOCH` at the start of that day."""
+    return to_minutes(datetime.datetime.combine(date, datetime.time.min))
+
+
+class ColumnarApproaches:
+    """Close approach attributes stored as NumPy arrays, with vectorized filters.
+
+    Row `i` of every column describes the `i`-th approach the columns were built
+    from. The approaches must be sorted by time, as they are in `NEODatabase`,
+    so that date filters resolve to a slice with `searchsorted`.
+    """
+    def __init__(self, approaches, neos):
+        """Build the columns from linked close approaches.
+
+        Approaches whose NEO is unknown get an NEO index of -1, a NaN diameter
+        and a False hazardous flag.
+
+        :param approaches: A time-sorted sequence of `CloseApproach`es.
+        :param neos: A sequence of the `NearEarthObject`s the approaches belong to.
+        """
+        if np is None:
+            raise ImportError("The columnar backend requires NumPy (`pip install numpy`).")
+
+        neo_to_index = {id(neo): i for i, neo in enumerate(neos)}
+        n = len(approaches)
+        self.time = np.fromiter((to_minutes(approach.time) for approach in approaches),
+                                dtype=np.int64, count=n)
+        self.distance = np.fromiter((approach.distance for approach in approaches),
+                                    dtype=np.float64, count=n)
+        self.velocity = np.fromiter((approach.velocity for approach in approaches),
+                                    dtype=np.float64, count=n)
+        self.neo_index = np.fromiter((neo_to_index.get(id(approach.neo), -1)
+                                      for approach in approaches), dtype=np.int32, count=n)
+        # Index -1 picks the NaN/False sentinel at the end of the NEO arrays.
+        self.neo_diameter = np.array([neo.diameter for neo in neos] + [float('nan')],
+                                     dtype=np.float64)
+        self.neo_hazardous = np.array([neo.hazardous for neo in neos] + [False], dtype=np.bool_)
+        self.neo_designations = [neo.designation for neo in neos]
+
+    @classmethod
+    def from_arrays(cls, time, distance, velocity, neo_index, neo_diameter, neo_hazardous,
+                    neo_designations=()):
+        """Wrap existing arrays, such as views of a `store`, without copying them.
+
+        :param time: The approach times, in minutes since `EPOCH`, in order.
+        :param distance: The approach distances.
+        :param velocity: The approach velocities.
+        :param neo_index: The index of each approach's NEO in the NEO arrays.
+        :param neo_diameter: The diameter of each NEO.
+        :param neo_hazardous: Whether each NEO is potentially hazardous.
+        :param neo_designations: The designation of each NEO.
+        :return: A `ColumnarApproaches` over the given arrays.
+        """
+        if np is None:
+            raise ImportError("The columnar backend requires NumPy (`pip install numpy`).")
+        columns = cls.__new__(cls)
+        columns.time, columns.distance, columns.velocity = time, distance, velocity
+        columns.neo_index, columns.neo_diameter, columns.neo_hazardous = (
+            neo_index, neo_diameter, neo_hazardous)
+        columns.neo_designations = neo_designations
+        return columns
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.time)
+
+    def time_slice(self, args):
+        """Find the rows that can satisfy the date filters, by binary search.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: A `(lo, hi)` tuple of row indices.
+        """
+        lo, hi = 0, len(self.time)
+        if args.get(filters.START_DATE) != None:
+            # The start date is exclusive, so the slice begins on the day after.
+            lo = int(np.searchsorted(self.time, date_to_minutes(args[filters.START_DATE])
+                                     + MINUTES_PER_DAY, side='left'))
+        if args.get(filters.END_DATE) != None:
+            hi = int(np.searchsorted(self.time, date_to_minutes(args[filters.END_DATE]),
+                                     side='left'))
+        if args.get(filters.DATE) != None:
+            day = date_to_minutes(args[filters.DATE])
+            lo = max(lo, int(np.searchsorted(self.time, day, side='left')))
+            hi = min(hi, int(np.searchsorted(self.time, day + MINUTES_PER_DAY, side='left')))
+        return lo, max(lo, hi)
+
+    def mask(self, args, lo=0, hi=None):
+        """Evaluate the non-date filters over rows `lo:hi` as one boolean mask.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: A boolean array over rows `lo:hi`, or None if no filter is active.
+        """
+        hi = len(self.time) if hi is None else hi
+        mask = None
+        neo_mask = None
+        for attribute, (low, high) in filters.compile_ranges(args).items():
+            if attribute == 'diameter':
+                # NEO attributes are checked once per NEO, then looked up per row.
+                neo_mask = (self.neo_diameter >= low) & (self.neo_diameter <= high)
+                continue
+            column = getattr(self, attribute)[lo:hi]
+            # NaN compares False on both sides, just like `bt_floats`/`lt_floats`.
+            current = (column >= low) & (column <= high)
+            mask = current if mask is None else mask & current
+
+        if args.get(filters.HAZARDOUS) != None:
+            current = self.neo_hazardous == bool(args[filters.HAZARDOUS])
+            neo_mask = current if neo_mask is None else neo_mask & current
+        if neo_mask is not None:
+            current = neo_mask[self.neo_index[lo:hi]]
+            mask = current if mask is None else mask & current
+        return mask
+
+    def select(self, args):
+        """Find the rows matching all of the filters.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: A sorted NumPy array of the matching row indices.
+        """
+        lo, hi = self.time_slice(args)
+        mask = self.mask(args, lo, hi)
+        if mask is None:
+            return np.arange(lo, hi)
+        return np.flatnonzero(mask) + lo
+
+    def count(self, args):
+        """Count the rows matching all of the filters, without listing them.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: The number of matching rows.
+        """
+        lo, hi = self.time_slice(args)
+        mask = self.mask(args, lo, hi)
+        return hi - lo if mask is None else int(np.count_nonzero(mask))
+
+    def aggregate(self, args, group_by=None):
+        """Summarize the rows matching all of the filters, as `aggregate.summarize` does.
+
+        The groups are found with `np.unique`, and each statistic is one vectorized
+        reduction over the matching rows, sorted by group.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :param group_by: One of `aggregate.GROUP_BY`, or None to summarize everything together.
+        :return: A dictionary mapping each group to its `aggregate.Summary`, in sorted order.
+        """
+        if group_by not in (None,) + GROUP_BY:
+            raise ValueError(f"Can't group by {group_by!r}.")
+        rows = self.select(args)
+        if not len(rows):
+            return {}
+        distance, velocity = self.distance[rows], self.velocity[rows]
+        if group_by in ('year', 'month'):
+            unit = 'datetime64[Y]' if group_by == 'year' else 'datetime64[M]'
+            keys = (np.datetime64(EPOCH, 'm') + self.time[rows].astype('timedelta64[m]')).astype(unit)
+            keys = keys.astype(np.int64)
+        elif group_by == 'neo':
+            keys = self.neo_index[rows]
+        elif group_by == 'hazardous':
+            keys = self.neo_hazardous[self.neo_index[rows]]
+        else:
+            keys = np.zeros(len(rows), dtype=np.int8)
+
+        groups, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        statistics = [counts]
+        for column in (distance, velocity):
+            ordered = column[order]
+            statistics += [np.minimum.reduceat(ordered, starts), np.maximum.reduceat(ordered, starts),
+                           np.bincount(inverse, weights=column) / counts]
+
+        # Name each group as `aggregate.summarize` does.
+        if group_by == 'year':
+            names = (groups + 1970).tolist()
+        elif group_by == 'month':
+            names = [month_key(1970 + month // 12, month % 12 + 1) for month in groups.tolist()]
+        elif group_by == 'neo':
+            designations = self.neo_designations
+            names = [designations[i] if 0 <= i < len(designations) else None
+                     for i in groups.tolist()]
+        elif group_by == 'hazardous':
+            names = groups.tolist()
+        else:
+            names = [None]
+        summaries = {name: Summary(*values) for name, values in
+                     zip(names, zip(*(statistic.tolist() for statistic in statistics)))}
+        return {name: summaries[name] for name in sorted(summaries, key=sort_key)}
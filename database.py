@@ -1,9 +1,49 @@
 import datetime
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque, namedtuple
+from itertools import accumulate, islice
+from operator import attrgetter
 from typing import Union
 from extract import *
+from columnar import ColumnarApproaches
+from store import StoreApproaches
+import aggregate
 import filters
 
 
+# Query results are cached for this many distinct sets of filters, at most...
+CACHE_ENTRIES = 128
+# ...and in at most this many bytes of result indices.
+CACHE_BYTES = 64 << 20
+
+# A range index only answers a query when its candidates are at most this
+# fraction of the query's time slice; otherwise scanning the slice is cheaper.
+RANGE_INDEX_FRACTION = 0.25
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'entries', 'max_entries',
+                                     'bytes', 'max_bytes'])
+
+# The value of every approach by position, the positions in increasing order of
+# value (leaving out NaNs, which match no range), and the values in that order.
+RangeIndex = namedtuple('RangeIndex', ['values', 'order', 'sorted_values'])
+
+
+class _CachedResult:
+    """The positions of the approaches matching one set of filters, in time order.
+
+    A query that wasn't read to the end leaves `complete` False, and a later one
+    carries on scanning after the last position. Only one query at a time - the
+    one that set `scanning` - adds to `indices`.
+    """
+    __slots__ = ('indices', 'complete', 'scanning')
+
+    def __init__(self):
+        self.indices = array('I')
+        self.complete = False
+        self.scanning = False
+
 
 class NEODatabase:
     """A database of near-Earth objects and their close approaches.
@@ -13,7 +53,8 @@ class NEODatabase:
     help fetch NEOs by primary designation or by name and to help speed up
     querying for close approaches that match criteria.
     """
-    def __init__(self, neos, approaches):
+    def __init__(self, neos, approaches, columnar=False, cache_entries=CACHE_ENTRIES,
+                 cache_bytes=CACHE_BYTES, range_indexes=False):
         """Create a new `NEODatabase`.
 
         As a precondition, this constructor assumes that the collections of NEOs
@@ -21,27 +62,68 @@ class NEODatabase:
         `.approaches` attribute of each `NearEarthObject` resolves to an empty
         collection, and the `.neo` attribute of each `CloseApproach` is None.
 
+        If `approaches` is a `LazyApproaches`, the approaches stay unbuilt until a
+        query returns them, and an NEO's `.approaches` are only attached when the
+        NEO is fetched with one of the `get_neo_by_*` methods.
+
         :param neos: A collection of `NearEarthObject`s.
-        :param approaches: A collection of `CloseApproach`es.
+        :param approaches: A collection of `CloseApproach`es, a stream of them such as
+        `extract.iter_approaches`, a `LazyApproaches`, or the `StoreApproaches` of a store.
+        :param columnar: Whether to evaluate queries with the NumPy backend in `columnar`.
+        :param cache_entries: How many query results to keep, least recently used first
+        out; 0 turns the cache off.
+        :param cache_bytes: How much memory the cached results may take.
+        :param range_indexes: Whether to build sorted indexes of distance and velocity,
+        for long-running processes: building them takes longer than scanning once.
         """
-        
-        des_to_neo = {}
+        self._columnar = columnar
+        self._columns = None
+
+        self._cache = OrderedDict()
+        self._cache_entries = cache_entries
+        self._cache_bytes = cache_bytes
+        self._cache_lock = threading.Lock()
+        # Fetching an NEO of a lazy database attaches its approaches, from any thread.
+        self._attach_lock = threading.Lock()
+        self.cache_hits = self.cache_misses = 0
+        self._hazardous_counts = None
+        self._range_indexes = {}
+
+        self._neos_by_designation = {}
         for neo in neos:
-            des_to_neo[neo.designation] = neo
-        
-        for close_approach in approaches:
-            try:
-                curr_des = des_to_neo[close_approach._designation]
-                close_approach.neo = curr_des
-                curr_des.approaches.append(close_approach)
-            except KeyError:
-                #designation doesnt exist
-                print("skipped an approach")
-                continue
-        
-        self._neos = des_to_neo.values()
-        self._approaches = approaches
-            
+            self._neos_by_designation[neo.designation] = neo
+        self._neos = self._neos_by_designation.values()
+
+        # Approaches are kept ordered by time, with a parallel list of their times,
+        # so that date filters resolve to a contiguous slice by binary search.
+        self._approaches = []
+        self._times = []
+        self._lazy = False
+        if isinstance(approaches, StoreApproaches):
+            # A store's columns are filtered where they are, even with `columnar`.
+            self._index_lazily(approaches)
+            if columnar:
+                self._columns = approaches.columns()
+        elif isinstance(approaches, LazyApproaches) and not columnar:
+            self._index_lazily(approaches)
+        else:
+            self.add_approaches(approaches)
+
+        # Every way a user may refer to an NEO resolves through this one index:
+        # "433", "433 Eros", "433 (Eros)" and "Eros" all map to the same object.
+        # Designations are added last so that they win any collision with a name.
+        self._aliases = {}
+        for neo in self._neos:
+            if neo.name:
+                self._aliases[f"{neo.designation} {neo.name}"] = neo
+                self._aliases[neo.fullname] = neo
+                self._aliases[neo.name] = neo
+        for neo in self._neos:
+            self._aliases[neo.designation] = neo
+
+        if range_indexes and self._columns is None:
+            self._index_ranges()
+
 
     def get_neo_by_designation(self, designation:str) -> Union[None, NearEarthObject]:
         """Find and return an NEO by its primary designation.
@@ -50,15 +132,12 @@ class NEODatabase:
         Each NEO in the data set has a unique primary designation, as a string.
 
         The matching is exact - check for spelling and capitalization if no
-        match is found.
+        match is found. Aliases such as "433 Eros" resolve to the same NEO as "433".
 
         :param designation: The primary designation of the NEO to search for.
         :return: The `NearEarthObject` with the desired primary designation, or `None`.
         """
-        for neo in self._neos:
-            if neo.designation == designation:
-                return neo            
-        return None
+        return self._attach_approaches(self._aliases.get(designation))
 
 
     def get_neo_by_name(self, name):
@@ -69,35 +148,113 @@ class NEODatabase:
         the empty string nor with the `None` singleton.
 
         The matching is exact - check for spelling and capitalization if no
-        match is found.
+        match is found. Aliases such as "433 Eros" resolve to the same NEO as "Eros".
 
         :param name: The name, as a string, of the NEO to search for.
         :return: The `NearEarthObject` with the desired name, or `None`.
         """
-        for neo in self._neos:
-            if neo.name == name:
-                return neo            
-        return None
+        if not name:
+            return None
+        return self._attach_approaches(self._aliases.get(name))
+
+
+    def _index_lazily(self, approaches):
+        """Index an `ApproachRows` by time and designation without building its approaches.
+
+        The time index then holds the rows' sort keys - `helpers.cd_to_sort_key`
+        strings, or a store's minutes - instead of datetimes, and the rows of each
+        NEO wait in `self._pending` until the NEO is fetched.
+        """
+        keys = approaches.sort_keys()
+        if not approaches.in_time_order:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            approaches.reorder(order)
+            keys = [keys[i] for i in order]
+        approaches.link(self._neos_by_designation)
+        self._times = keys
+
+        self._pending = {}
+        for designation, rows in approaches.rows_by_designation().items():
+            if designation in self._neos_by_designation:
+                self._pending[designation] = rows
+            else:
+                #designation doesnt exist
+                for _ in rows:
+                    print("skipped an approach")
+
+        self._approaches = approaches
+        self._lazy = True
+
+
+    def _attach_approaches(self, neo):
+        """Attach the approaches of a lazily-indexed NEO the first time it is fetched.
+
+        Another thread fetching the same NEO waits until every approach is attached.
+        """
+        if self._lazy and neo is not None:
+            with self._attach_lock:
+                for i in self._pending.pop(neo.designation, ()):
+                    neo.approaches.append(self._approaches[i])
+        return neo
+
+
+    def _materialize(self):
+        """Build every approach of a lazily-indexed database and switch to the eager index."""
+        if not self._lazy:
+            return
+        self._approaches = list(self._approaches)
+        self._times = [approach.time for approach in self._approaches]
+        for designation, rows in self._pending.items():
+            neo = self._neos_by_designation[designation]
+            neo.approaches.extend(self._approaches[i] for i in rows)
+        self._pending = {}
+        self._lazy = False
+
+
+    def add_approaches(self, approaches):
+        """Link close approaches to their NEOs and add them to the time index.
+
+        The approaches don't have to arrive in time order; the index is merged
+        back into order afterwards, so `min_time` and `max_time` stay correct.
+
+        :param approaches: A collection or stream of unlinked `CloseApproach`es.
+        """
+        self._materialize()
+        for close_approach in approaches:
+            try:
+                curr_des = self._neos_by_designation[close_approach._designation]
+                close_approach.neo = curr_des
+                curr_des.approaches.append(close_approach)
+            except KeyError:
+                #designation doesnt exist
+                print("skipped an approach")
+            # Unlinked approaches are still indexed, as they always have been.
+            self._approaches.append(close_approach)
+
+        # Timsort merges the already-sorted prefix with the new run cheaply.
+        self._approaches.sort(key=lambda approach: approach.time)
+        # Cached results are positions in the old order, and miss the new approaches.
+        self.clear_cache()
+        self._hazardous_counts = None
+        self._times = [approach.time for approach in self._approaches]
+        if self._columnar:
+            self._columns = ColumnarApproaches(self._approaches, list(self._neos))
+        if self._range_indexes:
+            self._index_ranges()
 
 
     @property
     def max_time(self):
-        """find the time of the asteroid furthest in the future in nasas database"""
-        max_date = self._approaches[0].time
-        for approach in self._approaches:
-            if approach.time > max_date:
-                max_date = approach.time 
-        return max_date
+        """find the time of the asteroid furthest in the future in nasas database
+        (read from the end of the time index, so it costs nothing per query)"""
+        return self._approaches[-1].time if self._approaches else None
 
 
     @property
     def min_time(self):
-        """find the time of the earliest recorded asteroid in nasas database"""
-        min_date = self._approaches[0].time
-        for approach in self._approaches:
-            if approach.time < min_date:
-                min_date = approach.time 
-        return min_date
+        """find the time of the earliest recorded asteroid in nasas database
+        (read from the start of the time index, so it costs nothing per query)"""
+        return self._approaches[0].time if self._approaches else None
 
 
     def query(self, args):
@@ -108,12 +265,403 @@ class NEODatabase:
 
         If no arguments are provided, generate all known close approaches.
 
+        The results come in time order, unless `args` asks for another with
+        `filters.SORT_BY` and `filters.DESC`; `filters.TOP` keeps only the first
+        that many. Approaches are kept in time order already, so ordering by time
+        doesn't sort anything. Any other order keeps a heap of the best `TOP`
+        matches while scanning, or sorts every match if there's no `TOP`.
+
+        Date filters narrow the scan to a slice of the time index. With
+        `range_indexes`, distance and velocity filters that match few approaches
+        narrow it further, to the candidates of sorted indexes on those attributes.
+
+        The positions of the matches are cached, keyed on `filters.cache_key`, so
+        repeating a query - with another limit, order or output file, say - doesn't
+        scan again. A query that isn't read to the end caches what it found so far,
+        and the next one carries on from where it stopped.
+
         :param filters: A dictioanary of filters capturing user-specified criteria.
         :return: A stream of matching `CloseApproach` objects.
         """
-        
-        args = filters.clean_args_dict(args, self.min_time.date(), self.max_time.date())
-        for approach in self._approaches:
-            
-            if filters.is_valid_close_approach(approach, args):
-                yield approach
+        yield from self._ordered(args, self._positions(args))
+
+
+    def count(self, args):
+        """Count the close approaches that match a collection of filters, without building them.
+
+        A query whose matches are cached in full is answered by the length of its
+        entry. Otherwise, the time index and a running count of hazardous
+        approaches answer date filters and the hazardous flag by arithmetic on
+        the ends of the time slice, without looking at any approach; other
+        filters are counted by scanning, as `query` does, which caches the matches.
+
+        :param args: A dictionary of filters, as for `query`.
+        :return: The number of matching close approaches.
+        """
+        key = filters.cache_key(args)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.complete:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return len(entry.indices)
+        if self._columns is not None:
+            return self._columns.count(args)
+
+        lo, hi = self._time_slice(args)
+        active = {key for key in filters.FILTER_KEYS if args.get(key) != None}
+        active -= {filters.DATE, filters.START_DATE, filters.END_DATE}
+        if not active:
+            return hi - lo
+        if active == {filters.HAZARDOUS}:
+            counts = self._hazardous_index()
+            hazardous = counts[hi] - counts[lo]
+            return hazardous if args[filters.HAZARDOUS] else hi - lo - hazardous
+        return sum(1 for _ in self._positions(args))
+
+
+    def _hazardous_index(self):
+        """Return the running count of hazardous approaches, building it on first use.
+
+        Item `i` is the number of hazardous approaches among the first `i`, in time
+        order; approaches of unknown NEOs aren't hazardous.
+        """
+        if self._hazardous_counts is None:
+            if self._lazy:
+                neos = self._neos_by_designation
+                flags = (designation in neos and neos[designation].hazardous
+                         for designation in self._approaches.designations())
+            else:
+                flags = (approach.neo is not None and approach.neo.hazardous
+                         for approach in self._approaches)
+            self._hazardous_counts = array('I', accumulate(map(bool, flags), initial=0))
+        return self._hazardous_counts
+
+
+    def _index_ranges(self):
+        """Build the `RangeIndex` of distance and velocity, replacing any earlier ones.
+
+        The values of a lazily-built database come from its raw rows or mapped
+        columns, so building the indexes builds no approaches.
+        """
+        indexes = {}
+        for attribute in ('distance', 'velocity'):
+            if self._lazy:
+                values = self._approaches.values(attribute)
+            else:
+                values = array('d', map(attrgetter(attribute), self._approaches))
+            order = sorted([i for i, value in enumerate(values) if value == value],
+                           key=values.__getitem__)
+            indexes[attribute] = RangeIndex(values, array('I', order),
+                                            array('d', map(values.__getitem__, order)))
+        self._range_indexes = indexes
+
+
+    def _indexed(self, args, lo, hi):
+        """Find the candidates of a query among `lo:hi` through the range indexes, if that pays.
+
+        The distance and velocity filters become inclusive limits, as in
+        `filters.compile_ranges`, so binary searches of the sorted values find
+        exactly the approaches that `bt_floats` and `lt_floats` would accept. The
+        narrowest range gives the candidates, as long as it is narrow enough; they
+        are bounded by the time slice and checked against the values of the other
+        index. Without `range_indexes`, every slice is scanned.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :param lo: The first position of the time slice.
+        :param hi: The position after the last one of the time slice.
+        :return: The positions of the candidates in increasing order, or None to scan the slice.
+        """
+        ranges = filters.compile_ranges(args, skip=(filters.DIAMETER_MIN, filters.DIAMETER_MAX))
+        if not (ranges and self._range_indexes):
+            return None
+
+        probes = []
+        for attribute, (low, high) in ranges.items():
+            index = self._range_indexes[attribute]
+            first = bisect_left(index.sorted_values, low)
+            last = bisect_right(index.sorted_values, high)
+            probes.append((max(last - first, 0), first, index, low, high))
+        probes.sort(key=lambda probe: probe[0])
+        (size, first, index, _, _), others = probes[0], probes[1:]
+        if size > (hi - lo) * RANGE_INDEX_FRACTION:
+            return None
+
+        positions = sorted([i for i in index.order[first:first + size] if lo <= i < hi])
+        for _, _, index, low, high in others:
+            values = index.values
+            positions = [i for i in positions if low <= values[i] <= high]
+        return positions
+
+
+    def aggregate(self, args, group_by=None):
+        """Summarize the close approaches that match a collection of filters, by group.
+
+        The matches are found as in `query`, through the cache, and folded into
+        their groups' `aggregate.Summary` in one pass, reading the columns or raw
+        rows of a store or a lazily-built database rather than building
+        approaches. (Other than the date filters, a lazily-built database builds
+        the approaches it checks, as `query` does.) With the NumPy backend the
+        statistics are vectorized reductions over the columns instead.
+
+        :param args: A dictionary of filters, as for `query`.
+        :param group_by: One of `aggregate.GROUP_BY`, or None to summarize every match together.
+        :return: A dictionary mapping each group to its `aggregate.Summary`, in sorted order.
+        """
+        if self._columns is not None:
+            return self._columns.aggregate(args, group_by)
+        positions = self._positions(args)
+        if self._lazy:
+            records = self._approaches.records(positions)
+        else:
+            records = aggregate.approach_records(map(self._approaches.__getitem__, positions))
+        return aggregate.summarize(records, group_by)
+
+
+    def _ordered(self, args, positions):
+        """Generate the approaches at the positions of a query's matches, in the order it asks for.
+
+        :param args: A dictionary of filters, which may also give `filters.SORT_BY`,
+        `filters.DESC` and `filters.TOP`.
+        :param positions: The positions of the matches, in time order.
+        """
+        sort_by, desc, n = args.get(filters.SORT_BY), args.get(filters.DESC), args.get(filters.TOP)
+        if sort_by in (None, 'time'):
+            if desc:
+                # The last `n` matches in time order are the first `n` in reverse.
+                positions = reversed(deque(positions, maxlen=n or None))
+            yield from map(self._approaches.__getitem__, filters.limit(positions, n))
+        else:
+            yield from filters.top(map(self._approaches.__getitem__, positions), n, sort_by, desc)
+
+
+    def _positions(self, args):
+        """Generate the positions of the matches of a query in time order, through the cache.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        """
+        if not self._cache_entries:
+            yield from self._matches(args)
+            return
+
+        key = filters.cache_key(args)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.cache_misses += 1
+                entry = self._cache[key] = _CachedResult()
+            else:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+
+        indices = entry.indices
+        position = 0
+        try:
+            while True:
+                end = len(indices)
+                yield from islice(indices, position, end)
+                position = end
+                with self._cache_lock:
+                    if len(indices) > end:
+                        # Another query added to the entry since; read that first.
+                        continue
+                    if entry.complete:
+                        return
+                    owner = not entry.scanning
+                    entry.scanning = True
+                # Matches are in increasing order, so the scan resumes after the last
+                # one this query yielded - the owner may be appending past it.
+                matches = self._matches(args, indices[end - 1] + 1 if end else 0)
+                if not owner:
+                    # Another query of the same filters is adding to the entry; scan alone.
+                    yield from matches
+                    return
+                try:
+                    append = indices.append
+                    for i in matches:
+                        append(i)
+                        yield i
+                    entry.complete = True
+                    return
+                finally:
+                    entry.scanning = False
+        finally:
+            self._evict()
+
+
+    def _matches(self, args, start=0):
+        """Generate the positions in `self._approaches` of the matches of a query, in order.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :param start: The position to start scanning from.
+        """
+        if self._columns is not None:
+            for i in self._columns.select(args).tolist():
+                if i >= start:
+                    yield i
+            return
+
+        # The time index resolves the date filters exactly, so they aren't compiled.
+        lo, hi = self._time_slice(args)
+        lo = max(lo, start)
+        # A selective distance or velocity filter narrows the slice down to the
+        # candidates of its range index.
+        candidates = self._indexed(args, lo, hi)
+        if self._lazy and isinstance(self._approaches, StoreApproaches):
+            # Filter the mapped columns, and only build the approaches that match.
+            yield from self._approaches.select(args, lo, hi, rows=candidates)
+            return
+        skip = (filters.DATE, filters.START_DATE, filters.END_DATE)
+        if candidates is None:
+            candidates = range(lo, hi)
+        else:
+            skip += (filters.DISTANCE_MIN, filters.DISTANCE_MAX,
+                     filters.VELOCITY_MIN, filters.VELOCITY_MAX)
+        checks = filters.compile_filters(args, skip=skip)
+        # A lazy database builds approaches one at a time, so a limited query only
+        # builds what it scans.
+        if not checks:
+            yield from candidates
+        elif len(checks) == 1:
+            check, approaches = checks[0], self._approaches
+            for i in candidates:
+                if check(approaches[i]):
+                    yield i
+        else:
+            approaches = self._approaches
+            for i in candidates:
+                approach = approaches[i]
+                for check in checks:
+                    if not check(approach):
+                        break
+                else:
+                    yield i
+
+
+    def query_batch(self, queries):
+        """Answer many queries at once, sharing the work of scanning the approaches.
+
+        Queries with the same `filters.cache_key` are only answered once. When the
+        approaches are built lazily, building them is what a scan costs, so each
+        query's date filters become a slice of the time index, as in `query`, and
+        the union of the slices is scanned once: each approach is built and checked
+        against the other filters of every query whose slice holds it. Otherwise
+        an approach costs nothing to fetch, and each query is answered by its own
+        scan (or by whole columns, for a store or the NumPy backend), which is
+        faster than any shared loop in Python.
+
+        The matches are kept as compact arrays of positions until they are read.
+
+        :param queries: A sequence of dictionaries of filters, as for `query`; each
+        is ordered as it asks for.
+        :return: A list holding a stream of the matching `CloseApproach`es of each
+        query, in the same order as `queries`.
+        """
+        keys = [filters.cache_key(args) for args in queries]
+        plans = {}
+        for key, args in zip(keys, queries):
+            plans.setdefault(key, (args, array('I')))
+
+        if (self._columns is not None or not self._lazy
+                or isinstance(self._approaches, StoreApproaches)):
+            for args, indices in plans.values():
+                indices.extend(self._matches(args))
+        else:
+            self._shared_scan(plans.values())
+        return [self._ordered(args, iter(plans[key][1])) for key, args in zip(keys, queries)]
+
+
+    def _shared_scan(self, plans):
+        """Add the positions of the matches of several queries to their arrays, in one scan.
+
+        :param plans: `(args, indices)` tuples of a dictionary of filters and the
+        array to add the positions of its matches to.
+        """
+        skip = (filters.DATE, filters.START_DATE, filters.END_DATE)
+        slices = [self._time_slice(args) + (filters.compile_filters(args, skip), indices)
+                  for args, indices in plans]
+        approaches = self._approaches
+        # Between consecutive slice boundaries, the same queries are active throughout.
+        boundaries = sorted({bound for lo, hi, _, _ in slices for bound in (lo, hi)})
+        for a, b in zip(boundaries, boundaries[1:]):
+            active = [(checks, indices) for lo, hi, checks, indices in slices
+                      if lo <= a and b <= hi]
+            # Queries without other filters take the whole segment, and those with a
+            # single one skip the inner loop.
+            for checks, indices in active:
+                if not checks:
+                    indices.extend(range(a, b))
+            single = [(checks[0], indices.append) for checks, indices in active
+                      if len(checks) == 1]
+            multiple = [(checks, indices.append) for checks, indices in active
+                        if len(checks) > 1]
+            if not (single or multiple):
+                continue
+            for i in range(a, b):
+                approach = approaches[i]
+                for check, append in single:
+                    if check(approach):
+                        append(i)
+                for checks, append in multiple:
+                    for check in checks:
+                        if not check(approach):
+                            break
+                    else:
+                        append(i)
+
+
+    def _evict(self):
+        """Drop the least recently used query results until the cache fits its limits."""
+        with self._cache_lock:
+            size = sum(entry.indices.itemsize * len(entry.indices)
+                       for entry in self._cache.values())
+            while self._cache and (len(self._cache) > self._cache_entries
+                                   or size > self._cache_bytes):
+                _, entry = self._cache.popitem(last=False)
+                size -= entry.indices.itemsize * len(entry.indices)
+
+
+    def clear_cache(self):
+        """Forget every cached query result, e.g. because the data changed."""
+        with self._cache_lock:
+            self._cache.clear()
+
+
+    def cache_info(self):
+        """Return the hits, misses, entries and size of the query result cache, as a `CacheInfo`."""
+        with self._cache_lock:
+            size = sum(entry.indices.itemsize * len(entry.indices)
+                       for entry in self._cache.values())
+            return CacheInfo(self.cache_hits, self.cache_misses, len(self._cache),
+                             self._cache_entries, size, self._cache_bytes)
+
+
+    def _time_slice(self, args):
+        """Find the slice of `self._approaches` that can satisfy the date filters.
+
+        The start and end dates are exclusive and `date` is inclusive, matching
+        `filters.compile_filters`; approaches outside the slice can't match.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: A `(lo, hi)` tuple of indices into `self._approaches`.
+        """
+        lo, hi = 0, len(self._times)
+        if args.get(filters.START_DATE) != None:
+            lo = bisect_right(self._times, self._day_bounds(args[filters.START_DATE])[1])
+        if args.get(filters.END_DATE) != None:
+            hi = bisect_left(self._times, self._day_bounds(args[filters.END_DATE])[0])
+        if args.get(filters.DATE) != None:
+            first, last = self._day_bounds(args[filters.DATE])
+            lo = max(lo, bisect_left(self._times, first))
+            hi = min(hi, bisect_right(self._times, last))
+        return lo, max(lo, hi)
+
+
+    def _day_bounds(self, day):
+        """Return the first and last possible keys of `self._times` on a given date."""
+        first = datetime.datetime.combine(day, datetime.time.min)
+        last = datetime.datetime.combine(day, datetime.time.max)
+        if self._lazy:
+            # Lazily-indexed databases hold the sort keys of their `ApproachRows`.
+            return self._approaches.time_key(first), self._approaches.time_key(last)
+        return first, last
@@ -1,66 +1,400 @@
 import json
+import re
 import csv
+import collections.abc
+import threading
+from array import array
 from models import NearEarthObject, CloseApproach
+from helpers import MONTHS, cd_to_sort_key, datetime_to_str
 import typing
 from math import isnan
 from os import getcwd
 
 
+# The streaming JSON reader reads files in chunks of this many characters.
+CHUNK_SIZE = 1 << 16
 
-def load_neos(neo_csv_path) -> typing.List[NearEarthObject]:
+
+def load_neos(neo_csv_path, extra_columns=()) -> typing.List[NearEarthObject]:
     """Read near-Earth object information from a CSV file.
 
+    Only the columns that are needed are read: their positions are looked up
+    once in the header, and each row is read as a plain list. Blank lines are
+    skipped, as `csv.DictReader` does.
+
     :param neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+    :param extra_columns: Names of other columns to keep, as raw strings, in each
+    NEO's `extra` dictionary.
     :return: A collection of `NearEarthObject`s.
+    :raise ValueError: If the file has no header, or the header lacks a needed column.
     """
     neos = []
     
     with open(neo_csv_path) as file:
-        reader = csv.DictReader(file)
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{neo_csv_path} has no header row.")
+
+        def position(column):
+            try:
+                return header.index(column)
+            except ValueError:
+                raise ValueError(f"{neo_csv_path} has no `{column}` column.") from None
+
+        pdes, name, pha, diameter = map(position, ('pdes', 'name', 'pha', 'diameter'))
+        extras = [(column, position(column)) for column in extra_columns]
+
         for line in reader:
-            curr_neo_params = {}
+            if not line:
+                continue
+            neo = NearEarthObject(designation=line[pdes], hazardous=line[pha] == 'Y')
+            if line[name] != '':
+                neo.name = line[name]
+            if line[diameter] != '':
+                neo.diameter = float(line[diameter])
+            if extras:
+                neo.extra = {column: line[index] for column, index in extras}
+            neos.append(neo)
 
-            curr_neo_params['designation'] = line['pdes']
-            
-            if line['pha'] == 'Y':
-                curr_neo_params['hazardous'] = True
-            else:
-                curr_neo_params['hazardous'] = False
+    return neos
 
-            if line['name'] != '':
-                curr_neo_params['name'] = line['name']
 
-            if line['diameter'] != '':
-                curr_neo_params['diameter'] = float(line['diameter'])
+class ApproachRows(collections.abc.Sequence):
+    """A read-only sequence of close approaches, each built from its row on first access.
 
-            neos.append(NearEarthObject(**curr_neo_params))
+    Indexing the sequence builds (and caches) the `CloseApproach` of that row with
+    `_build`. Once `link` has been called, approaches are given their NEO as they
+    are built. Subclasses keep the rows, and also provide `designations`,
+    `rows_by_designation`, `values`, `records`, `sort_keys` and `time_key` to
+    index and summarize them without building any approaches, and `reorder`
+    unless they are `in_time_order`. Rows may be built from several threads at
+    once; each row is still built only once.
+    """
+    # Whether the rows are known to be in time order already.
+    in_time_order = False
 
-    return neos
+    def __init__(self, count):
+        """Create a new sequence of `count` unbuilt approaches."""
+        self._approaches = [None] * count
+        self._neos_by_designation = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self._approaches)
+
+    def __getitem__(self, index):
+        """Return the `CloseApproach` of a row, building it on first access."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        approach = self._approaches[index]
+        if approach is None:
+            with self._lock:
+                approach = self._approaches[index]
+                if approach is None:
+                    approach = self._build(index)
+                    if self._neos_by_designation is not None:
+                        approach.neo = self._neos_by_designation.get(approach._designation)
+                    self._approaches[index] = approach
+        return approach
+
+    def _build(self, index):
+        """Build the unlinked `CloseApproach` of one row."""
+        raise NotImplementedError
+
+    def link(self, neos_by_designation):
+        """Give every approach built from now on its NEO from `neos_by_designation`."""
+        self._neos_by_designation = neos_by_designation
+        for approach in self._approaches:
+            if approach is not None:
+                approach.neo = neos_by_designation.get(approach._designation)
+
+
+class LazyApproaches(ApproachRows):
+    """A sequence of close approaches built from raw cad.json rows on first access.
+
+    The rows stay as the lists of strings that `json.load` produced, so an
+    approach's time is only parsed when the approach is actually used.
+    """
+
+    def __init__(self, rows, field_to_index):
+        """Create a new `LazyApproaches`.
+
+        :param rows: A list of the rows of the `data` array in cad.json.
+        :param field_to_index: A dictionary mapping the names in `fields` to column indices.
+        """
+        super().__init__(len(rows))
+        self._rows = rows
+        self._field_to_index = field_to_index
+
+    def _build(self, index):
+        """Build the unlinked `CloseApproach` of one row."""
+        row = self._rows[index]
+        return CloseApproach(designation=  row[self._field_to_index['des']],
+                             cd_time=      row[self._field_to_index['cd']],
+                             distance=float(row[self._field_to_index['dist']]),
+                             velocity=float(row[self._field_to_index['v_rel']]))
+
+    def designations(self):
+        """Return the designation of every row, without building any approaches."""
+        column = self._field_to_index['des']
+        return [row[column] for row in self._rows]
+
+    def rows_by_designation(self):
+        """Return a dictionary mapping each designation to the indices of its rows."""
+        rows = {}
+        for i, designation in enumerate(self.designations()):
+            rows.setdefault(designation, []).append(i)
+        return rows
+
+    def column(self, field):
+        """Return the raw value of `field` for every row, without building any approaches."""
+        column = self._field_to_index[field]
+        return [row[column] for row in self._rows]
+
+    def values(self, attribute):
+        """Return the `distance` or `velocity` of every row as doubles, without building any approaches."""
+        return array('d', map(float, self.column({'distance': 'dist', 'velocity': 'v_rel'}[attribute])))
+
+    def records(self, indices):
+        """Generate the `aggregate.summarize` records of some rows, without building any approaches.
+
+        :param indices: The indices of the rows, in any order.
+        """
+        des, cd, dist, v_rel = (self._field_to_index[field]
+                                for field in ('des', 'cd', 'dist', 'v_rel'))
+        neos, rows = self._neos_by_designation or {}, self._rows
+        for i in indices:
+            row = rows[i]
+            neo, time = neos.get(row[des]), row[cd]
+            # Calendar dates look like "2020-Jan-01 00:54".
+            yield (row[des], neo.hazardous if neo is not None else False,
+                   int(time[:4]), MONTHS[time[5:8]], float(row[dist]), float(row[v_rel]))
+
+    @staticmethod
+    def time_key(dt):
+        """Return the sort key of a datetime, to search `sort_keys` with."""
+        return datetime_to_str(dt)
+
+    def sort_keys(self):
+        """Return a chronological sort key for every row, as in `helpers.cd_to_sort_key`."""
+        column = self._field_to_index['cd']
+        return [cd_to_sort_key(row[column]) for row in self._rows]
+
+    def reorder(self, order):
+        """Rearrange the rows so that row `i` becomes the old row `order[i]`."""
+        self._rows = [self._rows[i] for i in order]
+        self._approaches = [self._approaches[i] for i in order]
+
+
+class CadReader:
+    """Stream the rows of the `data` array of a cad.json file, one at a time.
 
+    The document is read in chunks and each row is decoded on its own with
+    `json.JSONDecoder.raw_decode`, so the whole nested list of rows never has
+    to sit in memory. The API writes the keys in alphabetical order, so
+    `fields` comes after `data`; it is looked up in the tail of the file first.
 
-def load_approaches(cad_json_path) -> typing.List[CloseApproach]:
+    The other top-level values (`count`, `signature`, ...) are collected in
+    `meta` as the file is read.
+    """
+    def __init__(self, cad_json_path, chunk_size=CHUNK_SIZE):
+        """Create a new `CadReader` and find the file's `fields`.
+
+        :param cad_json_path: A path to a JSON file containing data about close approaches.
+        :param chunk_size: How many characters to read from the file at a time.
+        """
+        self._path = cad_json_path
+        self._chunk_size = chunk_size
+        self.meta = {}
+
+        fields = self._fields_from_tail()
+        if fields is None:
+            # Walk the document, discarding rows, until `fields` turns up.
+            for _ in self._scan(keep_rows=False):
+                pass
+            fields = self.meta.get('fields')
+        if fields is None:
+            raise ValueError(f"{cad_json_path} has no `fields` list.")
+        self.fields = fields
+        self.field_to_index = {field: i for i, field in enumerate(fields)}
+
+    def __iter__(self):
+        """Generate the rows of the `data` array, as lists of strings."""
+        return self._scan()
+
+    def _fields_from_tail(self):
+        """Decode the top-level `fields` list from the end of the file, if it's there."""
+        with open(self._path, 'rb') as file:
+            file.seek(0, 2)
+            file.seek(max(0, file.tell() - 4 * self._chunk_size))
+            tail = file.read().decode('utf-8', errors='ignore')
+
+        start = tail.rfind('"fields"')
+        if start == -1:
+            return None
+        start = tail.find(':', start) + 1
+        while tail[start:start + 1].isspace():
+            start += 1
+        try:
+            fields, _ = json.JSONDecoder().raw_decode(tail, start)
+        except json.JSONDecodeError:
+            return None
+        return fields if isinstance(fields, list) else None
+
+    def _scan(self, keep_rows=True):
+        """Walk the top-level object, yielding data rows and saving the rest in `meta`.
+
+        :param keep_rows: If False, stop at `data` when `fields` has already been
+        seen, and otherwise skip its rows without yielding them.
+        """
+        with open(self._path) as file:
+            buffer = _JSONBuffer(file, self._chunk_size)
+            buffer.expect('{')
+            while True:
+                char = buffer.peek()
+                if char == '}':
+                    return
+                if char == ',':
+                    buffer.advance()
+                    continue
+                key = buffer.decode()
+                buffer.expect(':')
+                if key != 'data':
+                    self.meta[key] = buffer.decode()
+                elif keep_rows:
+                    yield from buffer.array()
+                elif 'fields' in self.meta:
+                    return
+                else:
+                    for _ in buffer.array():
+                        pass
+
+
+class _JSONBuffer:
+    """A window onto a text file that decodes one JSON value at a time."""
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+    _SEPARATOR = re.compile(r'[ \t\n\r]*,?[ \t\n\r]*')
+
+    def __init__(self, file, chunk_size):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._scan_once = json.JSONDecoder().scan_once
+        self._text = ''
+        self._pos = 0
+        self._eof = False
+
+    def _refill(self):
+        """Drop what has been consumed and read the next chunk; return False at the end.
+
+        The chunk is at least as long as the unconsumed text, so a value that
+        spans many chunks is retried a logarithmic number of times, not linear.
+        """
+        rest = self._text[self._pos:]
+        chunk = self._file.read(max(self._chunk_size, len(rest)))
+        self._text = rest + chunk
+        self._pos = 0
+        self._eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Return the next non-whitespace character, without consuming it."""
+        while True:
+            self._pos = self._WHITESPACE.match(self._text, self._pos).end()
+            if self._pos < len(self._text):
+                return self._text[self._pos]
+            if not self._refill():
+                raise ValueError("Unexpected end of the JSON document.")
+
+    def advance(self):
+        """Consume one character."""
+        self._pos += 1
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in the JSON document at {self._text[self._pos:][:20]!r}.")
+        self.advance()
+
+    def _decode_at(self, pos):
+        """Decode the value at `pos`, or return None if it runs past the window."""
+        try:
+            value, end = self._scan_once(self._text, pos)
+        except (StopIteration, json.JSONDecodeError):
+            if self._eof:
+                raise ValueError(f"Invalid JSON value at {self._text[pos:][:20]!r}.")
+            return None
+        # A number at the very end of the window may continue in the next chunk.
+        if end == len(self._text) and not self._eof:
+            return None
+        self._pos = end
+        return value,
+
+    def decode(self):
+        """Decode and consume the next JSON value, reading more of the file as needed."""
+        while True:
+            self.peek()
+            decoded = self._decode_at(self._pos)
+            if decoded is not None:
+                return decoded[0]
+            self._refill()
+
+    def array(self):
+        """Generate the values of the array whose `[` is next, consuming it."""
+        self.expect('[')
+        separator = self._SEPARATOR.match
+        while True:
+            pos = separator(self._text, self._pos).end()
+            if pos == len(self._text):
+                self._pos = pos
+                if not self._refill():
+                    raise ValueError("Unexpected end of the JSON document.")
+                continue
+            if self._text[pos] == ']':
+                self._pos = pos + 1
+                return
+            decoded = self._decode_at(pos)
+            if decoded is None:
+                self._pos = pos
+                self._refill()
+                continue
+            yield decoded[0]
+
+
+def iter_approaches(cad_json_path) -> typing.Iterator[CloseApproach]:
+    """Generate close approaches from a JSON file as its rows are read.
+
+    Unlike `load_approaches`, this never holds more than one raw row at a time.
+    The result can be passed straight to `NEODatabase`.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :return: A stream of `CloseApproach`es.
+    """
+    reader = CadReader(cad_json_path)
+    des, cd, dist, v_rel = (reader.field_to_index[field] for field in ('des', 'cd', 'dist', 'v_rel'))
+    for row in reader:
+        yield CloseApproach(designation=row[des], cd_time=row[cd],
+                            distance=float(row[dist]), velocity=float(row[v_rel]))
+
+
+def load_approaches(cad_json_path, lazy=False) -> typing.Sequence[CloseApproach]:
     """Read close approach data from a JSON file.
 
+    The file is streamed with a `CadReader` rather than loaded as one document,
+    so the raw rows don't have to sit in memory next to the approaches.
+
     :param neo_csv_path: A path to a JSON file containing data about close approaches.
+    :param lazy: Whether to keep the raw rows and build each `CloseApproach` only
+    when it is first accessed, which makes one-shot commands start faster.
     :return: A collection of `CloseApproach`es.
     """
-    close_approaches = []
-    
-    with open(cad_json_path) as file:
-        reader = json.load(file)
-        field_to_index = {}
-        for i in range(len(reader['fields'])):
-            field_to_index[reader['fields'][i]] = i
-
-        for obj_index in range(int(reader['count'])):
-            curr_query = reader['data'][obj_index]
-            close_approaches.append(CloseApproach(
-                                    designation=  curr_query[field_to_index['des']],
-                                    cd_time=      curr_query[field_to_index['cd']],
-                                    distance=float(curr_query[field_to_index['dist']]),
-                                    velocity=float(curr_query[field_to_index['v_rel']]))) 
-
-    return close_approaches
+    if lazy:
+        reader = CadReader(cad_json_path)
+        return LazyApproaches(list(reader), reader.field_to_index)
+    return list(iter_approaches(cad_json_path))
+
 
 def approaches_count(cad_json_path) -> int:
     """Number of close_approched listed in the json file
@@ -1,7 +1,10 @@
+import heapq
 import itertools
+from operator import attrgetter
 from models import CloseApproach
-from helpers import bt_floats, lt_floats
+from helpers import bt_floats, lt_floats, bt_floats_bound, lt_floats_bound
 from datetime import date
+from math import isfinite, isnan
 
 
 
@@ -17,6 +20,17 @@ START_DATE = "start_date"
 END_DATE = "end_date"
 HAZARDOUS = "hazardous"
 
+# Every key above; anything else in an arguments dictionary (limit, outfile, ...) isn't a filter.
+FILTER_KEYS = (DISTANCE_MIN, DISTANCE_MAX, DIAMETER_MIN, DIAMETER_MAX, VELOCITY_MIN,
+               VELOCITY_MAX, DATE, START_DATE, END_DATE, HAZARDOUS)
+
+# How the results of a query are ordered: by the attribute `SORT_BY` names (time
+# by default), reversed if `DESC` is true, and cut to the first `TOP` of them.
+SORT_BY = "sort_by"
+DESC = "desc"
+TOP = "top"
+SORT_ATTRIBUTES = ('time', 'distance', 'velocity', 'diameter')
+
 
 def clean_args_dict(args:dict, minimum_valid_date:date, maximum_valid_date:date) -> dict:
     """Clean a dictionary of arguments taken from user input by setting any `None` item
@@ -44,6 +58,22 @@ def clean_args_dict(args:dict, minimum_valid_date:date, maximum_valid_date:date)
     return args
 
 
+def cache_key(args:dict) -> tuple:
+    """Normalize the filters of a query into a hashable key, for caching its results.
+
+    Only the filters count - options such as the limit or the output file don't
+    change which approaches match. Unset filters are filled in by `clean_args_dict`,
+    so a missing key and a `None` share a key. Whether any diameter filter is
+    set is kept apart, since even an unbounded one rejects unknown diameters.
+
+    :param args: a dictionary of the values the user entered in the query command.
+    :return: a tuple that is equal for queries with the same results"""
+    restrictions = {key: args.get(key) for key in FILTER_KEYS}
+    clean = clean_args_dict(restrictions, date.min, date.max)
+    diameter = restrictions[DIAMETER_MIN] != None or restrictions[DIAMETER_MAX] != None
+    return tuple(clean[key] for key in FILTER_KEYS) + (diameter,)
+
+
 def is_valid_close_approach(approach:CloseApproach, restrictions:dict) -> bool:
     """Check if the close approach object is valid based on the restriction in the dictionary.
     
@@ -79,6 +109,110 @@ def is_valid_close_approach(approach:CloseApproach, restrictions:dict) -> bool:
     return True
 
 
+def _limits(minimum, maximum):
+    """Turn optional tolerant bounds into inclusive float limits.
+
+    `bt_floats(x, minimum)` is exactly `x >= low` and `lt_floats(x, maximum)` is
+    exactly `x <= high`, for any finite `x` or NaN. Unset bounds become infinities."""
+    low, high = float('-inf'), float('inf')
+    if minimum != None:
+        low = float(minimum)
+        if isfinite(low):
+            low = bt_floats_bound(low)
+    if maximum != None:
+        high = float(maximum)
+        if isfinite(high):
+            high = lt_floats_bound(high)
+    return low, high
+
+
+def compile_ranges(restrictions:dict, skip=()) -> dict:
+    """Collect the active distance, diameter and velocity filters as inclusive limits.
+
+    :param restrictions: a dictionary of the values the user entered in the query
+    command, with `None` for filters that weren't given.
+    :param skip: keys of filters that should be left out.
+    :return: a dictionary mapping 'distance', 'diameter' and/or 'velocity' to a
+    `(low, high)` tuple; a value matches when `low <= value <= high`"""
+    def bound(key):
+        return None if key in skip else restrictions.get(key)
+
+    ranges = {}
+    for attribute, min_key, max_key in (('distance', DISTANCE_MIN, DISTANCE_MAX),
+                                        ('diameter', DIAMETER_MIN, DIAMETER_MAX),
+                                        ('velocity', VELOCITY_MIN, VELOCITY_MAX)):
+        if bound(min_key) != None or bound(max_key) != None:
+            ranges[attribute] = _limits(bound(min_key), bound(max_key))
+    return ranges
+
+
+def compile_filters(restrictions:dict, skip=()) -> list:
+    """Compile a dictionary of user filters into a list of predicates.
+
+    Only the active filters produce a predicate, so an empty list means every
+    approach matches. Each predicate takes a `CloseApproach` and returns a bool,
+    and an approach is valid when all of them return True. The comparisons are
+    the same as in `is_valid_close_approach`, but the float bounds are converted
+    into inclusive limits once, so each approach costs only plain comparisons.
+
+    :param restrictions: a dictionary of the values the user entered in the query
+    command, with `None` for filters that weren't given. It doesn't need cleaning.
+    :param skip: keys of filters that the caller has already applied, e.g. date
+    filters resolved through an index.
+    :return: a list of predicates for the active filters"""
+    def bound(key):
+        return None if key in skip else restrictions.get(key)
+
+    predicates = []
+    # The hazardous flag is the cheapest check, so it goes first to reject early.
+    # Approaches of unknown NEOs aren't hazardous and have no diameter, as in `count`.
+    hazardous = bound(HAZARDOUS)
+    if hazardous != None:
+        predicates.append(lambda approach: (approach.neo is not None
+                                            and approach.neo.hazardous) == hazardous)
+
+    for attribute, (low, high) in compile_ranges(restrictions, skip).items():
+        if attribute == 'diameter':
+            predicates.append(lambda approach, low=low, high=high:
+                              approach.neo is not None and low <= approach.neo.diameter <= high)
+        else:
+            get = attrgetter(attribute)
+            predicates.append(lambda approach, get=get, low=low, high=high:
+                              low <= get(approach) <= high)
+
+    day, start, end = bound(DATE), bound(START_DATE), bound(END_DATE)
+    if day != None:
+        predicates.append(lambda approach: approach.time.date() == day)
+    if start != None and end != None:
+        predicates.append(lambda approach: start < approach.time.date() < end)
+    elif start != None:
+        predicates.append(lambda approach: approach.time.date() > start)
+    elif end != None:
+        predicates.append(lambda approach: approach.time.date() < end)
+
+    return predicates
+
+
+def select(approaches, predicates):
+    """Generate the approaches that satisfy every one of the compiled predicates.
+
+    :param approaches: An iterable of `CloseApproach` objects.
+    :param predicates: A list of predicates, as returned by `compile_filters`.
+    :yield: The approaches for which every predicate returns True.
+    """
+    if not predicates:
+        yield from approaches
+    elif len(predicates) == 1:
+        yield from filter(predicates[0], approaches)
+    else:
+        for approach in approaches:
+            for predicate in predicates:
+                if not predicate(approach):
+                    break
+            else:
+                yield approach
+
+
 def limit(iterator, n=None):
     """Produce a limited stream of values from an iterator.
 
@@ -91,3 +225,44 @@ def limit(iterator, n=None):
     if n == 0 or n == None:
         return iterator
     return itertools.islice(iterator, n)
+
+
+def sort_key(attribute:str, desc:bool=False):
+    """Return a key function that orders close approaches by one of `SORT_ATTRIBUTES`.
+
+    Diameters are those of the approaches' NEOs. Unknown (NaN) diameters come
+    last, whether the order is ascending or descending.
+
+    :param attribute: the attribute to order by.
+    :param desc: whether the key is for a descending order.
+    :return: a function of a `CloseApproach`, for `sorted` or `heapq`
+    :raise ValueError: if `attribute` isn't one of `SORT_ATTRIBUTES`"""
+    if attribute not in SORT_ATTRIBUTES:
+        raise ValueError(f"Can't sort by {attribute!r}.")
+    if attribute != 'diameter':
+        return attrgetter(attribute)
+
+    def key(approach):
+        diameter = approach.neo.diameter if approach.neo is not None else float('nan')
+        return (isnan(diameter) != desc, diameter)
+    return key
+
+
+def top(approaches, n=None, attribute='time', desc=False) -> list:
+    """Order a stream of close approaches by one attribute and keep the first `n`.
+
+    With `n`, only a heap of the best `n` approaches so far is kept while the
+    stream is read, so memory stays O(n) however long the stream is. If `n` is 0
+    or None, every approach is sorted. Approaches that tie keep the order of the
+    stream, in either direction.
+
+    :param approaches: An iterable of `CloseApproach` objects.
+    :param n: How many approaches to keep.
+    :param attribute: One of `SORT_ATTRIBUTES`.
+    :param desc: Whether to put the largest values first.
+    :return: A list of (at most) `n` approaches, in order.
+    """
+    key = sort_key(attribute, desc)
+    if n == 0 or n == None:
+        return sorted(approaches, key=key, reverse=desc)
+    return (heapq.nlargest if desc else heapq.nsmallest)(n, approaches, key=key)
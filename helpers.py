@@ -1,7 +1,12 @@
 import datetime
-from math import isclose
+from math import isclose, isfinite
 
 
+# English month abbreviations, as used in NASA's calendar dates.
+MONTHS = {name: number for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+_MONTH_DIGITS = {name: f"{number:02d}" for name, number in MONTHS.items()}
+
 
 def cd_to_datetime(calendar_date):
     """Convert a NASA-formatted calendar date/time description into a datetime.
@@ -13,12 +18,41 @@ def cd_to_datetime(calendar_date):
 
     This will become the Python object `datetime.datetime(2020, 12, 31, 12, 0)`.
 
+    Dates in exactly this layout are sliced apart directly, which is several
+    times faster than `strptime`; anything else falls back to `strptime`.
+
     :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
     :return: A naive `datetime` corresponding to the given calendar date and time.
     """
+    if (len(calendar_date) == 17 and calendar_date[4] == '-' and calendar_date[8] == '-'
+            and calendar_date[11] == ' ' and calendar_date[14] == ':'):
+        digits = calendar_date[:4] + calendar_date[9:11] + calendar_date[12:14] + calendar_date[15:]
+        month = MONTHS.get(calendar_date[5:8])
+        if month and digits.isdigit():
+            try:
+                return datetime.datetime(int(digits[:4]), month, int(digits[4:6]),
+                                         int(digits[6:8]), int(digits[8:]))
+            except ValueError:
+                # Out-of-range fields; let `strptime` raise its usual error.
+                pass
     return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
 
 
+def cd_to_sort_key(calendar_date):
+    """Convert a NASA-formatted calendar date into a string that sorts chronologically.
+
+    The key is the date in the format of `datetime_to_str`, e.g. "2020-12-31 12:00",
+    built without creating a `datetime` for dates in NASA's usual layout.
+
+    :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
+    :return: The same date and time as a YYYY-MM-DD hh:mm string.
+    """
+    month = _MONTH_DIGITS.get(calendar_date[5:8])
+    if month and len(calendar_date) == 17:
+        return calendar_date[:5] + month + calendar_date[8:]
+    return datetime_to_str(cd_to_datetime(calendar_date))
+
+
 def datetime_to_str(dt):
     """Convert a naive Python datetime into a human-readable string.
 
@@ -48,3 +82,31 @@ def lt_floats(f1, f2, tol=0.01):
 def bt_floats(f1, f2, tol=0.01):
     """True if f1 is approxiamtly larger than f2"""
     return f1 > f2 and not eq_floats(f1, f2, tol)      
+
+
+def bt_floats_bound(f2, tol=0.01):
+    """Return the smallest float `f1` for which `bt_floats(f1, f2, tol)` is True.
+
+    `bt_floats` is monotonic in `f1`, so `bt_floats(f1, f2, tol)` is exactly
+    `f1 >= bt_floats_bound(f2, tol)`: a plain comparison that is cheap to repeat
+    per row and usable for binary searches over sorted values.
+    The bound is found by bisecting down to adjacent floats, so `f2` must be finite."""
+    if not isfinite(f2):
+        raise ValueError(f"No bound exists for the non-finite value {f2!r}.")
+    lo, hi = f2, f2 + 1 + 3 * tol * abs(f2)
+    while True:
+        mid = lo + (hi - lo) / 2
+        if mid == lo or mid == hi:
+            return hi
+        if bt_floats(mid, f2, tol):
+            hi = mid
+        else:
+            lo = mid
+
+
+def lt_floats_bound(f2, tol=0.01):
+    """Return the largest float `f1` for which `lt_floats(f1, f2, tol)` is True.
+
+    The mirror image of `bt_floats_bound`: `lt_floats(f1, f2, tol)` is exactly
+    `f1 <= lt_floats_bound(f2, tol)`."""
+    return -bt_floats_bound(-f2, tol)
@@ -5,7 +5,7 @@ See `README.md` for a detailed discussion of this project.
 
 This script can be invoked from the command line::
 
-    $ python3 main.py {inspect,query,interactive} [args]
+    $ python3 main.py {inspect,query,query-batch,aggregate,interactive,serve,client,http} [args]
 
 The `inspect` subcommand looks up an NEO by name or by primary designation, and
 optionally lists all of that NEO's known close approaches:
@@ -23,40 +23,110 @@ The `query` subcommand searches for close approaches that match given criteria:
     $ python3 main.py query --start-date 2000-01-01 --max-diameter 0.1 --not-hazardous
     $ python3 main.py query --hazardous --max-distance 0.05 --min-velocity 30
 
-The set of results can be limited in size and/or saved to an output file in CSV
-or JSON format:
+Results come in time order. They can be ordered by time, distance, velocity or
+diameter instead, largest first with `--desc`, and cut to the first N with `--top`:
 
+    $ python3 main.py query --start-date 2020-01-01 --end-date 2020-02-01 --sort-by distance --top 10
+    $ python3 main.py query --hazardous --sort-by velocity --desc --top 5 --outfile fastest.json
+
+The set of results can be counted instead of listed, or limited in size and/or
+saved to an output file in CSV or JSON format, or as newline-delimited JSON:
+
+    $ python3 main.py query --hazardous --start-date 2020-01-01 --count
     $ python3 main.py query --limit 5 --outfile results.csv
     $ python3 main.py query --limit 15 --outfile results.json
+    $ python3 main.py query --outfile results.ndjson
+
+The `query-batch` subcommand answers a file of queries, one per line, in one
+pass over the close approaches; each line gives its filters as `query` flags or
+as JSON, and its own output file:
+
+    $ cat nightly.txt
+    --start-date 2020-01-01 --end-date 2020-02-01 --hazardous --outfile hazardous-jan.csv
+    {"distance_max": 0.05, "limit": 100, "outfile": "closest.json"}
+    $ python3 main.py query-batch nightly.txt
+
+The `aggregate` subcommand takes the same filters as `query`, and prints how many
+close approaches match, with the minimum, maximum and mean of their distances
+and velocities - overall, or for each year, month, NEO or hazardous flag:
+
+    $ python3 main.py aggregate --hazardous --max-distance 0.05 --group-by month
 
 The `interactive` subcommand loads the NEO database and spawns an interactive
 command shell that can repeatedly execute `inspect` and `query` commands without
 having to wait to reload the database each time. However, it doesn't hot-reload.
 
+The `serve` subcommand loads the NEO database once and answers `inspect` and
+`query` commands from any number of clients, over a Unix domain socket (or a
+TCP port on localhost with `--port`). The `client` subcommand runs one command
+on it, with the same arguments as on the command line:
+
+    $ python3 main.py serve &
+    $ python3 main.py client query --date 2020-03-14 --limit 5
+    $ python3 main.py client inspect --name Halley
+
+The `http` subcommand serves the same database as an HTTP/JSON API (see `api.py`):
+
+    $ python3 main.py http --port 8000 &
+    $ curl 'localhost:8000/approaches?date=2020-03-14&hazardous=true'
+    $ curl 'localhost:8000/neo?name=Halley'
+
 If needed, the script can load data from data files other than the default with
-`--neofile` or `--cadfile`.
+`--neofile` or `--cadfile`. The parsed data is kept in a binary snapshot, in
+`--snapshot-dir`, so that later runs can skip reading the data files; it is
+rebuilt whenever they change. Use `--no-snapshot` to always read the files, and
+`--workers` to read them with a pool of processes.
+
+A columnar store, written from the data files with `store.py`, can be opened
+instead with `--store`:
+
+    $ python3 store.py data/neos.store
+    $ python3 main.py --store data/neos.store query --date 2020-03-14
+
+With `--sqlite`, the data is imported once into an SQLite database, which is
+rewritten whenever the data files change, and queries run as SQL against it:
+
+    $ python3 main.py --sqlite data/neos.sqlite3 query --date 2020-03-14
 """
 import argparse
 import cmd
 import datetime
+import functools
+import json
+import math
 import pathlib
 import shlex
 import sys
+import threading
 import time
 
-from extract import load_neos, load_approaches
-from database import NEODatabase
-from filters import limit
-from write import write_to_csv, write_to_json
+from aggregate import GROUP_BY, format_table
+from database import NEODatabase, CACHE_ENTRIES
+from filters import (limit, FILTER_KEYS, DATE, START_DATE, END_DATE, HAZARDOUS, SORT_BY, DESC,
+                     TOP, SORT_ATTRIBUTES)
+import api
+import parallel
+import server
+import snapshot
+import sqlitedb
+import store
+from write import write_to_csv, write_to_json, write_to_ndjson
 
 
 # Paths to the root of the project and the `data` subfolder.
 PROJECT_ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_ROOT = PROJECT_ROOT / 'data'
 
+# The writer for each output file extension.
+WRITERS = {'.csv': write_to_csv, '.json': write_to_json,
+           '.ndjson': write_to_ndjson, '.jsonl': write_to_ndjson}
+
 # The current time, for use with the kill-on-change feature of the interactive shell.
 _START = time.time()
 
+# How often, in seconds, the interactive shell checks the project files for changes.
+WATCH_INTERVAL = 1.0
+
 
 def date_fromisoformat(date_string):
     """Return a `datetime.date` corresponding to a string in YYYY-MM-DD format.
@@ -70,42 +140,39 @@ def date_fromisoformat(date_string):
         raise argparse.ArgumentTypeError(f"'{date_string}' is not a valid date. Use YYYY-MM-DD.")
 
 
-def make_parser():
-    """Create an ArgumentParser for this script.
+def finite_float(text):
+    """Return the float of a string, or of a JSON number, if it is finite.
 
-    :return: A tuple of the top-level, inspect, and query parsers.
+    :param text: A number, e.g. '0.05'.
+    :return: The number as a float.
     """
-    parser = argparse.ArgumentParser(
-        description="Explore past and future close approaches of near-Earth objects."
-    )
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        raise argparse.ArgumentTypeError(f"'{text}' is not a valid number.")
+    return value
 
-    # Add arguments for custom data files.
-    parser.add_argument('--neofile', default=(DATA_ROOT / 'neos.csv'),
-                        type=pathlib.Path,
-                        help="Path to CSV file of near-Earth objects.")
-    parser.add_argument('--cadfile', default=(DATA_ROOT / 'cad.json'),
-                        type=pathlib.Path,
-                        help="Path to JSON file of close approach data.")
-    subparsers = parser.add_subparsers(dest='cmd')
 
-    # Add the `inspect` subcommand parser.
-    inspect = subparsers.add_parser('inspect',
-                                    description="Inspect an NEO by primary designation or by name.")
-    inspect.add_argument('-v', '--verbose', action='store_true',
-                         help="Additionally, print all known close approaches of this NEO.")
-    inspect_id = inspect.add_mutually_exclusive_group(required=True)
-    inspect_id.add_argument('-p', '--pdes',
-                            help="The primary designation of the NEO to inspect (e.g. '433').")
-    inspect_id.add_argument('-n', '--name',
-                            help="The IAU name of the NEO to inspect (e.g. 'Halley').")
+def non_negative_int(text):
+    """Return the int of a string, or of a JSON number, if it is a non-negative whole number.
 
-    # Add the `query` subcommand parser.
-    query = subparsers.add_parser('query',
-                                  description="Query for close approaches that "
-                                              "match a collection of filters.")
-    filters = query.add_argument_group('Filters',
-                                       description="Filter close approaches by their attributes "
-                                                   "or the attributes of their NEOs.")
+    :param text: A whole number, e.g. '10'.
+    :return: The number as an int.
+    """
+    if isinstance(text, int) and not isinstance(text, bool) and text >= 0:
+        return text
+    if not (isinstance(text, str) and text.isdigit()):
+        raise argparse.ArgumentTypeError(f"'{text}' is not a non-negative whole number.")
+    return int(text)
+
+
+def add_filter_arguments(parser):
+    """Add the arguments of the `filters` keys to a subcommand parser."""
+    filters = parser.add_argument_group('Filters',
+                                        description="Filter close approaches by their attributes "
+                                                    "or the attributes of their NEOs.")
     filters.add_argument('-d', '--date', type=date_fromisoformat,
                          help="Only return close approaches on the given date, "
                               "in YYYY-MM-DD format (e.g. 2020-12-31).")
@@ -115,24 +182,24 @@ def make_parser():
     filters.add_argument('-e', '--end-date', type=date_fromisoformat,
                          help="Only return close approaches on or before the given date, "
                               "in YYYY-MM-DD format (e.g. 2020-12-31).")
-    filters.add_argument('--min-distance', dest='distance_min', type=float,
+    filters.add_argument('--min-distance', dest='distance_min', type=finite_float,
                          help="In astronomical units. Only return close approaches that "
                               "pass as far or farther away from Earth as the given distance.")
-    filters.add_argument('--max-distance', dest='distance_max', type=float,
+    filters.add_argument('--max-distance', dest='distance_max', type=finite_float,
                          help="In astronomical units. Only return close approaches that "
                               "pass as near or nearer to Earth as the given distance.")
-    filters.add_argument('--min-velocity', dest='velocity_min', type=float,
+    filters.add_argument('--min-velocity', dest='velocity_min', type=finite_float,
                          help="In kilometers per second. Only return close approaches "
                               "whose relative velocity to Earth at approach is as fast or faster "
                               "than the given velocity.")
-    filters.add_argument('--max-velocity', dest='velocity_max', type=float,
+    filters.add_argument('--max-velocity', dest='velocity_max', type=finite_float,
                          help="In kilometers per second. Only return close approaches "
                               "whose relative velocity to Earth at approach is as slow or slower "
                               "than the given velocity.")
-    filters.add_argument('--min-diameter', dest='diameter_min', type=float,
+    filters.add_argument('--min-diameter', dest='diameter_min', type=finite_float,
                          help="In kilometers. Only return close approaches of NEOs with "
                               "diameters as large or larger than the given size.")
-    filters.add_argument('--max-diameter', dest='diameter_max', type=float,
+    filters.add_argument('--max-diameter', dest='diameter_max', type=finite_float,
                          help="In kilometers. Only return close approaches of NEOs with "
                               "diameters as small or smaller than the given size.")
     filters.add_argument('--hazardous', dest='hazardous', default=None, action='store_true',
@@ -141,22 +208,146 @@ def make_parser():
     filters.add_argument('--not-hazardous', dest='hazardous', default=None, action='store_false',
                          help="If specified, only return close approaches of NEOs that "
                               "are not potentially hazardous.")
-    query.add_argument('-l', '--limit', type=int,
+
+def make_parser():
+    """Create an ArgumentParser for this script.
+
+    :return: A tuple of the top-level, inspect, and query parsers.
+    """
+    parser = argparse.ArgumentParser(
+        description="Explore past and future close approaches of near-Earth objects."
+    )
+
+    # Add arguments for custom data files.
+    parser.add_argument('--neofile', default=(DATA_ROOT / 'neos.csv'),
+                        type=pathlib.Path,
+                        help="Path to CSV file of near-Earth objects.")
+    parser.add_argument('--cadfile', default=(DATA_ROOT / 'cad.json'),
+                        type=pathlib.Path,
+                        help="Path to JSON file of close approach data.")
+    parser.add_argument('--snapshot-dir', default=(PROJECT_ROOT / '.snapshots'),
+                        type=pathlib.Path,
+                        help="Directory of binary snapshots of the data files, which are "
+                             "rebuilt whenever --neofile or --cadfile change.")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Always read the data files, without using or writing a snapshot.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes to parse the data files with, when they "
+                             "have to be read.")
+    parser.add_argument('--store', type=pathlib.Path,
+                        help="Path to a columnar store written by `store.py`, to open "
+                             "instead of the data files.")
+    parser.add_argument('--sqlite', type=pathlib.Path,
+                        help="Path to an SQLite database of the data files to query, which is "
+                             "written first, or rewritten whenever they change.")
+    parser.add_argument('--cache-size', type=int, default=CACHE_ENTRIES,
+                        help="Number of query results to keep, so that repeated queries don't "
+                             f"scan again (0 turns the cache off). Defaults to {CACHE_ENTRIES}.")
+    parser.add_argument('--columnar', action='store_true',
+                        help="Evaluate queries over NumPy columns instead of Python objects. "
+                             "Requires NumPy.")
+    subparsers = parser.add_subparsers(dest='cmd')
+
+    # Add the `inspect` subcommand parser.
+    inspect = subparsers.add_parser('inspect',
+                                    description="Inspect an NEO by primary designation or by name.")
+    inspect.add_argument('-v', '--verbose', action='store_true',
+                         help="Additionally, print all known close approaches of this NEO.")
+    inspect_id = inspect.add_mutually_exclusive_group(required=True)
+    inspect_id.add_argument('-p', '--pdes',
+                            help="The primary designation of the NEO to inspect (e.g. '433').")
+    inspect_id.add_argument('-n', '--name',
+                            help="The IAU name of the NEO to inspect (e.g. 'Halley').")
+
+    # Add the `query` subcommand parser.
+    query = subparsers.add_parser('query',
+                                  description="Query for close approaches that "
+                                              "match a collection of filters.")
+    add_filter_arguments(query)
+    order = query.add_argument_group('Order',
+                                     description="Order the matching close approaches, "
+                                                 "which otherwise come in time order.")
+    order.add_argument('--sort-by', choices=SORT_ATTRIBUTES,
+                       help="Order the matches by time, distance, velocity or the diameter "
+                            "of their NEO (unknown diameters come last).")
+    order.add_argument('--desc', action='store_true',
+                       help="Put the largest values first.")
+    order.add_argument('--top', type=non_negative_int,
+                       help="Only return the first N matches in that order, e.g. "
+                            "`--sort-by distance --top 10` for the 10 closest approaches.")
+    query.add_argument('-c', '--count', action='store_true',
+                       help="Only print how many close approaches match, which is much "
+                            "faster than listing them.")
+    query.add_argument('-l', '--limit', type=non_negative_int,
                        help="The maximum number of matches to return. "
                             "Defaults to 10 if no --outfile is given.")
     query.add_argument('-o', '--outfile', type=pathlib.Path,
                        help="File in which to save structured results. "
                             "If omitted, results are printed to standard output.")
 
+    batch = subparsers.add_parser('query-batch',
+                                  description="Answer many queries, each with its own output file, "
+                                              "in one pass over the close approaches.")
+    batch.add_argument('batchfile', type=pathlib.Path,
+                       help="A file with one filter set per line, either as `query` flags "
+                            "(e.g. `--date 2020-01-01 --outfile jan1.csv`) or as a JSON object "
+                            "(e.g. `{\"date\": \"2020-01-01\", \"outfile\": \"jan1.csv\"}`), "
+                            "or else a JSON array of such objects. Lines starting with # are "
+                            "ignored. Every filter set needs an output file.")
+
+    summary = subparsers.add_parser('aggregate',
+                                    description="Count the close approaches that match a "
+                                                "collection of filters, with the minimum, maximum "
+                                                "and mean of their distances and velocities.")
+    add_filter_arguments(summary)
+    summary.add_argument('-g', '--group-by', choices=GROUP_BY,
+                         help="Summarize each year, month, NEO or hazardous flag separately, "
+                              "instead of all the matches together.")
+
     repl = subparsers.add_parser('interactive',
                                  description="Start an interactive command session "
                                              "to repeatedly run `interact` and `query` commands.")
     repl.add_argument('-a', '--aggressive', action='store_true',
                       help="If specified, kill the session whenever a project file is modified.")
+
+    # Add the `serve` and `client` subcommand parsers.
+    serve = subparsers.add_parser('serve',
+                                  description="Load the database once and answer `inspect` and "
+                                              "`query` commands sent with `client`.")
+    add_address_arguments(serve)
+    client = subparsers.add_parser('client',
+                                   description="Run an `inspect` or `query` command on a server "
+                                               "started with `serve`.")
+    add_address_arguments(client)
+    client.add_argument('command', nargs=argparse.REMAINDER,
+                        help="The command to run, e.g. `query --date 2020-01-01`.")
+
+    # Add the `http` subcommand parser.
+    api_parser = subparsers.add_parser('http',
+                                       description="Load the database once and serve it as an "
+                                                   "HTTP/JSON API.")
+    api_parser.add_argument('--host', default='127.0.0.1',
+                            help="The address to listen on. Defaults to localhost only.")
+    api_parser.add_argument('--port', type=int, default=8000,
+                            help="The TCP port to listen on (0 picks a free one).")
     return parser, inspect, query
 
 
-def inspect(database, pdes=None, name=None, verbose=False):
+def add_address_arguments(parser):
+    """Add the options that choose where `serve` listens and `client` connects."""
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument('--socket', type=pathlib.Path, default=(PROJECT_ROOT / '.neo.sock'),
+                         help="Path of the Unix domain socket to use.")
+    address.add_argument('--port', type=int,
+                         help="Use this TCP port on localhost instead of a Unix domain socket.")
+
+
+def server_address(args):
+    """Return the `server` address chosen by `add_address_arguments` options."""
+    return ('127.0.0.1', args.port) if args.port else str(args.socket)
+
+
+def inspect(database, pdes=None, name=None, verbose=False, stdout=None, stderr=None):
     """Perform the `inspect` subcommand.
 
     This function fetches an NEO by designation or by name. If a matching NEO is
@@ -171,8 +362,11 @@ def inspect(database, pdes=None, name=None, verbose=False):
     :param pdes: The primary designation of an NEO for which to search.
     :param name: The name of an NEO for which to search.
     :param verbose: Whether to additionally print all of a matching NEO's close approaches.
+    :param stdout: Where to print the NEO (standard output by default).
+    :param stderr: Where to print errors (standard error by default).
     :return: The matching `NearEarthObject`, or None if not found.
     """
+    stderr = stderr or sys.stderr
     # Fetch the NEO of interest.
     if pdes:
         neo = database.get_neo_by_designation(pdes)
@@ -181,31 +375,43 @@ def inspect(database, pdes=None, name=None, verbose=False):
 
     # Ensure that we have received an NEO.
     if not neo:
-        print("No matching NEOs exist in the database.", file=sys.stderr)
+        print("No matching NEOs exist in the database.", file=stderr)
         return None
 
     # Display information about this NEO, and optionally its close approaches if verbose.
-    print(neo)
+    print(neo, file=stdout)
     if verbose:
         for approach in neo.approaches:
-            print(f"- {approach}")
+            print(f"- {approach}", file=stdout)
     return neo
 
 
-def query(database, args):
+def query(database, args, stdout=None, stderr=None, outfile=None):
     """Perform the `query` subcommand.
 
     Create a collection of filters with `create_filters` and supply them to the
     database's `query` method to produce a stream of matching results.
 
+    With `--count`, only print the number of matches, from the database's `count`.
+
     If an output file wasn't given, print these results to stdout, limiting to
     10 entries if no limit was specified. If an output file was given, use the
-    file's extension to infer whether the file should hold CSV or JSON data, and
-    then write the results to the output file in that format.
+    file's extension to infer whether the file should hold CSV, JSON or
+    newline-delimited JSON (`.ndjson` or `.jsonl`) data, and then stream the
+    results to the output file in that format.
 
     :param database: The `NEODatabase` containing data on NEOs and their close approaches.
     :param args: All arguments from the command line, as parsed by the top-level parser.
+    :param stdout: Where to print the results (standard output by default).
+    :param stderr: Where to print errors (standard error by default).
+    :param outfile: An open text stream to write the results to in place of
+    opening `args.outfile`, whose extension still picks the format.
     """
+    stderr = stderr or sys.stderr
+    if args.count:
+        # Counting doesn't build or format any results.
+        print(database.count(vars(args)), file=stdout)
+        return
     # Construct a collection of filters from arguments supplied at the command line.
     #filters = create_filters(args)
     # Query the database with the collection of filters.
@@ -214,15 +420,221 @@ def query(database, args):
     if not args.outfile:
         # Write the results to stdout, limiting to 10 entries if not specified.
         for result in limit(results, args.limit or 10):
-            print(result)
+            print(result, file=stdout)
     else:
-        # Write the results to a file.
-        if args.outfile.suffix == '.csv':
-            write_to_csv(limit(results, args.limit), args.outfile)
-        elif args.outfile.suffix == '.json':
-            write_to_json(limit(results, args.limit), args.outfile)
+        # Write the results to a file, in the format its extension asks for.
+        writer = WRITERS.get(args.outfile.suffix)
+        if writer:
+            writer(limit(results, args.limit), outfile or args.outfile)
         else:
-            print("Please use an output file that ends with `.csv` or `.json`.", file=sys.stderr)
+            print("Please use an output file that ends with `.csv`, `.json`, `.ndjson` or `.jsonl`.",
+                  file=stderr)
+
+
+def summarize(database, args, stdout=None):
+    """Perform the `aggregate` subcommand, printing a table of the summary of each group.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :param stdout: Where to print the table (standard output by default).
+    """
+    summaries = database.aggregate(vars(args), args.group_by)
+    if summaries:
+        print(format_table(summaries, args.group_by), file=stdout)
+    else:
+        print("No matching close approaches exist in the database.", file=stdout)
+
+
+def read_batch(path, query_parser):
+    """Read the filter sets of a `query-batch` file.
+
+    Each non-blank line that doesn't start with `#` holds one filter set, either
+    as `query` flags or as a JSON object with the keys of `filters.FILTER_KEYS`
+    (dates in YYYY-MM-DD format), `limit` and `outfile`. Alternatively, the
+    whole file can be a JSON array of such objects.
+
+    :param path: The path of the batch file.
+    :param query_parser: The subparser for the `query` subcommand.
+    :return: A list of `Namespace`s, like those of the `query` parser.
+    :raise ValueError: If a filter set is invalid, or doesn't have a usable output file.
+    """
+    text = pathlib.Path(path).read_text()
+    if text.lstrip().startswith('['):
+        entries = [(f"item {n}", obj) for n, obj in enumerate(json.loads(text), 1)]
+    else:
+        entries = [(f"line {n}", line.strip()) for n, line in enumerate(text.splitlines(), 1)
+                   if line.strip() and not line.lstrip().startswith('#')]
+
+    batch = []
+    for where, entry in entries:
+        try:
+            if isinstance(entry, str) and not entry.startswith('{'):
+                try:
+                    args = query_parser.parse_args(shlex.split(entry))
+                except SystemExit:
+                    # The parser has already printed what is wrong.
+                    raise ValueError("invalid query flags")
+            else:
+                args = batch_args(json.loads(entry) if isinstance(entry, str) else entry)
+            if args.count:
+                raise ValueError("--count can't be used in a batch")
+            if not args.outfile:
+                raise ValueError("no output file")
+            if args.outfile.suffix not in WRITERS:
+                raise ValueError("the output file must end with `.csv`, `.json`, `.ndjson` "
+                                 "or `.jsonl`")
+        except (ValueError, argparse.ArgumentTypeError) as err:
+            raise ValueError(f"{path}, {where}: {err}")
+        batch.append(args)
+    return batch
+
+
+def batch_args(obj):
+    """Turn a JSON filter set of a `query-batch` file into a `Namespace`.
+
+    Each value is checked as the `query` parser would check its flag: dates are
+    YYYY-MM-DD strings, bounds are finite numbers, `limit` and `top` are
+    non-negative whole numbers, `hazardous` and `desc` are true or false, and
+    `outfile` is a string. A null value counts as not given.
+
+    :raise ValueError: If a key is unknown or a value is invalid.
+    """
+    if not isinstance(obj, dict):
+        raise ValueError("expected a JSON object")
+    unknown = set(obj) - set(FILTER_KEYS) - {SORT_BY, DESC, TOP, 'limit', 'outfile'}
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+    if obj.get(SORT_BY) not in (None,) + SORT_ATTRIBUTES:
+        raise ValueError(f"can't sort by {obj[SORT_BY]!r}")
+    args = argparse.Namespace(**dict.fromkeys(FILTER_KEYS + (SORT_BY, TOP)), desc=False,
+                              limit=None, outfile=None, count=False)
+    for key, value in obj.items():
+        if value is None:
+            continue
+        if key in (DATE, START_DATE, END_DATE, 'outfile') and not isinstance(value, str):
+            raise ValueError(f"{key}: expected a string, not {value!r}")
+        if key in (HAZARDOUS, DESC) and not isinstance(value, bool):
+            raise ValueError(f"{key}: expected true or false, not {value!r}")
+        if (key not in (DATE, START_DATE, END_DATE, 'outfile', HAZARDOUS, DESC, SORT_BY)
+                and (isinstance(value, bool) or not isinstance(value, (int, float)))):
+            raise ValueError(f"{key}: expected a number, not {value!r}")
+        try:
+            if key in (DATE, START_DATE, END_DATE):
+                value = date_fromisoformat(value)
+            elif key in (TOP, 'limit'):
+                value = non_negative_int(value)
+            elif key == 'outfile':
+                value = pathlib.Path(value)
+            elif key not in (HAZARDOUS, DESC, SORT_BY):
+                value = finite_float(value)
+        except argparse.ArgumentTypeError as err:
+            raise ValueError(f"{key}: {err}")
+        setattr(args, key, value)
+    return args
+
+
+def query_batch(database, batch, stdout=None):
+    """Perform the `query-batch` subcommand.
+
+    All the filter sets are answered by one call to the database's `query_batch`,
+    and the results of each are streamed to its own output file, as `query` does.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param batch: The filter sets, as returned by `read_batch`.
+    :param stdout: Where to report the files written (standard output by default).
+    """
+    results = database.query_batch([vars(args) for args in batch])
+    for args, matches in zip(batch, results):
+        WRITERS[args.outfile.suffix](limit(matches, args.limit), args.outfile)
+        print(f"Wrote {args.outfile}", file=stdout)
+
+
+def run_command(database, inspect_parser, query_parser, argv, stdout, stderr, outfile):
+    """Run one `inspect` or `query` command for a client of the `serve` subcommand.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param inspect_parser: The subparser for the `inspect` subcommand.
+    :param query_parser: The subparser for the `query` subcommand.
+    :param argv: The command line, starting with `inspect` or `query`.
+    :param stdout: Where to print the results.
+    :param stderr: Where to print errors.
+    :param outfile: Where to write the results of a query with an `--outfile`, which
+    the client saves; the server never opens the path itself.
+    :return: The exit status of the command.
+    """
+    parsers = {'inspect': inspect_parser, 'query': query_parser}
+    if not argv or argv[0] not in parsers:
+        print("Expected an `inspect` or `query` command.", file=stderr)
+        return 2
+    try:
+        args = parsers[argv[0]].parse_args(argv[1:])
+    except SystemExit:
+        # The client checks its command with the same parser before sending it.
+        print(f"Invalid arguments: {shlex.join(argv)}", file=stderr)
+        return 2
+
+    if argv[0] == 'inspect':
+        inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose,
+                stdout=stdout, stderr=stderr)
+    else:
+        query(database, args, stdout=stdout, stderr=stderr, outfile=outfile)
+    return 0
+
+
+def run_client(parser, inspect_parser, query_parser, args):
+    """Perform the `client` subcommand: check the command, send it, and return its status."""
+    parsers = {'inspect': inspect_parser, 'query': query_parser}
+    if not args.command or args.command[0] not in parsers:
+        parser.error("client: expected an `inspect` or `query` command.")
+    # Report bad arguments here, with the usual usage message, rather than from the server.
+    command = parsers[args.command[0]].parse_args(args.command[1:])
+    # The server sends formatted results back, and the file is written here, as this user.
+    return server.request(server_address(args), args.command,
+                          outfile=getattr(command, 'outfile', None))
+
+
+class FileWatcher(threading.Thread):
+    """Watch the Python files of a directory for changes, from a background thread.
+
+    Every `interval` seconds the files are checked against `since`, and the
+    modified ones are published in `changed`, so that reading it never touches
+    the filesystem.
+    """
+    def __init__(self, root, since, interval=WATCH_INTERVAL):
+        """Create a new `FileWatcher`; `.start()` it to begin watching.
+
+        :param root: The directory whose `*.py` files to watch.
+        :param since: A timestamp; files modified after it count as changed.
+        :param interval: How many seconds to wait between checks.
+        """
+        super().__init__(name='FileWatcher', daemon=True)
+        self.root = root
+        self.since = since
+        self.interval = interval
+        self.changed = []
+        self._stopping = threading.Event()
+
+    def scan(self):
+        """Return the files modified since `since`."""
+        changed = []
+        for f in self.root.glob('*.py'):
+            try:
+                if f.stat().st_mtime > self.since:
+                    changed.append(f)
+            except OSError:
+                # Deleted between the glob and the stat.
+                pass
+        return changed
+
+    def run(self):
+        """Check the files every `interval` seconds until stopped."""
+        while not self._stopping.is_set():
+            self.changed = self.scan()
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        """Stop watching."""
+        self._stopping.set()
 
 
 class NEOShell(cmd.Cmd):
@@ -241,7 +653,8 @@ class NEOShell(cmd.Cmd):
              "Type `help` or `?` to list commands and `exit` to exit.\n")
     prompt = '(neo) '
 
-    def __init__(self, database, inspect_parser, query_parser, aggressive=False, **kwargs):
+    def __init__(self, database, inspect_parser, query_parser, aggressive=False,
+                 watch_interval=WATCH_INTERVAL, **kwargs):
         """Create a new `NEOShell`.
 
         Creating this object doesn't start the session - for that, use `.cmdloop()`.
@@ -250,6 +663,7 @@ class NEOShell(cmd.Cmd):
         :param inspect_parser: The subparser for the `inspect` subcommand.
         :param query_parser: The subparser for the `query` subcommand.
         :param aggressive: Whether to kill the session whenever a project file is changed.
+        :param watch_interval: How many seconds to wait between checks of the project files.
         :param kwargs: A dictionary of excess keyword arguments passed to the superclass.
         """
         super().__init__(**kwargs)
@@ -257,6 +671,7 @@ class NEOShell(cmd.Cmd):
         self.inspect = inspect_parser
         self.query = query_parser
         self.aggressive = aggressive
+        self.watcher = FileWatcher(PROJECT_ROOT, _START, watch_interval)
 
     @classmethod
     def parse_arg_with(cls, arg, parser):
@@ -343,6 +758,20 @@ class NEOShell(cmd.Cmd):
         # Run the `inspect` subcommand.
         query(self.db, args)
 
+    def do_cache(self, _arg):
+        """Show how often queries were answered from the query result cache.
+
+            (neo) cache
+            Query cache: 3 hits, 2 misses, 2/128 entries, 41.3 KB of 64.0 MB.
+        """
+        if not hasattr(self.db, 'cache_info'):
+            print("This database doesn't cache query results.", file=sys.stderr)
+            return
+        info = self.db.cache_info()
+        print(f"Query cache: {info.hits} hits, {info.misses} misses, "
+              f"{info.entries}/{info.max_entries} entries, "
+              f"{info.bytes / 1024:.1f} KB of {info.max_bytes / 1024 / 1024:.1f} MB.")
+
     def do_EOF(self, _arg):
         """Exit the interactive session."""
         return True
@@ -351,9 +780,21 @@ class NEOShell(cmd.Cmd):
     do_exit = do_EOF
     do_quit = do_EOF
 
+    def preloop(self):
+        """Start watching the files in this project."""
+        if self.watcher.ident is not None:
+            # A thread only starts once; a new session needs a new watcher.
+            self.watcher = FileWatcher(self.watcher.root, self.watcher.since,
+                                       self.watcher.interval)
+        self.watcher.start()
+
+    def postloop(self):
+        """Stop watching the files in this project."""
+        self.watcher.stop()
+
     def precmd(self, line):
-        """Watch for changes to the files in this project."""
-        changed = [f for f in PROJECT_ROOT.glob('*.py') if f.stat().st_mtime > _START]
+        """Report changes to the files in this project, as found by the watcher thread."""
+        changed = self.watcher.changed
         if changed:
             print("The following file(s) have been modified since this interactive session began: "
                   f"{', '.join(str(f.relative_to(PROJECT_ROOT)) for f in changed)}.",
@@ -372,16 +813,62 @@ def main():
     parser, inspect_parser, query_parser = make_parser()
     args = parser.parse_args()
 
-    # Extract data from the data files into structured Python objects.
-    database = NEODatabase(load_neos(args.neofile), load_approaches(args.cadfile))
+    # The client only talks to a server, which already has the data loaded.
+    if args.cmd == 'client':
+        sys.exit(run_client(parser, inspect_parser, query_parser, args))
+    # Check the whole batch before spending time on loading the data.
+    if args.cmd == 'query-batch':
+        try:
+            batch = read_batch(args.batchfile, query_parser)
+        except (OSError, ValueError) as err:
+            parser.error(str(err))
+
+    # Extract data from the data files into structured Python objects, or reuse a
+    # snapshot of them from an earlier run. One-shot commands only build the
+    # approaches they touch; the shell and the servers build them all up front, so
+    # that nothing is built (or linked) while a command is running - except from a
+    # store, whose mapped pages are shared by every process that opens it.
+    if args.sqlite:
+        if args.store or args.columnar:
+            parser.error("--sqlite can't be combined with --store or --columnar.")
+        database = sqlitedb.load(args.neofile, args.cadfile, args.sqlite)
+    else:
+        if args.store:
+            try:
+                _, neos, approaches = store.open_store(args.store)
+            except (OSError, ValueError) as err:
+                parser.error(str(err))
+        elif args.no_snapshot:
+            neos, approaches = parallel.load(args.neofile, args.cadfile, args.workers)
+        else:
+            neos, approaches = snapshot.load(args.neofile, args.cadfile, args.snapshot_dir,
+                                             args.workers)
+        long_running = args.cmd in ('interactive', 'serve', 'http')
+        if long_running and not isinstance(approaches, store.StoreApproaches):
+            approaches = list(approaches)
+        try:
+            # Only processes that answer many queries make up for building range indexes.
+            database = NEODatabase(neos, approaches, columnar=args.columnar,
+                                   cache_entries=args.cache_size, range_indexes=long_running)
+        except ImportError as err:
+            parser.error(str(err))
 
     # Run the chosen subcommand.
     if args.cmd == 'inspect':
         inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose)
     elif args.cmd == 'query':
         query(database, args)
+    elif args.cmd == 'query-batch':
+        query_batch(database, batch)
+    elif args.cmd == 'aggregate':
+        summarize(database, args)
     elif args.cmd == 'interactive':
         NEOShell(database, inspect_parser, query_parser, aggressive=args.aggressive).cmdloop()
+    elif args.cmd == 'serve':
+        server.serve(server_address(args),
+                     functools.partial(run_command, database, inspect_parser, query_parser))
+    elif args.cmd == 'http':
+        api.serve(database, args.host, args.port)
 
 
 if __name__ == '__main__':
@@ -28,10 +28,14 @@ class NearEarthObject:
     A `NearEarthObject` also maintains a collection of its close approaches -
     initialized to an empty collection, but eventually populated in the
     `NEODatabase` constructor.
+
+    Instances use `__slots__` rather than a per-instance `__dict__`, which
+    matters with tens of thousands of NEOs in memory.
     """
+    __slots__ = ('designation', 'name', 'diameter', 'hazardous', 'approaches', 'extra')
 
     def __init__(self, designation:str, hazardous:bool, name:str=None, 
-                diameter:float=float('nan')):
+                diameter:float=float('nan'), extra:dict=None):
         """Create a new `NearEarthObject`.
 
         :param designation: A string representing an object's internal database id
@@ -39,12 +43,14 @@ class NearEarthObject:
         :param diameter: a float representing object diameter(from equivilant sphere).
         NaN if no data is available
         :param hazardous: bool representing wheather it is a PHA
+        :param extra: A dictionary of any other raw fields loaded for this NEO. May be None.
         :approaches: A list of the objects close approaches to earth
         """
         self.designation = designation
         self.name = name
         self.diameter = diameter
         self.hazardous = hazardous
+        self.extra = extra
         
         self.approaches:List[CloseApproach] = []
 
@@ -89,15 +95,21 @@ class CloseApproach:
     initally, this information (the NEO's primary designation) is saved in a
     private attribute, but the referenced NEO is eventually replaced in the
     `NEODatabase` constructor.
+
+    Like `NearEarthObject`, instances use `__slots__` to stay small - there
+    are hundreds of thousands of close approaches in the full data set.
     """
+    __slots__ = ('_designation', 'time', 'distance', 'velocity', 'neo')
 
     def __init__(self, designation:str, cd_time:str, distance:float, velocity:float):
         """Create a new `CloseApproach`.
 
         :param designation: String representing .
+        :param cd_time: The NASA-formatted calendar date of the approach, or an
+        already-parsed `datetime`.
         """
         self._designation = designation
-        self.time = cd_to_datetime(cd_time)
+        self.time = cd_time if isinstance(cd_time, datetime.datetime) else cd_to_datetime(cd_time)
         self.distance = distance
         self.velocity = velocity
 
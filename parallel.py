@@ -0,0 +1,117 @@
+"""Parse the data files in parallel, across a pool of processes.
+
+neos.csv and cad.json don't depend on each other until `NEODatabase` links
+them, so `load` parses them at the same time, in separate processes. The
+`data` array of cad.json is also split into chunks of whole rows, which the
+pool decodes independently; each worker reads its own byte range of the file,
+so only the decoded columns travel back to the parent, which joins them into
+rows in file order.
+
+Rows are only split where one ends and the next begins - a `]`, a comma and a
+`[`. cad.json rows are flat lists of numbers and strings without brackets, so
+that can't happen inside a row. If the `data` array can't be found that way,
+the file is read serially instead.
+"""
+import array
+import concurrent.futures
+import json
+import mmap
+import re
+
+from extract import CadReader, LazyApproaches, load_neos, load_approaches
+
+
+# Each worker is given this many chunks of cad.json, to even out the load.
+CHUNKS_PER_WORKER = 4
+
+# The columns of cad.json that the approaches are built from.
+COLUMNS = ('des', 'cd', 'dist', 'v_rel')
+
+_DATA_START = re.compile(rb'"data"\s*:\s*\[\s*')
+_DATA_END = re.compile(rb'\]\s*\]')
+_ROW_BOUNDARY = re.compile(rb'\]\s*,\s*(?=\[)')
+
+
+def chunk_offsets(cad_json_path, chunks):
+    """Split the rows of the `data` array of cad.json into byte ranges.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param chunks: How many ranges to aim for.
+    :return: A list of `(start, end)` byte offsets, each covering a run of whole
+    rows separated by commas, or `None` if the `data` array wasn't found.
+    """
+    with open(cad_json_path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        match = _DATA_START.search(data)
+        if match is None:
+            return None
+        start = match.end()
+        if data[start:start + 1] == b']':
+            return []
+        match = _DATA_END.search(data, start)
+        if match is None:
+            return None
+        end = match.start() + 1
+
+        offsets = []
+        step = max(1, (end - start) // chunks)
+        while start < end:
+            match = _ROW_BOUNDARY.search(data, min(start + step, end), end)
+            split = match.start() + 1 if match else end
+            offsets.append((start, split))
+            start = match.end() if match else end
+        return offsets
+
+
+def load_columns(cad_json_path, start, end, columns):
+    """Decode the rows in one byte range of cad.json, as columns of `COLUMNS`.
+
+    Distances and velocities come back as arrays of doubles, which are much
+    cheaper to send to the parent than lists of strings.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param start: The offset of the first row.
+    :param end: The offset just past the last row.
+    :param columns: The indices of the fields of `COLUMNS` in each row.
+    :return: A tuple of the designations, the times, the distances and the velocities.
+    """
+    des, cd, dist, v_rel = columns
+    with open(cad_json_path, 'rb') as file:
+        file.seek(start)
+        rows = json.loads(b'[' + file.read(end - start) + b']')
+    return ([row[des] for row in rows], [row[cd] for row in rows],
+            array.array('d', [float(row[dist]) for row in rows]),
+            array.array('d', [float(row[v_rel]) for row in rows]))
+
+
+def load(neofile, cadfile, workers=1):
+    """Load NEOs and close approaches, parsing the data files in `workers` processes.
+
+    With a single worker the files are read one after the other in this
+    process, exactly as `load_neos` and `load_approaches(lazy=True)` do.
+
+    :param neofile: A path to a CSV file containing data about near-Earth objects.
+    :param cadfile: A path to a JSON file containing data about close approaches.
+    :param workers: How many processes to parse with.
+    :return: A tuple of a list of `NearEarthObject`s and a `LazyApproaches` of their
+    close approaches, ready to be passed to `NEODatabase`.
+    """
+    if workers <= 1:
+        return load_neos(neofile), load_approaches(cadfile, lazy=True)
+
+    field_to_index = CadReader(cadfile).field_to_index
+    columns = [field_to_index[field] for field in COLUMNS]
+    offsets = chunk_offsets(cadfile, workers * CHUNKS_PER_WORKER)
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        neos = pool.submit(load_neos, neofile)
+        if offsets is None:
+            approaches = pool.submit(load_approaches, cadfile, True).result()
+        else:
+            rows = []
+            chunks = [pool.submit(load_columns, cadfile, start, end, columns)
+                      for start, end in offsets]
+            for chunk in chunks:
+                rows.extend(zip(*chunk.result()))
+            approaches = LazyApproaches(rows, {field: i for i, field in enumerate(COLUMNS)})
+        return neos.result(), approaches
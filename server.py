@@ -0,0 +1,192 @@
+"""Answer `inspect` and `query` commands from a long-running process.
+
+`main.py serve` loads the database once and then listens on a Unix domain
+socket (or a TCP port on localhost); `main.py client` sends it one command and
+prints what comes back, so scripts pay for a socket round trip instead of a
+full load of the data files.
+
+The protocol is newline-delimited JSON, one command per connection. The client
+sends its command line:
+
+    {"argv": ["query", "--date", "2020-01-01"]}
+
+and the server streams back what the command prints, one message per write,
+followed by its exit status:
+
+    {"stdout": "On 2020-01-01 00:54, ..."}
+    {"stderr": "No matching NEOs exist in the database."}
+    {"exit": 0}
+
+The server never touches the client's files: the results of a query with an
+`--outfile` come back formatted, as `{"file": ...}` messages, and the client
+writes them to that path itself. The Unix domain socket is only accessible to
+the user who started the server.
+"""
+import contextlib
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import sys
+
+
+class _Channel:
+    """A writable text stream that sends each write to a client as one message.
+
+    A buffered channel holds its writes back and sends them as one message on
+    each flush instead, for writers that write many small pieces.
+    """
+    def __init__(self, wfile, name, buffered=False):
+        self._wfile = wfile
+        self._name = name
+        self._buffer = [] if buffered else None
+
+    def write(self, text):
+        if self._buffer is not None:
+            self._buffer.append(text)
+        elif text:
+            self._send(text)
+        return len(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        if self._buffer:
+            self._send(''.join(self._buffer))
+            self._buffer.clear()
+        self._wfile.flush()
+
+    def _send(self, text):
+        self._wfile.write(json.dumps({self._name: text}).encode() + b'\n')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Run the command of one connection with the server's `handle` function."""
+    def handle(self):
+        stdout, stderr = _Channel(self.wfile, 'stdout'), _Channel(self.wfile, 'stderr')
+        outfile = _Channel(self.wfile, 'file', buffered=True)
+        try:
+            argv = json.loads(self.rfile.readline())['argv']
+        except (ValueError, KeyError, TypeError):
+            print("Invalid request.", file=stderr)
+            status = 2
+        else:
+            try:
+                status = self.server.handle(argv, stdout, stderr, outfile)
+            except Exception as err:
+                # One bad command mustn't take the server down with it.
+                print(f"Error: {err}", file=stderr)
+                status = 1
+        try:
+            outfile.flush()
+            self.wfile.write(json.dumps({'exit': status}).encode() + b'\n')
+        except OSError:
+            pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(address, handle):
+    """Create a server that answers each connection on its own thread.
+
+    :param address: The path of a Unix domain socket, or a `(host, port)` tuple.
+    :param handle: A function of `(argv, stdout, stderr, outfile)` that runs one command
+    and returns its exit status, writing `--outfile` results to the `outfile` stream.
+    It is called from many threads at once.
+    :return: A `socketserver` server, which isn't serving yet.
+    """
+    if isinstance(address, tuple):
+        server = _TCPServer(address, _Handler)
+    else:
+        # A socket file left behind by a server that is no longer running is replaced.
+        if os.path.exists(address):
+            try:
+                with socket.socket(socket.AF_UNIX) as probe:
+                    probe.connect(address)
+            except ConnectionRefusedError:
+                os.unlink(address)
+        # Create the socket file readable and writable by its owner only, from the start.
+        umask = os.umask(0o177)
+        try:
+            server = _UnixServer(address, _Handler)
+        finally:
+            os.umask(umask)
+    server.handle = handle
+    return server
+
+
+def serve(address, handle):
+    """Serve commands on `address` until interrupted; see `make_server`."""
+    server = make_server(address, handle)
+    print(f"Serving on {describe(address)}. Press Ctrl-C to stop.", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not isinstance(address, tuple):
+            pathlib.Path(address).unlink(missing_ok=True)
+
+
+def request(address, argv, stdout=None, stderr=None, outfile=None):
+    """Send one command to a server and copy its output to `stdout` and `stderr`.
+
+    Results the server formats for an `--outfile` are written to `outfile`, which
+    is created when the first of them arrives.
+
+    :param address: The path of a Unix domain socket, or a `(host, port)` tuple.
+    :param argv: The command line, starting with `inspect` or `query`.
+    :param stdout: Where to write what the command prints (standard output by default).
+    :param stderr: Where to write the command's errors (standard error by default).
+    :param outfile: A Path-like object for the command's `--outfile`, if it has one.
+    :return: The exit status of the command.
+    """
+    stdout, stderr = stdout or sys.stdout, stderr or sys.stderr
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    try:
+        connection = socket.socket(family)
+        connection.connect(address)
+    except OSError as err:
+        connection.close()
+        print(f"Can't reach a server on {describe(address)}: {err.strerror}. "
+              "Start one with `main.py serve`.", file=stderr)
+        return 1
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(connection)
+        file = stack.enter_context(connection.makefile('rwb'))
+        file.write(json.dumps({'argv': list(argv)}).encode() + b'\n')
+        file.flush()
+        output = None
+        for line in file:
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+            if 'file' in message:
+                if output is None:
+                    output = stack.enter_context(open(outfile, 'w'))
+                output.write(message['file'])
+            elif 'stdout' in message:
+                stdout.write(message['stdout'])
+            else:
+                stderr.write(message['stderr'])
+    print("The server closed the connection.", file=stderr)
+    return 1
+
+
+def describe(address):
+    """Describe a server address for messages."""
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return str(address)
@@ -0,0 +1,89 @@
+"""Cache the extracted data files in a binary snapshot.
+
+Reading neos.csv and cad.json is most of the time a one-shot command takes. A
+snapshot is a `store` of the same data, already parsed, linked and sorted by
+time, whose header also records the files it was made from.
+
+A snapshot is keyed on the size, modification time and SHA-256 hash of its
+source files. It is rebuilt as soon as the size or the contents of either file
+change; if only the modification time changed, the hash decides.
+"""
+import hashlib
+import os
+import pathlib
+
+import parallel
+from store import write_store, open_store
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(path):
+    """Describe a source file by its size, modification time and hash."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+
+
+def is_current(key, path):
+    """Return whether a file still matches the `source_key` recorded for it."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != key['size']:
+        return False
+    if stat.st_mtime_ns == key['mtime_ns']:
+        return True
+    # Touched or copied, perhaps - only the contents can tell.
+    return file_hash(path) == key['sha256']
+
+
+def snapshot_path(cache_dir, neofile, cadfile):
+    """Return where the snapshot of a pair of data files is kept in `cache_dir`."""
+    sources = f"{pathlib.Path(neofile).resolve()}\0{pathlib.Path(cadfile).resolve()}"
+    return pathlib.Path(cache_dir) / f"{hashlib.sha256(sources.encode()).hexdigest()[:16]}.snapshot"
+
+
+def load(neofile, cadfile, cache_dir, workers=1):
+    """Load NEOs and close approaches, from a current snapshot if there is one.
+
+    Otherwise the data files are read with `parallel.load`, and a snapshot of them is
+    written to `cache_dir` for next time. A cache directory that can't be
+    written to only means that no snapshot is kept.
+
+    :param neofile: A path to a CSV file containing data about near-Earth objects.
+    :param cadfile: A path to a JSON file containing data about close approaches.
+    :param cache_dir: The directory that holds the snapshots.
+    :param workers: How many processes to read the data files with, if they must be read.
+    :return: A tuple of a list of `NearEarthObject`s and a `LazyApproaches` (or the
+    `StoreApproaches` of the snapshot) of their close approaches, ready to be passed
+    to `NEODatabase`.
+    """
+    path = snapshot_path(cache_dir, neofile, cadfile)
+    try:
+        header, neos, approaches = open_store(path)
+    except (OSError, ValueError):
+        pass
+    else:
+        sources = header.get('sources', {})
+        if ('neofile' in sources and 'cadfile' in sources
+                and is_current(sources['neofile'], neofile)
+                and is_current(sources['cadfile'], cadfile)):
+            return neos, approaches
+
+    sources = {'neofile': source_key(neofile), 'cadfile': source_key(cadfile)}
+    neos, approaches = parallel.load(neofile, cadfile, workers)
+    try:
+        write_store(path, neos, approaches, {'sources': sources})
+        # The snapshot is already sorted and grouped, which saves `NEODatabase` the work.
+        _, neos, approaches = open_store(path)
+    except OSError:
+        pass
+    return neos, approaches
@@ -0,0 +1,419 @@
+"""An NEO database stored in SQLite, for data sets that don't fit in memory.
+
+`SQLiteNEODatabase` answers the same questions as `NEODatabase` - `query`,
+`get_neo_by_designation`, `get_neo_by_name`, `min_time` and `max_time` - from
+a database file written once from the output of `load_neos`/`load_approaches`:
+
+* `neo` holds the NEOs, indexed on designation and name;
+* `alias` maps every way of referring to an NEO - "433", "433 Eros",
+  "433 (Eros)" and "Eros" - to its row, with the same precedence as `NEODatabase`;
+* `approach` holds the close approaches, indexed on time, distance, velocity
+  and NEO. Times are whole minutes since `columnar.EPOCH`;
+* `source` records the data files it was made from (see `snapshot.source_key`).
+
+A query becomes one parameterized SELECT, with the same bounds as
+`filters.compile_ranges`, and its rows are turned into `CloseApproach` objects
+as they are read; an aggregate is the same SELECT with a GROUP BY. Each NEO is built once per `SQLiteNEODatabase`; its
+`.approaches` are attached when it is fetched with one of the `get_neo_by_*`
+methods, as in a lazily-indexed `NEODatabase`.
+"""
+import datetime
+import math
+import pathlib
+import sqlite3
+import threading
+
+from models import NearEarthObject, CloseApproach
+from columnar import EPOCH, MINUTES_PER_DAY, to_minutes, date_to_minutes
+from extract import load_neos, load_approaches
+from aggregate import Summary, sort_key
+import filters
+import snapshot
+
+
+SCHEMA = """
+CREATE TABLE neo (
+    id INTEGER PRIMARY KEY,
+    designation TEXT NOT NULL,
+    name TEXT,
+    diameter REAL,
+    hazardous INTEGER NOT NULL
+);
+CREATE TABLE alias (
+    alias TEXT PRIMARY KEY,
+    neo_id INTEGER NOT NULL REFERENCES neo (id)
+) WITHOUT ROWID;
+CREATE TABLE approach (
+    id INTEGER PRIMARY KEY,
+    neo_id INTEGER REFERENCES neo (id),
+    designation TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    distance REAL NOT NULL,
+    velocity REAL NOT NULL
+);
+CREATE TABLE source (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX neo_designation ON neo (designation);
+CREATE INDEX neo_name ON neo (name);
+CREATE INDEX approach_time ON approach (time);
+CREATE INDEX approach_distance ON approach (distance);
+CREATE INDEX approach_velocity ON approach (velocity);
+CREATE INDEX approach_neo ON approach (neo_id, time);
+"""
+
+# Rows are inserted this many at a time.
+BATCH_SIZE = 10000
+
+
+def write_database(path, neos, approaches, sources=None):
+    """Write NEOs and their close approaches to a new SQLite database.
+
+    Approaches are inserted in time order, so that ties are broken the same way
+    as in `NEODatabase`. Any existing file at `path` is replaced.
+
+    :param path: Where to write the database.
+    :param neos: A collection of `NearEarthObject`s.
+    :param approaches: A collection of unlinked `CloseApproach`es.
+    :param sources: A dictionary of `snapshot.source_key`s of the files the data came from.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.partial')
+    partial.unlink(missing_ok=True)
+
+    connection = sqlite3.connect(partial)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            neos = list(neos)
+            connection.executemany(
+                "INSERT INTO neo (id, designation, name, diameter, hazardous) VALUES (?, ?, ?, ?, ?)",
+                ((i, neo.designation, neo.name,
+                  None if math.isnan(neo.diameter) else neo.diameter, neo.hazardous)
+                 for i, neo in enumerate(neos)))
+
+            # Names come first and designations last, so that designations win any
+            # collision, and a later NEO replaces an earlier one - as in `NEODatabase`.
+            aliases = {}
+            for i, neo in enumerate(neos):
+                if neo.name:
+                    aliases[f"{neo.designation} {neo.name}"] = i
+                    aliases[neo.fullname] = i
+                    aliases[neo.name] = i
+            for i, neo in enumerate(neos):
+                aliases[neo.designation] = i
+            connection.executemany("INSERT INTO alias (alias, neo_id) VALUES (?, ?)",
+                                   aliases.items())
+
+            neo_ids = {neo.designation: i for i, neo in enumerate(neos)}
+            ordered = sorted(approaches, key=lambda approach: approach.time)
+            connection.executemany(
+                "INSERT INTO approach (neo_id, designation, time, distance, velocity) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((neo_ids.get(approach._designation), approach._designation,
+                  to_minutes(approach.time), approach.distance, approach.velocity)
+                 for approach in ordered))
+
+            connection.executemany(
+                "INSERT INTO source (name, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                ((name, key['size'], key['mtime_ns'], key['sha256'])
+                 for name, key in (sources or {}).items()))
+            connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    partial.replace(path)
+
+
+# The columns the range filters and orders compare.
+COLUMNS = {'distance': 'approach.distance', 'velocity': 'approach.velocity',
+           'diameter': 'neo.diameter'}
+
+# The group of an approach, for each of `aggregate.GROUP_BY`.
+_TIMESTAMP = f"'{EPOCH:%Y-%m-%d %H:%M}', approach.time || ' minutes'"
+GROUPS = {
+    'year': f"CAST(strftime('%Y', {_TIMESTAMP}) AS INTEGER)",
+    'month': f"strftime('%Y-%m', {_TIMESTAMP})",
+    'neo': "approach.designation",
+    'hazardous': "COALESCE(neo.hazardous, 0)",
+}
+
+
+def compile_where(restrictions):
+    """Translate a dictionary of filters into the WHERE clause of a query of `approach`.
+
+    Date filters match `filters.compile_filters`: the start and end dates are
+    exclusive and `date` is inclusive. Approaches of NEOs that aren't in the
+    database have no diameter and aren't hazardous.
+
+    :param restrictions: A dictionary of filters, with `None` for filters that weren't given.
+    :return: A tuple of the SQL text, which is empty if no filter is active, and its parameters.
+    """
+    conditions, parameters = [], []
+    if restrictions.get(filters.START_DATE) != None:
+        conditions.append("approach.time >= ?")
+        parameters.append(date_to_minutes(restrictions[filters.START_DATE]) + MINUTES_PER_DAY)
+    if restrictions.get(filters.END_DATE) != None:
+        conditions.append("approach.time < ?")
+        parameters.append(date_to_minutes(restrictions[filters.END_DATE]))
+    if restrictions.get(filters.DATE) != None:
+        day = date_to_minutes(restrictions[filters.DATE])
+        conditions.append("approach.time >= ? AND approach.time < ?")
+        parameters.extend((day, day + MINUTES_PER_DAY))
+
+    columns = COLUMNS
+    for attribute, (low, high) in filters.compile_ranges(restrictions).items():
+        # Unknown diameters are NULL, which fails both comparisons, like NaN.
+        if low != -math.inf:
+            conditions.append(f"{columns[attribute]} >= ?")
+            parameters.append(low)
+        if high != math.inf:
+            conditions.append(f"{columns[attribute]} <= ?")
+            parameters.append(high)
+        if low == -math.inf and high == math.inf:
+            conditions.append(f"{columns[attribute]} IS NOT NULL")
+
+    if restrictions.get(filters.HAZARDOUS) != None:
+        conditions.append("COALESCE(neo.hazardous, 0) = ?")
+        parameters.append(int(bool(restrictions[filters.HAZARDOUS])))
+
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+
+def compile_query(restrictions):
+    """Translate a dictionary of filters into a parameterized SQL query.
+
+    The query selects the columns `SQLiteNEODatabase._approach` expects, in time
+    order, or in the order `filters.SORT_BY` and `filters.DESC` ask for, and at
+    most `filters.TOP` of them. Filters are as in `compile_where`.
+
+    :param restrictions: A dictionary of filters, with `None` for filters that weren't given.
+    :return: A tuple of the SQL text and its parameters.
+    """
+    where, parameters = compile_where(restrictions)
+    sql = ("SELECT approach.neo_id, approach.designation, approach.time, approach.distance, "
+           "approach.velocity FROM approach LEFT JOIN neo ON neo.id = approach.neo_id" + where)
+
+    # Ties keep their time order either way, as with `filters.top`; when ordering by
+    # time itself, descending reverses it exactly.
+    sort_by, desc = restrictions.get(filters.SORT_BY) or 'time', restrictions.get(filters.DESC)
+    if sort_by not in filters.SORT_ATTRIBUTES:
+        raise ValueError(f"Can't sort by {sort_by!r}.")
+    direction = " DESC" if desc else ""
+    if sort_by == 'time':
+        sql += f" ORDER BY approach.time{direction}, approach.id{direction}"
+    else:
+        # Unknown diameters come last, in either direction.
+        sql += (f" ORDER BY {COLUMNS[sort_by]} IS NULL, {COLUMNS[sort_by]}{direction}, "
+                "approach.time, approach.id")
+    if restrictions.get(filters.TOP):
+        sql += " LIMIT ?"
+        parameters.append(restrictions[filters.TOP])
+    return sql, parameters
+
+
+def compile_aggregate(restrictions, group_by=None):
+    """Translate a dictionary of filters into an SQL query of `aggregate.Summary` rows.
+
+    :param restrictions: A dictionary of filters, with `None` for filters that weren't given.
+    :param group_by: One of `aggregate.GROUP_BY`, or None to summarize every match together.
+    :return: A tuple of the SQL text and its parameters. Each row is a group,
+    followed by the fields of its `Summary`.
+    """
+    if group_by is not None and group_by not in GROUPS:
+        raise ValueError(f"Can't group by {group_by!r}.")
+    where, parameters = compile_where(restrictions)
+    group = GROUPS[group_by] if group_by else "NULL"
+    sql = (f"SELECT {group}, COUNT(*), MIN(approach.distance), MAX(approach.distance), "
+           "AVG(approach.distance), MIN(approach.velocity), MAX(approach.velocity), "
+           "AVG(approach.velocity) FROM approach LEFT JOIN neo ON neo.id = approach.neo_id" + where)
+    if group_by:
+        sql += " GROUP BY 1"
+    return sql, parameters
+
+
+class SQLiteNEODatabase:
+    """A database of near-Earth objects and their close approaches, kept in SQLite.
+
+    This has the same interface as `NEODatabase` for inspecting NEOs and
+    querying close approaches, but only reads what each call needs.
+    """
+    def __init__(self, path):
+        """Open a database written by `write_database`.
+
+        :param path: The path of the database file.
+        """
+        self._connection = sqlite3.connect(f"{pathlib.Path(path).resolve().as_uri()}?mode=ro",
+                                           uri=True, check_same_thread=False)
+        # Each NEO is built once, so that every approach of it links to the same object.
+        # The lock keeps that true when threads share the database, as in `main.py serve`.
+        self._neos = {}
+        self._attached = set()
+        self._lock = threading.RLock()
+
+    def close(self):
+        """Close the database file."""
+        self._connection.close()
+
+    def sources(self):
+        """Return the `snapshot.source_key` of every file the database was made from."""
+        return {name: {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+                for name, size, mtime_ns, sha256
+                in self._connection.execute("SELECT name, size, mtime_ns, sha256 FROM source")}
+
+    def _neo(self, neo_id):
+        """Return the `NearEarthObject` of a row of `neo`, building it the first time."""
+        with self._lock:
+            neo = self._neos.get(neo_id)
+            if neo is None:
+                designation, name, diameter, hazardous = self._connection.execute(
+                    "SELECT designation, name, diameter, hazardous FROM neo WHERE id = ?",
+                    (neo_id,)).fetchone()
+                neo = NearEarthObject(designation=designation, hazardous=bool(hazardous),
+                                      name=name,
+                                      diameter=float('nan') if diameter is None else diameter)
+                self._neos[neo_id] = neo
+            return neo
+
+    def _approach(self, row):
+        """Build a linked `CloseApproach` from a row selected by `compile_query`."""
+        neo_id, designation, time, distance, velocity = row
+        approach = CloseApproach(designation=designation,
+                                 cd_time=EPOCH + datetime.timedelta(minutes=time),
+                                 distance=distance, velocity=velocity)
+        if neo_id is not None:
+            approach.neo = self._neo(neo_id)
+        return approach
+
+    def _neo_by_alias(self, alias):
+        """Find an NEO through the `alias` index, attaching its approaches the first time."""
+        row = self._connection.execute("SELECT neo_id FROM alias WHERE alias = ?",
+                                       (alias,)).fetchone()
+        if row is None:
+            return None
+        neo_id, = row
+        with self._lock:
+            neo = self._neo(neo_id)
+            if neo_id not in self._attached:
+                self._attached.add(neo_id)
+                rows = self._connection.execute(
+                    "SELECT neo_id, designation, time, distance, velocity FROM approach "
+                    "WHERE neo_id = ? ORDER BY time, id", (neo_id,))
+                neo.approaches.extend(map(self._approach, rows))
+        return neo
+
+    def get_neo_by_designation(self, designation):
+        """Find and return an NEO by its primary designation, or `None`.
+
+        Aliases such as "433 Eros" resolve to the same NEO as "433", as in `NEODatabase`.
+
+        :param designation: The primary designation of the NEO to search for.
+        :return: The `NearEarthObject` with the desired primary designation, or `None`.
+        """
+        return self._neo_by_alias(designation)
+
+    def get_neo_by_name(self, name):
+        """Find and return an NEO by its name, or `None`.
+
+        No NEOs are associated with the empty string nor with the `None` singleton.
+
+        :param name: The name, as a string, of the NEO to search for.
+        :return: The `NearEarthObject` with the desired name, or `None`.
+        """
+        if not name:
+            return None
+        return self._neo_by_alias(name)
+
+    @property
+    def max_time(self):
+        """The time of the last close approach, or None if there are none."""
+        return self._time("SELECT MAX(time) FROM approach")
+
+    @property
+    def min_time(self):
+        """The time of the first close approach, or None if there are none."""
+        return self._time("SELECT MIN(time) FROM approach")
+
+    def _time(self, sql):
+        minutes, = self._connection.execute(sql).fetchone()
+        return None if minutes is None else EPOCH + datetime.timedelta(minutes=minutes)
+
+    def query(self, args):
+        """Query close approaches to generate those that match a collection of filters.
+
+        Rows are read from SQLite as the stream is consumed, so a limited query
+        stops reading early.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: A stream of matching `CloseApproach` objects, in time order unless
+        `args` asks for another.
+        """
+        sql, parameters = compile_query(args)
+        yield from map(self._approach, self._connection.execute(sql, parameters))
+
+    def count(self, args):
+        """Count the close approaches that match a collection of filters, with one SELECT COUNT(*).
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :return: The number of matching close approaches.
+        """
+        where, parameters = compile_where(args)
+        sql = "SELECT COUNT(*) FROM approach LEFT JOIN neo ON neo.id = approach.neo_id" + where
+        return self._connection.execute(sql, parameters).fetchone()[0]
+
+    def aggregate(self, args, group_by=None):
+        """Summarize the close approaches that match a collection of filters, by group.
+
+        This is one SQL query with a GROUP BY; see `NEODatabase.aggregate`.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :param group_by: One of `aggregate.GROUP_BY`, or None to summarize every match together.
+        :return: A dictionary mapping each group to its `aggregate.Summary`, in sorted order.
+        """
+        sql, parameters = compile_aggregate(args, group_by)
+        summaries = {}
+        for group, *values in self._connection.execute(sql, parameters):
+            if values[0]:
+                summaries[bool(group) if group_by == 'hazardous' else group] = Summary(*values)
+        return {group: summaries[group] for group in sorted(summaries, key=sort_key)}
+
+    def query_batch(self, queries):
+        """Answer many queries, as `NEODatabase.query_batch` does.
+
+        Each query runs as its own indexed SELECT when its stream is read.
+
+        :param queries: A sequence of dictionaries of filters, as for `query`.
+        :return: A list holding a stream of the matching `CloseApproach`es of each query.
+        """
+        return [self.query(args) for args in queries]
+
+
+def load(neofile, cadfile, path):
+    """Open the SQLite database of a pair of data files, writing it first if needed.
+
+    The database is rewritten whenever the data files no longer match the
+    sources it records, in the same way as a snapshot.
+
+    :param neofile: A path to a CSV file containing data about near-Earth objects.
+    :param cadfile: A path to a JSON file containing data about close approaches.
+    :param path: The path of the database file.
+    :return: A `SQLiteNEODatabase`.
+    """
+    try:
+        database = SQLiteNEODatabase(path)
+        sources = database.sources()
+    except sqlite3.Error:
+        pass
+    else:
+        if ('neofile' in sources and 'cadfile' in sources
+                and snapshot.is_current(sources['neofile'], neofile)
+                and snapshot.is_current(sources['cadfile'], cadfile)):
+            return database
+        database.close()
+
+    sources = {'neofile': snapshot.source_key(neofile), 'cadfile': snapshot.source_key(cadfile)}
+    write_database(path, load_neos(neofile), load_approaches(cadfile), sources)
+    return SQLiteNEODatabase(path)
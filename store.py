@@ -0,0 +1,330 @@
+"""A persistent columnar store of NEOs and close approaches, read through `mmap`.
+
+A store file holds the data of neos.csv and cad.json already parsed, linked and
+sorted by time:
+
+* a header line of JSON, describing where each section is;
+* the NEOs, as a string table of designations and names, a column of diameters
+  and a column of hazardous flags;
+* the close approaches, in time order, as fixed-width columns of times (minutes
+  since `columnar.EPOCH`), distances, velocities and NEO ids;
+* the rows of each NEO id, grouped together, with the offset of each group.
+
+NEO ids index the designation table, where the NEOs come first; approaches of
+NEOs that aren't in neos.csv get ids past the NEOs, so they keep their designation.
+
+Every column is a native-endian `array` aligned to 8 bytes, so an opened store
+uses them in place as `memoryview`s of the mapped file instead of copying them.
+Processes that open the same store share its pages. Queries are evaluated over
+the columns - as NumPy views with `--columnar`, or row by row otherwise - and
+only the rows that match are built into `CloseApproach` objects.
+
+A store is written from the data files with `extract`:
+
+    $ python3 store.py --neofile data/neos.csv --cadfile data/cad.json data/neos.store
+"""
+import argparse
+import array
+import datetime
+import json
+import mmap
+import os
+import pathlib
+import sys
+import tempfile
+
+from extract import load_neos, load_approaches, ApproachRows
+from models import NearEarthObject, CloseApproach
+from columnar import ColumnarApproaches, EPOCH, to_minutes, np
+import filters
+
+
+MAGIC = b'NEOSTOR\n'
+VERSION = 1
+
+# Columns start on multiples of this many bytes, the widest item size.
+ALIGNMENT = 8
+
+
+def write_store(path, neos, approaches, meta=None):
+    """Write NEOs and their close approaches to a store file.
+
+    The rows of `approaches` are put into time order in place, as they are in
+    the store. The file is written next to `path` and then moved over it, so
+    readers never see a partial store.
+
+    :param path: Where to write the store.
+    :param neos: A list of `NearEarthObject`s.
+    :param approaches: A `LazyApproaches` of the close approaches of those NEOs.
+    :param meta: A dictionary of anything else to record in the header.
+    """
+    keys = approaches.sort_keys()
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    approaches.reorder(order)
+
+    designations = [neo.designation for neo in neos]
+    index = {designation: i for i, designation in enumerate(designations)}
+    neo_id = array.array('i')
+    for designation in approaches.designations():
+        if designation not in index:
+            index[designation] = len(designations)
+            designations.append(designation)
+        neo_id.append(index[designation])
+
+    # Group the rows by NEO id, in time order within each group.
+    offsets = array.array('i', bytes(4 * (len(designations) + 1)))
+    for i in neo_id:
+        offsets[i + 1] += 1
+    for i in range(len(designations)):
+        offsets[i + 1] += offsets[i]
+    rows = array.array('i', bytes(4 * len(neo_id)))
+    positions = offsets[:-1]
+    for row, i in enumerate(neo_id):
+        rows[positions[i]] = row
+        positions[i] += 1
+
+    sections = {
+        'designations': '\0'.join(designations).encode(),
+        'names': '\0'.join(neo.name or '' for neo in neos).encode(),
+        'diameter': array.array('d', (neo.diameter for neo in neos)),
+        'hazardous': array.array('B', (neo.hazardous for neo in neos)),
+        'time': array.array('q', (to_minutes(datetime.datetime.fromisoformat(keys[i]))
+                                  for i in order)),
+        'distance': array.array('d', map(float, approaches.column('dist'))),
+        'velocity': array.array('d', map(float, approaches.column('v_rel'))),
+        'neo_id': neo_id,
+        'rows': rows,
+        'offsets': offsets,
+    }
+
+    header = {'version': VERSION, 'byteorder': sys.byteorder, 'neos': len(neos),
+              'approaches': len(keys), 'sections': {}, **(meta or {})}
+    offset = 0
+    for name, data in sections.items():
+        size = memoryview(data).nbytes
+        header['sections'][name] = [offset, size]
+        offset += -(-size // ALIGNMENT) * ALIGNMENT
+
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=path.parent, delete=False) as file:
+        head = MAGIC + json.dumps(header).encode() + b'\n'
+        file.write(head + bytes(-len(head) % ALIGNMENT))
+        for data in sections.values():
+            size = memoryview(data).nbytes
+            file.write(data)
+            file.write(bytes(-size % ALIGNMENT))
+    # Temporary files are private to their owner; stores are meant to be shared.
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+class StoreApproaches(ApproachRows):
+    """The close approaches of a store, built from its mapped columns on first access.
+
+    The rows are always in time order, as the store keeps them, so they can't
+    be reordered. The sort keys are the times in minutes, as in `time_key`.
+    """
+    in_time_order = True
+
+    def __init__(self, designations, neo_count, diameter, hazardous,
+                 time, distance, velocity, neo_id, rows, offsets):
+        """Create a new `StoreApproaches` over the columns of a store.
+
+        :param designations: The designation of every NEO id.
+        :param neo_count: How many of the NEO ids are NEOs of the store.
+        :param diameter: A `memoryview` of the diameter of every NEO, as doubles.
+        :param hazardous: A `memoryview` of the hazardous flag of every NEO, as bytes.
+        :param time: A `memoryview` of the times, as minutes since `EPOCH` in long longs.
+        :param distance: A `memoryview` of the distances, as doubles.
+        :param velocity: A `memoryview` of the velocities, as doubles.
+        :param neo_id: A `memoryview` of the NEO id of every approach, as ints.
+        :param rows: A `memoryview` of the rows of each NEO id in turn, as ints.
+        :param offsets: A `memoryview` of where each NEO id's rows start in `rows`.
+        """
+        super().__init__(len(time))
+        self._designations = designations
+        self._neo_count = neo_count
+        self._diameter = diameter
+        self._hazardous = hazardous
+        self._time = time
+        self._distance = distance
+        self._velocity = velocity
+        self._neo_id = neo_id
+        self._rows_of = rows
+        self._offsets = offsets
+
+    def _build(self, row):
+        """Build the unlinked `CloseApproach` of one row of the columns."""
+        return CloseApproach(designation=self._designations[self._neo_id[row]],
+                             cd_time=EPOCH + datetime.timedelta(minutes=self._time[row]),
+                             distance=self._distance[row], velocity=self._velocity[row])
+
+    @staticmethod
+    def time_key(dt):
+        """Return the sort key of a datetime, to search `sort_keys` with."""
+        return to_minutes(dt)
+
+    def designations(self):
+        """Return the designation of every row, without building any approaches."""
+        designations = self._designations
+        return [designations[i] for i in self._neo_id]
+
+    def sort_keys(self):
+        """Return the time column itself - it is already in order."""
+        return self._time
+
+    def rows_by_designation(self):
+        """Return a dictionary mapping each designation to the indices of its rows."""
+        rows, offsets = self._rows_of, self._offsets
+        return {designation: rows[offsets[i]:offsets[i + 1]]
+                for i, designation in enumerate(self._designations)
+                if offsets[i] != offsets[i + 1]}
+
+    def values(self, attribute):
+        """Return the mapped column of `distance` or `velocity` itself."""
+        return {'distance': self._distance, 'velocity': self._velocity}[attribute]
+
+    def records(self, indices):
+        """Generate the `aggregate.summarize` records of some rows, without building any approaches.
+
+        :param indices: The indices of the rows, in any order.
+        """
+        designations, hazardous, count = self._designations, self._hazardous, self._neo_count
+        time, distance, velocity, neo_id = self._time, self._distance, self._velocity, self._neo_id
+        minute = datetime.timedelta(minutes=1)
+        for i in indices:
+            neo, when = neo_id[i], EPOCH + time[i] * minute
+            yield (designations[neo], neo < count and bool(hazardous[neo]),
+                   when.year, when.month, distance[i], velocity[i])
+
+    def select(self, args, lo=0, hi=None, rows=None):
+        """Generate the indices of the rows `lo:hi` that match the non-date filters.
+
+        The filters are evaluated over the mapped columns, so no approaches are
+        built. Approaches of unknown NEOs have a NaN diameter and aren't hazardous.
+
+        :param args: A dictionary of filters, with `None` for filters that weren't given.
+        :param lo: The first row to consider.
+        :param hi: The row after the last one to consider.
+        :param rows: The rows to consider instead of `lo:hi`, e.g. the candidates of
+        a range index, in increasing order.
+        """
+        hi = len(self._time) if hi is None else hi
+        ranges = filters.compile_ranges(args)
+        hazardous = args.get(filters.HAZARDOUS)
+
+        # NEO attributes are checked once per NEO id, then looked up per row.
+        neo_ok = None
+        if 'diameter' in ranges or hazardous != None:
+            low, high = ranges.pop('diameter', (None, None))
+            diameter, flags, count = self._diameter, self._hazardous, self._neo_count
+            neo_ok = bytearray(len(self._designations))
+            for i in range(count):
+                neo_ok[i] = ((low is None or low <= diameter[i] <= high)
+                             and (hazardous == None or bool(flags[i]) == bool(hazardous)))
+            if low is None and not hazardous:
+                # Unknown NEOs have a NaN diameter and aren't hazardous.
+                neo_ok[count:] = b'\x01' * (len(neo_ok) - count)
+        columns = [(getattr(self, '_' + attribute), low, high)
+                   for attribute, (low, high) in ranges.items()]
+
+        neo_id = self._neo_id
+        for row in range(lo, hi) if rows is None else rows:
+            if neo_ok is not None and not neo_ok[neo_id[row]]:
+                continue
+            for column, low, high in columns:
+                # NaN compares False on both sides, just like `bt_floats`/`lt_floats`.
+                if not low <= column[row] <= high:
+                    break
+            else:
+                yield row
+
+    def columns(self):
+        """Return a `ColumnarApproaches` of NumPy views of the mapped columns."""
+        if np is None:
+            raise ImportError("The columnar backend requires NumPy (`pip install numpy`).")
+        padding = len(self._designations) - self._neo_count
+        return ColumnarApproaches.from_arrays(
+            time=np.frombuffer(self._time, dtype=np.int64),
+            distance=np.frombuffer(self._distance, dtype=np.float64),
+            velocity=np.frombuffer(self._velocity, dtype=np.float64),
+            neo_index=np.frombuffer(self._neo_id, dtype=np.int32),
+            # Unknown NEOs, past the NEOs of the store, get a NaN diameter and aren't hazardous.
+            neo_diameter=np.concatenate([np.frombuffer(self._diameter, dtype=np.float64),
+                                         np.full(padding, np.nan)]),
+            neo_hazardous=np.concatenate([np.frombuffer(self._hazardous, dtype=np.bool_),
+                                          np.zeros(padding, dtype=np.bool_)]),
+            neo_designations=self._designations)
+
+
+def open_store(path):
+    """Open a store file.
+
+    :param path: The path of the store.
+    :return: A tuple of the store's header, its list of `NearEarthObject`s and a
+    `StoreApproaches` of their close approaches.
+    :raises ValueError: If the file isn't a store this version can read.
+    """
+    with open(path, 'rb') as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped.
+            raise ValueError(f"{path} is not a store.") from None
+    end = buffer.find(b'\n', len(MAGIC))
+    if buffer[:len(MAGIC)] != MAGIC or end == -1:
+        raise ValueError(f"{path} is not a store.")
+    header = json.loads(buffer[len(MAGIC):end])
+    if header.get('version') != VERSION or header.get('byteorder') != sys.byteorder:
+        raise ValueError(f"{path} was written by another version or on another platform.")
+
+    start = end + 1 + (-(end + 1) % ALIGNMENT)
+    view = memoryview(buffer)
+
+    def section(name, format=None):
+        offset, size = header['sections'][name]
+        if start + offset + size > len(buffer):
+            raise ValueError(f"{path} is truncated.")
+        data = view[start + offset:start + offset + size]
+        return data if format is None else data.cast(format)
+
+    designations = str(section('designations'), 'utf-8').split('\0')
+    names = str(section('names'), 'utf-8').split('\0')
+    diameter, hazardous = section('diameter', 'd'), section('hazardous', 'B')
+    neos = [NearEarthObject(designation=designations[i], hazardous=bool(hazardous[i]),
+                            name=names[i] or None, diameter=diameter[i])
+            for i in range(header['neos'])]
+
+    approaches = StoreApproaches(designations, header['neos'], diameter, hazardous,
+                                 section('time', 'q'), section('distance', 'd'),
+                                 section('velocity', 'd'), section('neo_id', 'i'),
+                                 section('rows', 'i'), section('offsets', 'i'))
+    return header, neos, approaches
+
+
+def convert(neofile, cadfile, path, meta=None):
+    """Read the data files with `extract` and write them to a store.
+
+    :param neofile: A path to a CSV file containing data about near-Earth objects.
+    :param cadfile: A path to a JSON file containing data about close approaches.
+    :param path: Where to write the store.
+    :param meta: A dictionary of anything else to record in the header.
+    """
+    write_store(path, load_neos(neofile), load_approaches(cadfile, lazy=True), meta)
+
+
+def main():
+    """Convert neos.csv and cad.json into a store."""
+    parser = argparse.ArgumentParser(description="Convert the data files into a columnar store.")
+    parser.add_argument('--neofile', default=pathlib.Path('data', 'neos.csv'), type=pathlib.Path,
+                        help="Path to CSV file of near-Earth objects.")
+    parser.add_argument('--cadfile', default=pathlib.Path('data', 'cad.json'), type=pathlib.Path,
+                        help="Path to JSON file of close approach data.")
+    parser.add_argument('store', type=pathlib.Path, help="Path of the store to write.")
+    args = parser.parse_args()
+    convert(args.neofile, args.cadfile, args.store)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Filter sets and a result summary shared by the tests that compare backends.
+
+Every backend - the data files, snapshots, stores, SQLite and the HTTP API -
+should answer the `FILTER_SETS` exactly as an `NEODatabase` of the data files
+does, and `summarize` reduces their results to something to compare.
+"""
+import datetime
+
+import filters
+
+
+FILTER_SETS = (
+    {},
+    {filters.DATE: datetime.date(2020, 3, 2)},
+    {filters.START_DATE: datetime.date(2020, 3, 1), filters.END_DATE: datetime.date(2020, 5, 31)},
+    {filters.DISTANCE_MIN: 0.1, filters.DISTANCE_MAX: 0.4},
+    {filters.VELOCITY_MIN: 10, filters.HAZARDOUS: False},
+    {filters.DIAMETER_MAX: 1.5},
+    {filters.START_DATE: datetime.date(2020, 3, 1), filters.END_DATE: datetime.date(2020, 5, 31),
+     filters.DISTANCE_MIN: 0.05, filters.DISTANCE_MAX: 0.5, filters.VELOCITY_MIN: 5,
+     filters.VELOCITY_MAX: 25, filters.DIAMETER_MIN: 0.5, filters.DIAMETER_MAX: 1.5,
+     filters.HAZARDOUS: True},
+    {filters.DISTANCE_MAX: 0.02},
+    {filters.DISTANCE_MAX: 0.05, filters.VELOCITY_MIN: 20, filters.DIAMETER_MIN: 0.1},
+)
+
+
+def summarize(approaches):
+    """Describe approaches by their time, designation, distance, velocity and linked NEO."""
+    return [(approach.time, approach._designation, approach.distance, approach.velocity,
+             approach.neo.designation if approach.neo else None) for approach in approaches]
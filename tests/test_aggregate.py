@@ -0,0 +1,137 @@
+"""Check that aggregates summarize the approaches a query returns, with every backend.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_aggregate
+"""
+import datetime
+import io
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import aggregate
+import columnar
+import filters
+import main
+import sqlitedb
+import store
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+FILTER_SETS = (
+    {},
+    {filters.HAZARDOUS: True, filters.DISTANCE_MAX: 0.05},
+    {filters.START_DATE: datetime.date(2020, 3, 1), filters.END_DATE: datetime.date(2020, 5, 31),
+     filters.VELOCITY_MIN: 10},
+    {filters.DIAMETER_MIN: 0.5},
+    {filters.DATE: datetime.date(1999, 1, 1)},
+)
+
+
+def group_of(approach, group_by):
+    if group_by == 'year':
+        return approach.time.year
+    if group_by == 'month':
+        return approach.time.strftime('%Y-%m')
+    if group_by == 'neo':
+        return approach._designation
+    if group_by == 'hazardous':
+        return approach.neo.hazardous
+    return None
+
+
+class TestAggregate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.tmp = pathlib.Path(tempfile.mkdtemp())
+        store.convert(TEST_NEO_FILE, TEST_CAD_FILE, cls.tmp / 'neos.store')
+        cls.sqlite = sqlitedb.load(TEST_NEO_FILE, TEST_CAD_FILE, cls.tmp / 'neos.sqlite3')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite.close()
+        shutil.rmtree(cls.tmp)
+
+    def expected(self, args, group_by):
+        groups = {}
+        for approach in self.db.query(args):
+            groups.setdefault(group_of(approach, group_by), []).append(approach)
+        return {group: aggregate.Summary(
+                    len(approaches),
+                    min(approach.distance for approach in approaches),
+                    max(approach.distance for approach in approaches),
+                    sum(approach.distance for approach in approaches) / len(approaches),
+                    min(approach.velocity for approach in approaches),
+                    max(approach.velocity for approach in approaches),
+                    sum(approach.velocity for approach in approaches) / len(approaches))
+                for group, approaches in sorted(groups.items(),
+                                                key=lambda item: aggregate.sort_key(item[0]))}
+
+    def assertSummariesEqual(self, received, expected):
+        self.assertEqual(list(received), list(expected))
+        for group, summary in expected.items():
+            self.assertEqual(received[group].count, summary.count)
+            for field in aggregate.Summary._fields[1:]:
+                self.assertAlmostEqual(getattr(received[group], field), getattr(summary, field))
+
+    def databases(self):
+        yield 'eager', self.db
+        yield 'lazy', NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        _, neos, approaches = store.open_store(self.tmp / 'neos.store')
+        yield 'store', NEODatabase(neos, approaches)
+        yield 'sqlite', self.sqlite
+        if columnar.np is not None:
+            yield 'columnar', NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE),
+                                          columnar=True)
+            _, neos, approaches = store.open_store(self.tmp / 'neos.store')
+            yield 'columnar store', NEODatabase(neos, approaches, columnar=True)
+
+    def test_aggregates_match_the_queries(self):
+        for name, db in self.databases():
+            for group_by in (None,) + aggregate.GROUP_BY:
+                for args in FILTER_SETS:
+                    with self.subTest(database=name, group_by=group_by, args=args):
+                        self.assertSummariesEqual(db.aggregate(args, group_by),
+                                                  self.expected(args, group_by))
+
+    def test_no_approaches_are_built(self):
+        _, neos, approaches = store.open_store(self.tmp / 'neos.store')
+        db = NEODatabase(neos, approaches)
+        db.aggregate({filters.DISTANCE_MAX: 0.1}, 'month')
+        self.assertEqual(sum(1 for approach in db._approaches._approaches if approach is not None), 0)
+        lazy_db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        lazy_db.aggregate({filters.START_DATE: datetime.date(2020, 6, 1)}, 'neo')
+        self.assertEqual(sum(1 for approach in lazy_db._approaches._approaches
+                             if approach is not None), 0)
+
+    def test_unknown_grouping(self):
+        for name, db in self.databases():
+            with self.subTest(database=name), self.assertRaises(ValueError):
+                db.aggregate({}, 'week')
+
+    def test_aggregate_subcommand(self):
+        parser = main.make_parser()[0]
+        args = parser.parse_args(['aggregate', '--hazardous', '--group-by', 'hazardous'])
+        stdout = io.StringIO()
+        main.summarize(self.db, args, stdout)
+        header, row = stdout.getvalue().splitlines()
+        self.assertEqual(header.split(), ['hazardous'] + list(aggregate.Summary._fields))
+        expected = self.expected(vars(args), 'hazardous')[True]
+        self.assertEqual(row.split()[:2], ['True', str(expected.count)])
+
+        args = parser.parse_args(['aggregate', '--date', '1999-01-01'])
+        stdout = io.StringIO()
+        main.summarize(self.db, args, stdout)
+        self.assertIn("No matching close approaches", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
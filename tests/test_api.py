@@ -0,0 +1,160 @@
+"""Check that the HTTP/JSON API answers like the database does.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_api
+"""
+import asyncio
+import datetime
+import http.client
+import json
+import pathlib
+import threading
+import unittest
+import urllib.parse
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import api
+import filters
+from tests.common import FILTER_SETS
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+def query_string(args):
+    return urllib.parse.urlencode({key: str(value).lower() if isinstance(value, bool) else value
+                                   for key, value in args.items()})
+
+
+class TestAPI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        # A small batch size makes even small responses span several chunks.
+        cls.server = asyncio.run_coroutine_threadsafe(
+            api.APIServer(cls.db, batch_size=7).start('127.0.0.1', 0), cls.loop).result()
+        cls.port = cls.server.sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        async def stop():
+            cls.server.close()
+            await cls.server.wait_closed()
+            # Let the handlers of the connections the tests closed finish, too.
+            handlers = asyncio.all_tasks() - {asyncio.current_task()}
+            if handlers:
+                await asyncio.wait(handlers, timeout=5)
+
+        asyncio.run_coroutine_threadsafe(stop(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+
+    def setUp(self):
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        self.addCleanup(self.connection.close)
+
+    def get(self, path, method='GET'):
+        self.connection.request(method, path)
+        response = self.connection.getresponse()
+        return response, json.loads(response.read())
+
+    def expected(self, args, n=None):
+        return [api.approach_obj(approach)
+                for approach in filters.limit(self.db.query({**dict.fromkeys(api.PARAMETERS), **args}), n)]
+
+    def test_approaches_match_the_database(self):
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                response, body = self.get(f'/approaches?{query_string(args)}')
+                self.assertEqual(response.status, 200)
+                self.assertEqual(body, self.expected(args))
+
+    def test_approaches_are_chunked(self):
+        response, body = self.get('/approaches?date=2020-03-14')
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(body, self.expected({filters.DATE: datetime.date(2020, 3, 14)}))
+
+    def test_limit(self):
+        for n in (1, 7, 8, 100):
+            with self.subTest(limit=n):
+                self.assertEqual(self.get(f'/approaches?limit={n}')[1], self.expected({}, n))
+
+    def test_order(self):
+        _, body = self.get('/approaches?hazardous=true&sort_by=velocity&desc=true&top=5')
+        self.assertEqual(body, self.expected({filters.HAZARDOUS: True, filters.SORT_BY: 'velocity',
+                                              filters.DESC: True, filters.TOP: 5}))
+        self.assertEqual(len(body), 5)
+        self.assertEqual(body, sorted(body, key=lambda obj: obj['velocity_km_s'], reverse=True))
+
+    def test_count(self):
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                response, body = self.get(f'/count?{query_string(args)}')
+                self.assertEqual(response.status, 200)
+                self.assertEqual(body, {'count': len(self.expected(args))})
+        self.assertEqual(self.get('/count?hazardous=maybe')[0].status, 400)
+
+    def test_no_approaches(self):
+        self.assertEqual(self.get('/approaches?date=1900-01-01')[1], [])
+
+    def test_unknown_diameters_are_null(self):
+        _, body = self.get('/approaches?limit=50')
+        self.assertIn(None, [obj['neo']['diameter_km'] for obj in body])
+
+    def test_neo_by_designation_and_name(self):
+        neo = self.db.get_neo_by_name('Adonis')
+        for path in ('/neo/2101', '/neo/2101%20Adonis', '/neo?name=Adonis'):
+            with self.subTest(path=path):
+                response, body = self.get(path)
+                self.assertEqual(response.status, 200)
+                self.assertEqual((body['designation'], body['name'], body['potentially_hazardous']),
+                                 (neo.designation, neo.name, neo.hazardous))
+                self.assertEqual(len(body['approaches']), len(neo.approaches))
+
+    def test_missing_neo(self):
+        for path in ('/neo/not-a-designation', '/neo?name=Nope', '/neo?name='):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[0].status, 404)
+
+    def test_errors(self):
+        for path, status in (('/approaches?distance_max=far', 400),
+                             ('/approaches?date=2020-13-01', 400),
+                             ('/approaches?hazardous=maybe', 400),
+                             ('/approaches?distance_min=nan', 400),
+                             ('/approaches?limit=-1', 400),
+                             ('/approaches?sort_by=name', 400),
+                             ('/approaches?max_distance=0.1', 400),
+                             ('/neo', 400),
+                             ('/nowhere', 404)):
+            with self.subTest(path=path):
+                response, body = self.get(path)
+                self.assertEqual(response.status, status)
+                self.assertIn('error', body)
+        self.assertEqual(self.get('/neo/433', method='POST')[0].status, 405)
+
+    def test_connection_is_kept_alive(self):
+        self.get('/approaches?limit=3')
+        sock = self.connection.sock
+        self.get('/neo/2101')
+        self.assertIs(self.connection.sock, sock)
+
+    def test_parse_query(self):
+        args, n = api.parse_query('start_date=2020-01-01&distance_max=0.1&hazardous=false'
+                                  '&velocity_min=&limit=5')
+        self.assertEqual(args[filters.START_DATE], datetime.date(2020, 1, 1))
+        self.assertEqual(args[filters.DISTANCE_MAX], 0.1)
+        self.assertIs(args[filters.HAZARDOUS], False)
+        self.assertIsNone(args[filters.VELOCITY_MIN])
+        self.assertEqual(n, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Check that `query-batch` reads its filter sets and writes what `query` would.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_batch
+"""
+import contextlib
+import datetime
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import main
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestQueryBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        _, _, cls.query_parser = main.make_parser()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = pathlib.Path(tmp.name)
+
+    def write_batch(self, text):
+        path = self.tmp / 'batch.txt'
+        path.write_text(text)
+        return path
+
+    def run_query(self, argv):
+        args = self.query_parser.parse_args(argv)
+        main.query(self.db, args)
+        return args.outfile.read_text()
+
+    def test_flags_and_json_lines(self):
+        path = self.write_batch(
+            "# A comment, and a blank line.\n\n"
+            f"--start-date 2020-03-01 --end-date 2020-05-31 --hazardous --outfile {self.tmp / 'a.csv'}\n"
+            f'{{"distance_max": 0.1, "date": "2020-03-02", "outfile": "{self.tmp / "b.json"}"}}\n')
+        first, second = main.read_batch(path, self.query_parser)
+        self.assertEqual((first.start_date, first.hazardous, first.outfile),
+                         (datetime.date(2020, 3, 1), True, self.tmp / 'a.csv'))
+        self.assertEqual((second.date, second.distance_max, second.limit, second.outfile),
+                         (datetime.date(2020, 3, 2), 0.1, None, self.tmp / 'b.json'))
+        self.assertEqual(set(vars(second)), set(vars(first)))
+
+    def test_json_array(self):
+        path = self.write_batch(json.dumps([{'velocity_min': 10, 'limit': 5, 'outfile': 'a.csv'},
+                                            {'hazardous': False, 'sort_by': 'distance', 'top': 3,
+                                             'outfile': 'b.jsonl'}]))
+        first, second = main.read_batch(path, self.query_parser)
+        self.assertEqual((first.velocity_min, first.limit, first.sort_by), (10, 5, None))
+        self.assertEqual((second.hazardous, second.sort_by, second.desc, second.top),
+                         (False, 'distance', False, 3))
+
+    def test_invalid_filter_sets(self):
+        for text in ("--outfile a.csv\n--date 2020-13-01 --outfile b.csv\n",
+                     '--outfile a.csv\n{"dat": "2020-01-01", "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"date": "January 1st", "outfile": "b.csv"}\n',
+                     "--outfile a.csv\n--date 2020-01-01\n",
+                     "--outfile a.csv\n--outfile b.txt\n",
+                     '--outfile a.csv\n[1, 2]\n',
+                     "--outfile a.csv\n--count --outfile b.csv\n",
+                     '--outfile a.csv\n{"sort_by": "name", "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"distance_max": "abc", "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"velocity_min": NaN, "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"limit": "5", "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"top": -3, "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"limit": 2.5, "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"hazardous": "no", "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"desc": 1, "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"date": 20200101, "outfile": "b.csv"}\n',
+                     '--outfile a.csv\n{"outfile": 5}\n',
+                     "--outfile a.csv\n--max-distance nan --outfile b.csv\n",
+                     "--outfile a.csv\n--limit -1 --outfile b.csv\n"):
+            with self.subTest(text=text), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaisesRegex(ValueError, 'line 2'):
+                    main.read_batch(self.write_batch(text), self.query_parser)
+
+    def test_each_filter_set_gets_the_output_of_query(self):
+        commands = [['--start-date', '2020-03-01', '--end-date', '2020-05-31', '--hazardous'],
+                    ['--max-distance', '0.1', '--limit', '20'],
+                    ['--date', '2020-03-02'],
+                    ['--min-velocity', '10', '--max-diameter', '1.5'],
+                    ['--hazardous', '--sort-by', 'distance', '--top', '10'],
+                    ['--sort-by', 'diameter', '--desc']]
+        suffixes = ['.csv', '.json', '.jsonl', '.csv', '.json', '.csv']
+        lines = [' '.join(argv + ['--outfile', str(self.tmp / f'batch{i}{suffix}')])
+                 for i, (argv, suffix) in enumerate(zip(commands, suffixes))]
+        batch = main.read_batch(self.write_batch('\n'.join(lines)), self.query_parser)
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.query_batch(self.db, batch)
+
+        for i, (argv, suffix) in enumerate(zip(commands, suffixes)):
+            with self.subTest(argv=argv):
+                expected = self.run_query(argv + ['--outfile', str(self.tmp / f'query{i}{suffix}')])
+                self.assertEqual((self.tmp / f'batch{i}{suffix}').read_text(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
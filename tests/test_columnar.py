@@ -0,0 +1,68 @@
+"""Check that the NumPy columnar backend returns exactly what the object path does.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_columnar
+
+These tests are skipped if NumPy isn't installed.
+"""
+import datetime
+import pathlib
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import columnar
+import filters
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+FILTER_SETS = (
+    {},
+    {filters.DATE: datetime.date(2020, 3, 2)},
+    {filters.START_DATE: datetime.date(2020, 3, 1), filters.END_DATE: datetime.date(2020, 5, 31)},
+    {filters.END_DATE: datetime.date(2020, 1, 1)},
+    {filters.DISTANCE_MIN: 0.1, filters.DISTANCE_MAX: 0.4},
+    {filters.VELOCITY_MIN: 10, filters.HAZARDOUS: False},
+    {filters.DIAMETER_MAX: 1.5},
+    {filters.START_DATE: datetime.date(2020, 3, 1), filters.END_DATE: datetime.date(2020, 5, 31),
+     filters.DISTANCE_MIN: 0.05, filters.DISTANCE_MAX: 0.5, filters.VELOCITY_MIN: 5,
+     filters.VELOCITY_MAX: 25, filters.DIAMETER_MIN: 0.5, filters.DIAMETER_MAX: 1.5,
+     filters.HAZARDOUS: True},
+)
+
+
+@unittest.skipIf(columnar.np is None, "NumPy isn't installed.")
+class TestColumnarQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.columnar_db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE),
+                                      columnar=True)
+
+    def test_columns_have_a_row_per_approach(self):
+        self.assertEqual(len(self.columnar_db._columns), len(self.columnar_db._approaches))
+
+    def test_queries_match_the_object_path(self):
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                expected = [approach.time_str + approach.neo.designation
+                            for approach in self.db.query(args)]
+                received = [approach.time_str + approach.neo.designation
+                            for approach in self.columnar_db.query(args)]
+                self.assertEqual(expected, received)
+
+    def test_columns_follow_added_approaches(self):
+        neos = load_neos(TEST_NEO_FILE)
+        approaches = load_approaches(TEST_CAD_FILE)
+        db = NEODatabase(neos, approaches[:100], columnar=True)
+        db.add_approaches(approaches[100:])
+        self.assertEqual(len(db._columns), len(approaches))
+        self.assertEqual(len(list(db.query({}))), len(approaches))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,13 +10,20 @@ To run these tests from the project root, run:
 
 These tests should pass when Task 2 is complete.
 """
+import contextlib
+import datetime
+import io
 import pathlib
 import math
+import sys
+import threading
 import unittest
 
 
-from extract import load_neos, load_approaches
+from extract import load_neos, load_approaches, iter_approaches
 from database import NEODatabase
+from helpers import bt_floats, lt_floats
+import filters
 
 
 # Paths to the test data files.
@@ -25,6 +32,16 @@ TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
 TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
 
 
+def make_args(**kwargs):
+    """Build a dictionary of filters shaped like the parsed `query` arguments."""
+    args = dict.fromkeys((filters.DATE, filters.START_DATE, filters.END_DATE,
+                          filters.DISTANCE_MIN, filters.DISTANCE_MAX,
+                          filters.VELOCITY_MIN, filters.VELOCITY_MAX,
+                          filters.DIAMETER_MIN, filters.DIAMETER_MAX, filters.HAZARDOUS))
+    args.update(kwargs)
+    return args
+
+
 class TestDatabase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -114,6 +131,454 @@ class TestDatabase(unittest.TestCase):
         nonexistent = self.db.get_neo_by_name('not-real-name')
         self.assertIsNone(nonexistent)
 
+    def test_get_neo_by_alias(self):
+        toro = self.db.get_neo_by_designation('1685')
+        self.assertIsNotNone(toro)
+        self.assertIs(self.db.get_neo_by_designation('1685 Toro'), toro)
+        self.assertIs(self.db.get_neo_by_designation('1685 (Toro)'), toro)
+        self.assertIs(self.db.get_neo_by_name('Toro'), toro)
+        self.assertIs(self.db.get_neo_by_name('1685 Toro'), toro)
+
+    def test_get_neo_by_name_empty(self):
+        self.assertIsNone(self.db.get_neo_by_name(''))
+        self.assertIsNone(self.db.get_neo_by_name(None))
+
+    def test_database_keeps_approaches_sorted_by_time(self):
+        times = [approach.time for approach in self.db._approaches]
+        self.assertEqual(times, sorted(times))
+
+    def test_query_on_a_date_only_checks_that_day(self):
+        date = datetime.date(2020, 3, 2)
+        on_date = [approach for approach in self.approaches if approach.time.date() == date]
+        self.assertGreater(len(on_date), 0)
+
+        lo, hi = self.db._time_slice(make_args(date=date))
+        self.assertEqual(hi - lo, len(on_date))
+        self.assertEqual(set(self.db.query(make_args(date=date))), set(on_date))
+
+    def test_query_date_range_matches_full_scan(self):
+        args = make_args(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 5, 31),
+                         distance_max=0.1)
+        checks = filters.compile_filters(args)
+        expected = set(approach for approach in self.approaches
+                       if all(check(approach) for check in checks))
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(set(self.db.query(args)), expected)
+
+    def test_query_without_filters_yields_everything(self):
+        self.assertEqual(set(self.db.query(make_args())), set(self.approaches))
+
+    def test_min_and_max_time(self):
+        self.assertEqual(self.db.min_time, min(approach.time for approach in self.approaches))
+        self.assertEqual(self.db.max_time, max(approach.time for approach in self.approaches))
+
+    def test_add_approaches_keeps_min_and_max_time_correct(self):
+        neos = load_neos(TEST_NEO_FILE)
+        approaches = sorted(load_approaches(TEST_CAD_FILE), key=lambda approach: approach.time)
+        first, middle, last = approaches[0], approaches[1:-1], approaches[-1]
+
+        db = NEODatabase(neos, middle)
+        self.assertEqual(db.min_time, middle[0].time)
+        db.add_approaches([last, first])
+        self.assertEqual(db.min_time, first.time)
+        self.assertEqual(db.max_time, last.time)
+        self.assertIsNotNone(first.neo)
+        self.assertIn(last, last.neo.approaches)
+
+    def test_database_consumes_a_stream_of_approaches(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), iter_approaches(TEST_CAD_FILE))
+        self.assertEqual(len(db._approaches), len(self.approaches))
+        self.assertEqual(db.min_time, self.db.min_time)
+        self.assertEqual(len(db.get_neo_by_name('Adonis').approaches),
+                         len(self.db.get_neo_by_name('Adonis').approaches))
+
+    def test_empty_database_has_no_results(self):
+        db = NEODatabase([], [])
+        self.assertIsNone(db.min_time)
+        self.assertEqual(list(db.query(make_args())), [])
+
+
+class TestLazyDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def setUp(self):
+        self.lazy_db = NEODatabase(load_neos(TEST_NEO_FILE),
+                                   load_approaches(TEST_CAD_FILE, lazy=True))
+
+    def built(self):
+        return sum(1 for approach in self.lazy_db._approaches._approaches if approach is not None)
+
+    def test_construction_builds_no_approaches(self):
+        self.assertEqual(self.built(), 0)
+        self.assertEqual(len(self.lazy_db._times), 4700)
+
+    def test_queries_match_the_eager_database(self):
+        for args in (make_args(), make_args(date=datetime.date(2020, 3, 2)),
+                     make_args(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 5, 31),
+                               distance_max=0.1, hazardous=False),
+                     make_args(diameter_min=0.5)):
+            with self.subTest(args=args):
+                expected = [(approach.time, approach.neo.designation) for approach in self.db.query(args)]
+                received = [(approach.time, approach.neo.designation)
+                            for approach in self.lazy_db.query(args)]
+                self.assertEqual(expected, received)
+
+    def test_limited_query_only_builds_what_it_returns(self):
+        results = list(filters.limit(self.lazy_db.query(make_args()), 5))
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.built(), 5)
+        self.assertTrue(all(approach.neo is not None for approach in results))
+
+    def test_min_and_max_time(self):
+        self.assertEqual(self.lazy_db.min_time, self.db.min_time)
+        self.assertEqual(self.lazy_db.max_time, self.db.max_time)
+
+    def test_fetching_an_neo_attaches_its_approaches(self):
+        lazy_neo = self.lazy_db.get_neo_by_name('Adonis')
+        neo = self.db.get_neo_by_name('Adonis')
+        self.assertEqual(sorted(approach.time for approach in lazy_neo.approaches),
+                         sorted(approach.time for approach in neo.approaches))
+        # Fetching it again doesn't attach them twice.
+        self.assertEqual(len(self.lazy_db.get_neo_by_designation('2101').approaches),
+                         len(neo.approaches))
+
+    def test_adding_approaches_builds_everything(self):
+        self.lazy_db.get_neo_by_name('Adonis')
+        self.lazy_db.add_approaches([])
+        self.assertIsInstance(self.lazy_db._approaches, list)
+        approaches = set()
+        for neo in self.lazy_db._neos:
+            approaches.update(neo.approaches)
+        self.assertEqual(len(approaches), 4700)
+
+    def test_concurrent_fetches_get_every_approach(self):
+        neo = max(self.db._neos, key=lambda neo: len(neo.approaches))
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for _ in range(10):
+            db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+            results = [None] * 8
+            def run(i):
+                results[i] = [id(approach) for approach in
+                              db.get_neo_by_designation(neo.designation).approaches]
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for received in results:
+                self.assertEqual(len(received), len(neo.approaches))
+                self.assertEqual(received, results[0])
+
+
+
+class TestQueryCache(unittest.TestCase):
+    QUERIES = (make_args(), make_args(date=datetime.date(2020, 3, 2)),
+               make_args(distance_max=0.1, hazardous=False),
+               make_args(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 5, 31),
+                         velocity_min=10, diameter_max=1.5))
+
+    @classmethod
+    def setUpClass(cls):
+        cls.uncached = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE),
+                                   cache_entries=0)
+
+    def setUp(self):
+        self.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+
+    def summary(self, results):
+        return [(approach.time, approach._designation) for approach in results]
+
+    def test_repeated_queries_hit_the_cache(self):
+        for args in self.QUERIES:
+            with self.subTest(args=args):
+                expected = self.summary(self.uncached.query(args))
+                self.assertEqual(self.summary(self.db.query(args)), expected)
+                self.assertEqual(self.summary(self.db.query(args)), expected)
+        info = self.db.cache_info()
+        self.assertEqual((info.hits, info.misses, info.entries), (4, 4, 4))
+
+    def test_limit_and_outfile_share_an_entry(self):
+        list(self.db.query(make_args(distance_max=0.1, limit=5)))
+        list(self.db.query({filters.DISTANCE_MAX: 0.1, 'outfile': 'results.csv'}))
+        self.assertEqual(self.db.cache_info()[:3], (1, 1, 1))
+
+    def test_partly_read_queries_resume(self):
+        args = make_args(distance_max=0.1, hazardous=False)
+        expected = self.summary(self.uncached.query(args))
+        for n in (1, 10, 50):
+            self.assertEqual(self.summary(filters.limit(self.db.query(args), n)), expected[:n])
+        self.assertEqual(self.summary(self.db.query(args)), expected)
+        self.assertEqual(self.summary(self.db.query(args)), expected)
+
+    def test_interleaved_queries(self):
+        args = make_args(velocity_min=10)
+        expected = self.summary(self.uncached.query(args))
+        first, second = self.db.query(args), self.db.query(args)
+        received = [], []
+        for a, b in zip(first, second):
+            received[0].append(a)
+            received[1].append(b)
+        self.assertEqual(self.summary(received[0]), expected)
+        self.assertEqual(self.summary(received[1]), expected)
+        self.assertEqual(self.summary(self.db.query(args)), expected)
+
+    def test_concurrent_queries_get_every_match(self):
+        args = make_args(velocity_min=5)
+        expected = self.summary(self.uncached.query(args))
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for _ in range(5):
+            db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+            results = [None] * 8
+            def run(i):
+                results[i] = self.summary(db.query(args))
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for received in results:
+                self.assertEqual(received, expected)
+            self.assertEqual(self.summary(db.query(args)), expected)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE), cache_entries=2)
+        for args in self.QUERIES[:3]:
+            list(db.query(args))
+        list(db.query(self.QUERIES[2]))
+        self.assertEqual(db.cache_info()[:3], (1, 3, 2))
+        list(db.query(self.QUERIES[0]))
+        self.assertEqual(db.cache_info()[:3], (1, 4, 2))
+
+    def test_entries_are_evicted_by_size(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE),
+                         cache_bytes=4 * 4700)
+        list(db.query(make_args()))
+        self.assertEqual(db.cache_info().bytes, 4 * 4700)
+        list(db.query(make_args(velocity_min=10)))
+        self.assertLessEqual(db.cache_info().bytes, 4 * 4700)
+        self.assertEqual(db.cache_info().entries, 1)
+
+    def test_adding_approaches_clears_the_cache(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), [])
+        args = make_args(date=datetime.date(2020, 3, 2))
+        self.assertEqual(list(db.query(args)), [])
+        db.add_approaches(load_approaches(TEST_CAD_FILE))
+        self.assertEqual(self.summary(db.query(args)), self.summary(self.uncached.query(args)))
+        self.assertEqual(db.cache_info().hits, 0)
+
+
+
+class TestQueryBatch(unittest.TestCase):
+    QUERIES = TestQueryCache.QUERIES + (
+        make_args(date=datetime.date(2020, 3, 2), distance_max=0.1),
+        make_args(start_date=datetime.date(2020, 5, 1), diameter_min=0.5),
+        make_args(end_date=datetime.date(2020, 2, 1), hazardous=True),
+        make_args(date=datetime.date(1999, 1, 1)),
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def summary(self, results):
+        return [(approach.time, approach._designation, approach.neo.designation)
+                for approach in results]
+
+    def test_batch_matches_separate_queries(self):
+        for db in (self.db, NEODatabase(load_neos(TEST_NEO_FILE),
+                                        load_approaches(TEST_CAD_FILE, lazy=True))):
+            for args, results in zip(self.QUERIES, db.query_batch(self.QUERIES)):
+                with self.subTest(args=args):
+                    self.assertEqual(self.summary(results), self.summary(self.db.query(args)))
+
+    def test_repeated_queries_share_their_results(self):
+        args = make_args(velocity_min=10)
+        first, second = self.db.query_batch([args, {**args, 'outfile': 'fast.csv'}])
+        expected = self.summary(self.db.query(args))
+        self.assertEqual(self.summary(first), expected)
+        self.assertEqual(self.summary(second), expected)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.db.query_batch([]), [])
+
+
+
+class TestOrderedQueries(unittest.TestCase):
+    ORDERS = [(attribute, desc, n) for attribute in filters.SORT_ATTRIBUTES
+              for desc in (False, True) for n in (None, 1, 25)]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def expected(self, args, attribute, desc, n):
+        results = list(self.db.query(args))
+        if attribute == 'time':
+            ordered = results[::-1] if desc else results
+        else:
+            ordered = filters.top(results, None, attribute, desc)
+        return ordered[:n]
+
+    def test_orders_match_a_full_sort(self):
+        lazy_db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        args = make_args(start_date=datetime.date(2020, 3, 1), distance_max=0.2)
+        for attribute, desc, n in self.ORDERS:
+            order = {filters.SORT_BY: attribute, filters.DESC: desc, filters.TOP: n}
+            with self.subTest(order=order):
+                expected = self.expected(args, attribute, desc, n)
+                self.assertEqual(list(self.db.query({**args, **order})), expected)
+                self.assertEqual([(approach.time, approach._designation)
+                                  for approach in lazy_db.query({**args, **order})],
+                                 [(approach.time, approach._designation) for approach in expected])
+
+    def test_top_without_an_order_takes_the_first_matches(self):
+        self.assertEqual(list(self.db.query(make_args(top=5))), list(self.db.query(make_args()))[:5])
+
+    def test_orders_share_cached_matches(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        args = make_args(velocity_min=10)
+        list(db.query(args))
+        list(db.query({**args, filters.SORT_BY: 'distance', filters.TOP: 3}))
+        list(db.query({**args, filters.SORT_BY: 'time', filters.DESC: True}))
+        self.assertEqual(db.cache_info()[:3], (2, 1, 1))
+
+    def test_batches_are_ordered(self):
+        queries = [make_args(hazardous=True, sort_by='velocity', desc=True, top=3),
+                   make_args(hazardous=True)]
+        first, second = self.db.query_batch(queries)
+        self.assertEqual(list(first), self.expected(make_args(hazardous=True), 'velocity', True, 3))
+        self.assertEqual(list(second), list(self.db.query(make_args(hazardous=True))))
+
+
+
+class TestCount(unittest.TestCase):
+    QUERIES = TestQueryBatch.QUERIES + (
+        make_args(hazardous=True), make_args(hazardous=False),
+        make_args(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 5, 31),
+                  hazardous=True),
+        make_args(date=datetime.date(2020, 3, 2), hazardous=False),
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def test_counts_match_the_queries(self):
+        lazy_db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        for args in self.QUERIES:
+            expected = sum(1 for _ in self.db.query(args))
+            with self.subTest(args=args):
+                self.assertEqual(self.db.count(args), expected)
+                self.assertEqual(lazy_db.count(args), expected)
+
+    def test_indexed_filters_touch_no_approaches(self):
+        lazy_db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        for args in (make_args(), make_args(date=datetime.date(2020, 3, 2)),
+                     make_args(start_date=datetime.date(2020, 3, 1), hazardous=True)):
+            lazy_db.count(args)
+        self.assertEqual(sum(1 for approach in lazy_db._approaches._approaches
+                             if approach is not None), 0)
+        self.assertEqual(lazy_db.cache_info().misses, 0)
+
+    def test_complete_cache_entries_are_counted(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        args = make_args(velocity_min=10)
+        expected = len(list(db.query(args)))
+        self.assertEqual(db.count(args), expected)
+        self.assertEqual(db.cache_info()[:2], (1, 1))
+        # A count that scans leaves a complete entry behind.
+        self.assertEqual(db.count(make_args(distance_max=0.1)), db.count(make_args(distance_max=0.1)))
+        self.assertEqual(db.cache_info()[:2], (2, 2))
+
+    def test_adding_approaches_updates_the_counts(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), [])
+        self.assertEqual(db.count(make_args(hazardous=True)), 0)
+        db.add_approaches(load_approaches(TEST_CAD_FILE))
+        self.assertEqual(db.count(make_args(hazardous=True)), self.db.count(make_args(hazardous=True)))
+
+    def test_counts_match_the_queries_with_unknown_neos(self):
+        # Leave out every third NEO, so that many approaches have no NEO to link to.
+        neos = load_neos(TEST_NEO_FILE)[::3]
+        with contextlib.redirect_stdout(io.StringIO()):
+            databases = (NEODatabase(neos, load_approaches(TEST_CAD_FILE)),
+                         NEODatabase(neos, load_approaches(TEST_CAD_FILE, lazy=True)))
+        self.assertTrue(any(approach.neo is None for approach in databases[0]._approaches))
+        for db in databases:
+            for args in self.QUERIES + (make_args(diameter_max=float('inf')),):
+                with self.subTest(args=args, lazy=db._lazy):
+                    self.assertEqual(db.count(args), len(list(db.query(args))))
+
+
+
+class TestRangeIndexes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE),
+                             range_indexes=True)
+        cls.approaches = list(cls.db._approaches)
+
+    def setUp(self):
+        self.lazy_db = NEODatabase(load_neos(TEST_NEO_FILE),
+                                   load_approaches(TEST_CAD_FILE, lazy=True), range_indexes=True)
+
+    def built(self):
+        return sum(1 for approach in self.lazy_db._approaches._approaches if approach is not None)
+
+    def expected(self, args):
+        """Scan every approach with the tolerant comparisons themselves."""
+        def within(value, low, high):
+            return ((low is None or bt_floats(value, low))
+                    and (high is None or lt_floats(value, high)))
+        return [approach for approach in self.approaches
+                if within(approach.distance, args[filters.DISTANCE_MIN], args[filters.DISTANCE_MAX])
+                and within(approach.velocity, args[filters.VELOCITY_MIN], args[filters.VELOCITY_MAX])
+                and (args[filters.HAZARDOUS] is None
+                     or approach.neo.hazardous == args[filters.HAZARDOUS])]
+
+    def test_selective_queries_match_a_scan(self):
+        # Bounds at existing values, and just beyond the tolerance around them.
+        distance = sorted(approach.distance for approach in self.approaches)[200]
+        velocity = sorted(approach.velocity for approach in self.approaches)[-200]
+        for args in (make_args(distance_max=distance), make_args(distance_max=distance + 0.01),
+                     make_args(distance_max=distance * 1.02 + 0.01),
+                     make_args(velocity_min=velocity), make_args(velocity_min=velocity - 0.01),
+                     make_args(velocity_min=30, velocity_max=31),
+                     make_args(distance_min=0.3, distance_max=0.2),
+                     make_args(distance_max=0.05, velocity_min=20),
+                     make_args(distance_max=0.05, velocity_min=20, hazardous=False),
+                     make_args(distance_max=0.4, velocity_max=60)):
+            expected = self.expected(args)
+            for db in (self.db, self.lazy_db):
+                with self.subTest(args=args, lazy=db is self.lazy_db):
+                    received = list(db.query(args))
+                    self.assertEqual([(approach.time, approach._designation) for approach in received],
+                                     [(approach.time, approach._designation) for approach in expected])
+
+    def test_selective_queries_only_build_what_they_return(self):
+        self.assertEqual(self.built(), 0)
+        results = list(self.lazy_db.query(make_args(distance_max=0.02)))
+        self.assertTrue(results)
+        self.assertEqual(self.built(), len(results))
+
+    def test_indexes_are_only_built_when_asked_for(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, lazy=True))
+        args = make_args(distance_max=0.02)
+        self.assertEqual(len(list(db.query(args))), len(self.expected(args)))
+        self.assertEqual(db._range_indexes, {})
+
+    def test_adding_approaches_rebuilds_the_indexes(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), [], range_indexes=True)
+        args = make_args(distance_max=0.02)
+        self.assertEqual(list(db.query(args)), [])
+        db.add_approaches(load_approaches(TEST_CAD_FILE))
+        self.assertEqual(len(list(db.query(args))), len(self.expected(args)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -12,11 +12,13 @@ These tests should pass when Task 2 is complete.
 """
 import collections.abc
 import datetime
+import json
 import pathlib
 import math
+import tempfile
 import unittest
 
-from extract import load_neos, load_approaches
+from extract import load_neos, load_approaches, iter_approaches, CadReader
 from models import NearEarthObject, CloseApproach
 
 
@@ -68,6 +70,38 @@ class TestLoadNEOs(unittest.TestCase):
         self.assertTrue(math.isnan(neo.diameter))
         self.assertEqual(neo.hazardous, True)
 
+    def test_neos_have_no_extra_fields_by_default(self):
+        neo = self.get_first_neo_or_none()
+        self.assertIsNone(neo.extra)
+
+    def test_neos_with_extra_columns(self):
+        neos = {neo.designation: neo for neo in load_neos(TEST_NEO_FILE, extra_columns=('full_name', 'H'))}
+        self.assertEqual(neos['2101'].extra, {'full_name': '  2101 Adonis (1936 CA)', 'H': '18.8'})
+
+    def test_blank_lines_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / 'neos.csv'
+            lines = TEST_NEO_FILE.read_text().splitlines()
+            path.write_text('\n'.join(lines[:3] + [''] + lines[3:] + ['', '']) + '\n')
+            self.assertEqual([neo.designation for neo in load_neos(path)],
+                             [neo.designation for neo in self.neos])
+
+    def test_missing_columns_are_named(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / 'neos.csv'
+            path.write_text(TEST_NEO_FILE.read_text().replace('pha', 'phx', 1))
+            with self.assertRaisesRegex(ValueError, '`pha` column'):
+                load_neos(path)
+            with self.assertRaisesRegex(ValueError, '`spectrum` column'):
+                load_neos(TEST_NEO_FILE, extra_columns=('spectrum',))
+            path.write_text('')
+            with self.assertRaisesRegex(ValueError, 'no header'):
+                load_neos(path)
+
+    def test_neos_are_slotted(self):
+        neo = self.get_first_neo_or_none()
+        self.assertFalse(hasattr(neo, '__dict__'))
+
     def test_adonis_is_potentially_hazardous(self):
         self.assertIn('2101', self.neos_by_designation)
         neo = self.neos_by_designation['2101']
@@ -112,11 +146,58 @@ class TestLoadApproaches(unittest.TestCase):
         self.assertIsNotNone(approach)
         self.assertIsInstance(approach.distance, float)
 
+    def test_approaches_are_slotted(self):
+        approach = self.get_first_approach_or_none()
+        self.assertFalse(hasattr(approach, '__dict__'))
+
     def test_approach_velocity_is_float(self):
         approach = self.get_first_approach_or_none()
         self.assertIsNotNone(approach)
         self.assertIsInstance(approach.velocity, float)
 
 
+class TestLoadApproachesLazily(TestLoadApproaches):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE, lazy=True)
+
+
+class TestStreamingCadReader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_CAD_FILE) as file:
+            cls.document = json.load(file)
+
+    def test_reader_maps_fields(self):
+        reader = CadReader(TEST_CAD_FILE)
+        self.assertEqual(reader.fields, self.document['fields'])
+        self.assertEqual(reader.field_to_index['cd'], self.document['fields'].index('cd'))
+
+    def test_reader_yields_every_row(self):
+        self.assertEqual(list(CadReader(TEST_CAD_FILE)), self.document['data'])
+
+    def test_reader_handles_rows_split_across_chunks(self):
+        # Tiny chunks split strings and numbers at every possible position.
+        reader = CadReader(TEST_CAD_FILE, chunk_size=3)
+        self.assertEqual(list(reader), self.document['data'])
+        self.assertEqual(reader.meta['count'], self.document['count'])
+
+    def test_reader_finds_fields_before_data(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / 'cad.json'
+            path.write_text(json.dumps({'fields': ['cd', 'des'], 'data': [['2020-Jan-01 00:00', '433'], ['2020-Jan-02 00:00', '2020 AB']]}))
+            reader = CadReader(path)
+            self.assertEqual(reader.fields, ['cd', 'des'])
+            self.assertEqual(list(reader)[1], ['2020-Jan-02 00:00', '2020 AB'])
+
+    def test_iter_approaches_is_a_stream(self):
+        approaches = iter_approaches(TEST_CAD_FILE)
+        self.assertIsInstance(approaches, collections.abc.Iterator)
+        approach = next(approaches)
+        self.assertIsInstance(approach, CloseApproach)
+        self.assertEqual(approach._designation, self.document['data'][0][0])
+        self.assertEqual(1 + sum(1 for _ in approaches), len(self.document['data']))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,168 @@
+"""Check that compiled filters agree with `is_valid_close_approach`.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_filters
+"""
+import datetime
+import math
+import pathlib
+import random
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+from filters import clean_args_dict, compile_filters, is_valid_close_approach
+from models import CloseApproach
+from helpers import bt_floats, lt_floats, bt_floats_bound, lt_floats_bound
+import filters
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestCompileFilters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), approaches)
+        # `is_valid_close_approach` compares unset bounds against infinities and
+        # the data's first and last dates, so keep to approaches where that is a no-op.
+        cls.min_date, cls.max_date = cls.db.min_time.date(), cls.db.max_time.date()
+        cls.approaches = [approach for approach in approaches
+                          if not math.isnan(approach.neo.diameter)
+                          and cls.min_date < approach.time.date() < cls.max_date]
+
+    def assertMatchesReference(self, **kwargs):
+        args = dict.fromkeys((filters.DATE, filters.START_DATE, filters.END_DATE,
+                              filters.DISTANCE_MIN, filters.DISTANCE_MAX,
+                              filters.VELOCITY_MIN, filters.VELOCITY_MAX,
+                              filters.DIAMETER_MIN, filters.DIAMETER_MAX, filters.HAZARDOUS))
+        args.update(kwargs)
+        clean = clean_args_dict(args, self.min_date, self.max_date)
+        checks = compile_filters(args)
+
+        expected = [approach for approach in self.approaches
+                    if is_valid_close_approach(approach, clean)]
+        received = [approach for approach in self.approaches
+                    if all(check(approach) for check in checks)]
+        self.assertEqual(expected, received)
+        return checks
+
+    def test_no_filters_compile_to_nothing(self):
+        self.assertEqual(self.assertMatchesReference(), [])
+
+    def test_paired_bounds_compile_to_one_predicate(self):
+        checks = self.assertMatchesReference(distance_min=0.1, distance_max=0.4)
+        self.assertEqual(len(checks), 1)
+
+    def test_single_bounds(self):
+        self.assertMatchesReference(velocity_min=10)
+        self.assertMatchesReference(velocity_max='20')
+        self.assertMatchesReference(diameter_max=1.5)
+
+    def test_dates(self):
+        self.assertMatchesReference(date=datetime.date(2020, 3, 2))
+        self.assertMatchesReference(start_date=datetime.date(2020, 3, 1),
+                                    end_date=datetime.date(2020, 5, 31))
+        self.assertMatchesReference(end_date=datetime.date(2020, 6, 30))
+
+    def test_hazardous(self):
+        self.assertMatchesReference(hazardous=True, distance_max=0.3)
+        self.assertMatchesReference(hazardous=False)
+
+    def test_skip(self):
+        checks = compile_filters({filters.DATE: datetime.date(2020, 3, 2),
+                                  filters.HAZARDOUS: True}, skip=(filters.DATE,))
+        self.assertEqual(len(checks), 1)
+
+    def test_all_ranges_together(self):
+        self.assertMatchesReference(distance_min=0.05, distance_max=0.5, diameter_min=0.5,
+                                    diameter_max=1.5, velocity_min=5, velocity_max=25)
+
+    def test_infinite_bounds(self):
+        self.assertMatchesReference(distance_min=float('-inf'), velocity_max=float('inf'))
+
+    def test_approaches_of_unknown_neos(self):
+        # They aren't hazardous and have no diameter, so no diameter bound matches them.
+        approach = CloseApproach('unknown', '2020-Mar-02 12:00', 0.1, 10)
+        def matches(**kwargs):
+            return all(check(approach) for check in compile_filters(kwargs))
+        self.assertTrue(matches(hazardous=False))
+        self.assertFalse(matches(hazardous=True))
+        self.assertFalse(matches(diameter_min=0))
+        self.assertFalse(matches(diameter_max=float('inf')))
+        self.assertTrue(matches(distance_max=0.2, velocity_min=5))
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_unset_filters_and_other_options_share_a_key(self):
+        key = filters.cache_key({filters.DISTANCE_MAX: 0.1})
+        self.assertEqual(filters.cache_key({filters.DISTANCE_MAX: 0.1, filters.DATE: None,
+                                            'limit': 5, 'outfile': 'results.csv'}), key)
+        self.assertEqual(filters.cache_key({filters.DISTANCE_MAX: 0.1,
+                                            filters.DISTANCE_MIN: float('-inf')}), key)
+
+    def test_different_filters_have_different_keys(self):
+        keys = {filters.cache_key(args) for args in (
+            {}, {filters.DISTANCE_MAX: 0.1}, {filters.DISTANCE_MIN: 0.1},
+            {filters.HAZARDOUS: False}, {filters.HAZARDOUS: True},
+            {filters.START_DATE: datetime.date(2020, 1, 1)},
+            {filters.END_DATE: datetime.date(2020, 1, 1)},
+            {filters.DIAMETER_MIN: float('-inf')})}
+        self.assertEqual(len(keys), 8)
+
+
+class TestTop(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.approaches = list(db.query({}))
+
+    def value(self, approach, attribute):
+        return approach.neo.diameter if attribute == 'diameter' else getattr(approach, attribute)
+
+    def test_top_matches_a_full_sort(self):
+        for attribute in filters.SORT_ATTRIBUTES:
+            for desc in (False, True):
+                for n in (None, 1, 10, 5000):
+                    with self.subTest(attribute=attribute, desc=desc, n=n):
+                        known = [approach for approach in self.approaches
+                                 if self.value(approach, attribute) == self.value(approach, attribute)]
+                        unknown = [approach for approach in self.approaches
+                                   if self.value(approach, attribute) != self.value(approach, attribute)]
+                        expected = sorted(known, key=lambda approach: self.value(approach, attribute),
+                                          reverse=desc) + unknown
+                        received = filters.top(iter(self.approaches), n, attribute, desc)
+                        self.assertEqual(received, expected[:n])
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(ValueError):
+            filters.top(self.approaches, 5, 'name')
+
+
+class TestFloatBounds(unittest.TestCase):
+    def test_bounds_match_tolerant_comparisons(self):
+        rng = random.Random(0)
+        for f2 in [0.0, 0.1, 0.4, -3.5, 25.0, 1e6] + [rng.uniform(-50, 50) for _ in range(50)]:
+            low, high = bt_floats_bound(f2), lt_floats_bound(f2)
+            self.assertTrue(bt_floats(low, f2))
+            self.assertFalse(bt_floats(math.nextafter(low, -math.inf), f2))
+            self.assertTrue(lt_floats(high, f2))
+            self.assertFalse(lt_floats(math.nextafter(high, math.inf), f2))
+            for _ in range(50):
+                f1 = rng.uniform(f2 - 2, f2 + 2)
+                self.assertEqual(bt_floats(f1, f2), f1 >= low)
+                self.assertEqual(lt_floats(f1, f2), f1 <= high)
+
+    def test_bounds_reject_non_finite_values(self):
+        with self.assertRaises(ValueError):
+            bt_floats_bound(float('inf'))
+        with self.assertRaises(ValueError):
+            lt_floats_bound(float('nan'))
+
+
+if __name__ == '__main__':
+    unittest.main()
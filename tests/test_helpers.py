@@ -0,0 +1,42 @@
+"""Check the conversions and comparisons in `helpers`.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_helpers
+"""
+import datetime
+import random
+import unittest
+
+from helpers import cd_to_datetime, cd_to_sort_key, datetime_to_str
+
+
+class TestCalendarDates(unittest.TestCase):
+    def test_fast_path_matches_strptime(self):
+        rng = random.Random(0)
+        start = datetime.datetime(1900, 1, 1)
+        for _ in range(2000):
+            expected = start + datetime.timedelta(minutes=rng.randrange(300 * 366 * 24 * 60))
+            calendar_date = expected.strftime("%Y-%b-%d %H:%M")
+            self.assertEqual(cd_to_datetime(calendar_date), expected)
+
+    def test_other_layouts_fall_back_to_strptime(self):
+        self.assertEqual(cd_to_datetime("2020-Dec-31 12:00"), datetime.datetime(2020, 12, 31, 12, 0))
+        self.assertEqual(cd_to_datetime("2020-dec-31 2:05"), datetime.datetime(2020, 12, 31, 2, 5))
+
+    def test_malformed_dates_raise_value_error(self):
+        for calendar_date in ("2020-Feb-30 00:00", "2020-Foo-01 00:00", "2020-Jan-01 24:00",
+                              "2020-Jan-01 +1:00", "not a date"):
+            with self.subTest(calendar_date=calendar_date):
+                with self.assertRaises(ValueError):
+                    cd_to_datetime(calendar_date)
+
+    def test_sort_keys_match_formatted_datetimes(self):
+        for calendar_date in ("2020-Jan-01 00:54", "1999-Dec-31 23:59", "2020-dec-31 2:05"):
+            with self.subTest(calendar_date=calendar_date):
+                self.assertEqual(cd_to_sort_key(calendar_date),
+                                 datetime_to_str(cd_to_datetime(calendar_date)))
+
+
+if __name__ == '__main__':
+    unittest.main()
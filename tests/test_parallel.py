@@ -0,0 +1,74 @@
+"""Check that loading the data files in parallel gives the same data as loading them serially.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_parallel
+"""
+import json
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from extract import load_neos, load_approaches
+import parallel
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+def summarize(approaches):
+    return [(approach.time, approach._designation, approach.distance, approach.velocity)
+            for approach in approaches]
+
+
+class TestParallelLoad(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = summarize(load_approaches(TEST_CAD_FILE))
+
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_workers_load_the_same_data(self):
+        for workers in (1, 2, 3):
+            with self.subTest(workers=workers):
+                neos, approaches = parallel.load(TEST_NEO_FILE, TEST_CAD_FILE, workers)
+                self.assertEqual([(neo.designation, neo.name, neo.hazardous) for neo in neos],
+                                 [(neo.designation, neo.name, neo.hazardous) for neo in self.neos])
+                self.assertEqual(summarize(approaches), self.approaches)
+
+    def test_chunks_cover_every_row_once(self):
+        for chunks in (1, 7, 10000):
+            with self.subTest(chunks=chunks):
+                offsets = parallel.chunk_offsets(TEST_CAD_FILE, chunks)
+                self.assertLessEqual(len(offsets), max(chunks, len(self.approaches)))
+                columns = [[], [], [], []]
+                for start, end in offsets:
+                    for column, values in zip(columns, parallel.load_columns(
+                            TEST_CAD_FILE, start, end, (0, 3, 4, 7))):
+                        column.extend(values)
+                self.assertEqual(len(columns[0]), len(self.approaches))
+
+    def test_compact_file(self):
+        with open(TEST_CAD_FILE) as file:
+            document = json.load(file)
+        cadfile = self.tmp / 'compact.json'
+        cadfile.write_text(json.dumps(document, separators=(',', ':')))
+        _, approaches = parallel.load(TEST_NEO_FILE, cadfile, 2)
+        self.assertEqual(summarize(approaches), self.approaches)
+
+    def test_empty_data(self):
+        cadfile = self.tmp / 'empty.json'
+        cadfile.write_text(json.dumps({'count': 0, 'data': [], 'fields': ['des', 'cd', 'dist', 'v_rel']}))
+        self.assertEqual(parallel.chunk_offsets(cadfile, 4), [])
+        _, approaches = parallel.load(TEST_NEO_FILE, cadfile, 2)
+        self.assertEqual(len(approaches), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
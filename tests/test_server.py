@@ -0,0 +1,164 @@
+"""Check that `main.py serve` answers commands like the command line does.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_server
+"""
+import concurrent.futures
+import contextlib
+import functools
+import io
+import json
+import os
+import pathlib
+import shlex
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import main
+import server
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        _, cls.inspect_parser, cls.query_parser = main.make_parser()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.socket = os.path.join(cls.tmp.name, 'neo.sock')
+        cls.server = server.make_server(cls.socket, cls.handle)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    @classmethod
+    def handle(cls, argv, stdout, stderr, outfile):
+        return main.run_command(cls.db, cls.inspect_parser, cls.query_parser,
+                                argv, stdout, stderr, outfile)
+
+    def request(self, command, address=None, outfile=None):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = server.request(address or self.socket, shlex.split(command), stdout, stderr,
+                                outfile)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def run_locally(self, command):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = self.handle(shlex.split(command), stdout, stderr, None)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_commands_match_the_command_line(self):
+        for command in ('query --date 2020-03-14', 'query --max-distance 0.1 --limit 50',
+                        'inspect --name Adonis --verbose', 'inspect --pdes 433',
+                        'inspect --name Nope'):
+            with self.subTest(command=command):
+                self.assertEqual(self.request(command), self.run_locally(command))
+
+    def test_query_output_is_printed(self):
+        status, stdout, stderr = self.request('query --limit 3')
+        self.assertEqual(status, 0)
+        self.assertEqual(len(stdout.splitlines()), 3)
+        self.assertEqual(stderr, '')
+
+    def test_count_is_printed(self):
+        status, stdout, stderr = self.request('query --hazardous --count')
+        self.assertEqual(status, 0)
+        self.assertTrue(stdout.strip().isdigit())
+        self.assertEqual(stderr, '')
+
+    def test_outfile_is_written_by_the_client(self):
+        for suffix in ('.csv', '.json', '.ndjson'):
+            with self.subTest(suffix=suffix), tempfile.TemporaryDirectory() as tmp:
+                local, remote = pathlib.Path(tmp) / f'local{suffix}', pathlib.Path(tmp) / f'remote{suffix}'
+                self.run_locally(f'query --max-distance 0.1 --outfile {local}')
+                command = f'query --max-distance 0.1 --outfile remote{suffix}'
+                self.assertEqual(self.request(command, outfile=remote)[0], 0)
+                self.assertEqual(remote.read_text(), local.read_text())
+
+    def test_server_never_opens_the_outfile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = pathlib.Path(tmp) / 'results.json'
+            for path in (str(target), f'../{target.name}'):
+                with self.subTest(path=path):
+                    # A client that doesn't save the results leaves no file behind.
+                    stdout, stderr = io.StringIO(), io.StringIO()
+                    status = server.request(self.socket, ['query', '--limit', '4', '--outfile', path],
+                                            stdout, stderr, outfile=os.devnull)
+                    self.assertEqual(status, 0)
+                    self.assertFalse(target.exists())
+                    self.assertFalse(pathlib.Path(os.pardir, target.name).exists())
+
+    def test_bad_outfile_suffix_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            outfile = pathlib.Path(tmp) / 'results.txt'
+            status, _, stderr = self.request(f'query --outfile {outfile}', outfile=outfile)
+            self.assertEqual(status, 0)
+            self.assertIn('.csv', stderr)
+            self.assertFalse(outfile.exists())
+
+    def test_socket_is_private(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket).st_mode), 0o600)
+
+    def test_concurrent_clients(self):
+        expected = self.run_locally('query --start-date 2020-03-01 --end-date 2020-05-31')
+        request = functools.partial(self.request, 'query --start-date 2020-03-01 --end-date 2020-05-31')
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            results = [pool.submit(request) for _ in range(32)]
+        for result in results:
+            self.assertEqual(result.result(), expected)
+
+    def test_bad_commands_are_reported(self):
+        status, _, stderr = self.request('delete --everything')
+        self.assertEqual(status, 2)
+        self.assertIn('inspect', stderr)
+        with contextlib.redirect_stderr(io.StringIO()):
+            status, _, stderr = self.request('query --bogus')
+        self.assertEqual(status, 2)
+
+    def test_bad_requests_are_reported(self):
+        with socket.socket(socket.AF_UNIX) as connection:
+            connection.connect(self.socket)
+            connection.sendall(b'not json\n')
+            replies = [json.loads(line) for line in connection.makefile('rb')]
+        self.assertEqual(replies[-1], {'exit': 2})
+
+    def test_missing_server(self):
+        status, _, stderr = self.request('query', os.path.join(self.tmp.name, 'missing.sock'))
+        self.assertEqual(status, 1)
+        self.assertIn('main.py serve', stderr)
+
+    def test_tcp(self):
+        tcp = server.make_server(('127.0.0.1', 0), self.handle)
+        self.addCleanup(tcp.server_close)
+        threading.Thread(target=tcp.serve_forever, daemon=True).start()
+        self.addCleanup(tcp.shutdown)
+        self.assertEqual(self.request('inspect --name Adonis', tcp.server_address),
+                         self.run_locally('inspect --name Adonis'))
+
+    def test_stale_socket_is_replaced(self):
+        path = os.path.join(self.tmp.name, 'stale.sock')
+        with socket.socket(socket.AF_UNIX) as stale:
+            stale.bind(path)
+        fresh = server.make_server(path, self.handle)
+        self.addCleanup(fresh.server_close)
+        threading.Thread(target=fresh.serve_forever, daemon=True).start()
+        self.addCleanup(fresh.shutdown)
+        self.assertEqual(self.request('query --limit 1', path)[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
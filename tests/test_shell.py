@@ -0,0 +1,97 @@
+"""Check that the interactive shell notices changed project files without polling per command.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_shell
+"""
+import contextlib
+import io
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import main
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = pathlib.Path(tmp.name)
+        (self.root / 'module.py').write_text('')
+        (self.root / 'notes.txt').write_text('')
+        self.since = time.time() + 10
+        self.watcher = main.FileWatcher(self.root, self.since, interval=0.01)
+        self.addCleanup(self.watcher.stop)
+
+    def touch(self, name):
+        os.utime(self.root / name, (self.since + 1, self.since + 1))
+
+    def wait_for_change(self):
+        deadline = time.monotonic() + 5
+        while not self.watcher.changed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.watcher.changed
+
+    def test_unchanged_files(self):
+        self.assertEqual(self.watcher.scan(), [])
+
+    def test_only_python_files_are_watched(self):
+        self.touch('notes.txt')
+        self.assertEqual(self.watcher.scan(), [])
+        self.touch('module.py')
+        self.assertEqual(self.watcher.scan(), [self.root / 'module.py'])
+
+    def test_background_thread_publishes_changes(self):
+        self.watcher.start()
+        self.touch('module.py')
+        self.assertEqual(self.wait_for_change(), [self.root / 'module.py'])
+
+    def test_stop(self):
+        self.watcher.start()
+        self.watcher.stop()
+        self.watcher.join(timeout=5)
+        self.assertFalse(self.watcher.is_alive())
+
+
+class TestShell(unittest.TestCase):
+    def make_shell(self, changed, aggressive=False):
+        shell = main.NEOShell(None, None, None, aggressive=aggressive)
+        shell.watcher.changed = changed
+        return shell
+
+    def test_precmd_does_not_touch_the_filesystem(self):
+        shell = self.make_shell([])
+        with mock.patch.object(pathlib.Path, 'glob') as glob, \
+                mock.patch.object(pathlib.Path, 'stat') as stat:
+            self.assertEqual(shell.precmd('query'), 'query')
+        glob.assert_not_called()
+        stat.assert_not_called()
+
+    def test_changes_are_reported(self):
+        shell = self.make_shell([main.PROJECT_ROOT / 'main.py'])
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(shell.precmd('query'), 'query')
+        self.assertIn('main.py', stderr.getvalue())
+        self.assertIn('please exit and restart', stderr.getvalue())
+
+    def test_aggressive_sessions_exit(self):
+        shell = self.make_shell([main.PROJECT_ROOT / 'main.py'], aggressive=True)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(shell.precmd('query'), 'exit')
+
+    def test_session_starts_and_stops_the_watcher(self):
+        shell = main.NEOShell(None, None, None, stdin=io.StringIO('exit\n'), stdout=io.StringIO())
+        shell.use_rawinput = False
+        for _ in range(2):
+            shell.cmdloop()
+            shell.watcher.join(timeout=5)
+            self.assertFalse(shell.watcher.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Check that snapshots of the data files load the same database, and stay current.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_snapshot
+"""
+import datetime
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+from store import StoreApproaches
+import snapshot
+from tests.common import summarize
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.neofile = self.tmp / 'neos.csv'
+        self.cadfile = self.tmp / 'cad.json'
+        shutil.copy(TEST_NEO_FILE, self.neofile)
+        shutil.copy(TEST_CAD_FILE, self.cadfile)
+        self.cache_dir = self.tmp / 'snapshots'
+
+    def load(self):
+        return snapshot.load(self.neofile, self.cadfile, self.cache_dir)
+
+    def snapshot_mtime(self):
+        return snapshot.snapshot_path(self.cache_dir, self.neofile, self.cadfile).stat().st_mtime_ns
+
+    def test_first_load_writes_a_snapshot(self):
+        self.load()
+        self.assertTrue(snapshot.snapshot_path(self.cache_dir, self.neofile, self.cadfile).exists())
+
+    def test_second_load_reads_the_snapshot(self):
+        self.load()
+        neos, approaches = self.load()
+        self.assertIsInstance(approaches, StoreApproaches)
+        self.assertEqual(len(neos), 4226)
+
+    def test_snapshot_loads_the_same_database(self):
+        self.load()
+        db = NEODatabase(*self.load())
+        self.assertEqual(summarize(db.query({})), summarize(self.db.query({})))
+        self.assertEqual((db.min_time, db.max_time), (self.db.min_time, self.db.max_time))
+
+        args = {'start_date': datetime.date(2020, 3, 1), 'end_date': datetime.date(2020, 5, 31),
+                'distance_max': 0.1, 'hazardous': False}
+        self.assertEqual(summarize(db.query(args)), summarize(self.db.query(args)))
+
+        neo, expected = db.get_neo_by_name('Adonis'), self.db.get_neo_by_name('Adonis')
+        self.assertEqual((neo.designation, neo.hazardous, neo.diameter),
+                         (expected.designation, expected.hazardous, expected.diameter))
+        self.assertEqual(summarize(neo.approaches), summarize(expected.approaches))
+        self.assertIsNone(db.get_neo_by_designation('2019 SC8').name)
+
+    def test_snapshot_can_be_built_eagerly(self):
+        self.load()
+        neos, approaches = self.load()
+        db = NEODatabase(neos, list(approaches))
+        self.assertEqual(summarize(db.query({})), summarize(self.db.query({})))
+
+    def test_changed_source_rebuilds_the_snapshot(self):
+        self.load()
+        with open(self.neofile, 'a') as file:
+            file.write(self.neofile.read_text().splitlines()[1].replace('2020', '2999', 1) + '\n')
+        before = self.snapshot_mtime()
+        neos, _ = self.load()
+        self.assertEqual(len(neos), 4227)
+        self.assertNotEqual(self.snapshot_mtime(), before)
+
+    def test_touched_source_keeps_the_snapshot(self):
+        self.load()
+        before = self.snapshot_mtime()
+        stat = os.stat(self.cadfile)
+        os.utime(self.cadfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        _, approaches = self.load()
+        self.assertIsInstance(approaches, StoreApproaches)
+        self.assertEqual(self.snapshot_mtime(), before)
+
+    def test_corrupt_snapshot_is_rebuilt(self):
+        self.load()
+        snapshot.snapshot_path(self.cache_dir, self.neofile, self.cadfile).write_bytes(b'junk')
+        self.load()
+        _, approaches = self.load()
+        self.assertIsInstance(approaches, StoreApproaches)
+
+    def test_other_files_get_their_own_snapshot(self):
+        other = self.tmp / 'other.csv'
+        shutil.copy(TEST_NEO_FILE, other)
+        self.assertNotEqual(snapshot.snapshot_path(self.cache_dir, self.neofile, self.cadfile),
+                            snapshot.snapshot_path(self.cache_dir, other, self.cadfile))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Check that the SQLite engine answers queries exactly like `NEODatabase` does.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_sqlitedb
+"""
+import datetime
+import math
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from extract import load_neos, load_approaches
+from database import NEODatabase
+import filters
+import sqlitedb
+from tests.common import FILTER_SETS, summarize
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestSQLiteDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.tmp = pathlib.Path(tempfile.mkdtemp())
+        cls.path = cls.tmp / 'neos.sqlite3'
+        cls.db = sqlitedb.load(TEST_NEO_FILE, TEST_CAD_FILE, cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+        shutil.rmtree(cls.tmp)
+
+    def test_queries_match_the_data_files(self):
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                self.assertEqual(summarize(self.db.query(args)),
+                                 summarize(self.expected.query(args)))
+
+    def test_more_queries_match_the_data_files(self):
+        for args in ({filters.DISTANCE_MAX: 0.01}, {filters.DIAMETER_MIN: 0},
+                     {filters.END_DATE: datetime.date(2020, 1, 2)},
+                     {filters.VELOCITY_MIN: 20, filters.VELOCITY_MAX: 20}):
+            with self.subTest(args=args):
+                self.assertEqual(summarize(self.db.query(args)),
+                                 summarize(self.expected.query(args)))
+
+    def test_batches_match_the_data_files(self):
+        for args, results in zip(FILTER_SETS, self.db.query_batch(FILTER_SETS)):
+            with self.subTest(args=args):
+                self.assertEqual(summarize(results), summarize(self.expected.query(args)))
+
+    def test_orders_match_the_data_files(self):
+        args = {filters.START_DATE: datetime.date(2020, 3, 1), filters.DISTANCE_MAX: 0.2}
+        for attribute in filters.SORT_ATTRIBUTES:
+            for desc in (False, True):
+                for n in (None, 1, 25):
+                    order = {filters.SORT_BY: attribute, filters.DESC: desc, filters.TOP: n}
+                    with self.subTest(order=order):
+                        self.assertEqual(summarize(self.db.query({**args, **order})),
+                                         summarize(self.expected.query({**args, **order})))
+
+    def test_counts_match_the_data_files(self):
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                self.assertEqual(self.db.count(args), self.expected.count(args))
+
+    def test_times_match_the_data_files(self):
+        self.assertEqual((self.db.min_time, self.db.max_time),
+                         (self.expected.min_time, self.expected.max_time))
+
+    def test_get_neo_by_designation_and_aliases(self):
+        neo = self.db.get_neo_by_designation('1685')
+        self.assertEqual(neo.name, 'Toro')
+        for alias in ('1685 Toro', '1685 (Toro)', 'Toro'):
+            with self.subTest(alias=alias):
+                self.assertIs(self.db.get_neo_by_designation(alias), neo)
+        self.assertIsNone(self.db.get_neo_by_designation('not a real designation'))
+
+    def test_get_neo_by_name(self):
+        neo, expected = self.db.get_neo_by_name('Adonis'), self.expected.get_neo_by_name('Adonis')
+        self.assertEqual((neo.designation, neo.hazardous, neo.diameter),
+                         (expected.designation, expected.hazardous, expected.diameter))
+        self.assertEqual(summarize(neo.approaches), summarize(expected.approaches))
+        self.assertIsNone(self.db.get_neo_by_name(''))
+        self.assertIsNone(self.db.get_neo_by_name(None))
+
+    def test_unknown_diameter_is_nan(self):
+        neo = self.db.get_neo_by_designation('2019 SC8')
+        self.assertIsNone(neo.name)
+        self.assertTrue(math.isnan(neo.diameter))
+
+    def test_approaches_link_to_the_same_neo(self):
+        neo = self.db.get_neo_by_name('Adonis')
+        for approach in self.db.query({}):
+            if approach.neo is not None and approach.neo.designation == neo.designation:
+                self.assertIs(approach.neo, neo)
+
+    def test_query_is_a_stream(self):
+        results = self.db.query({})
+        self.assertIsNotNone(next(results))
+        results.close()
+
+    def test_current_database_is_reused(self):
+        before = self.path.stat().st_mtime_ns
+        sqlitedb.load(TEST_NEO_FILE, TEST_CAD_FILE, self.path).close()
+        self.assertEqual(self.path.stat().st_mtime_ns, before)
+
+    def test_changed_source_rebuilds_the_database(self):
+        neofile = self.tmp / 'neos.csv'
+        shutil.copy(TEST_NEO_FILE, neofile)
+        path = self.tmp / 'changed.sqlite3'
+        sqlitedb.load(neofile, TEST_CAD_FILE, path).close()
+        with open(neofile, 'a') as file:
+            file.write(neofile.read_text().splitlines()[1].replace('2020', '2999', 1) + '\n')
+        db = sqlitedb.load(neofile, TEST_CAD_FILE, path)
+        self.addCleanup(db.close)
+        self.assertEqual(db.sources()['neofile']['size'], neofile.stat().st_size)
+
+    def test_corrupt_database_is_rebuilt(self):
+        path = self.tmp / 'corrupt.sqlite3'
+        path.write_bytes(b'junk' * 1024)
+        db = sqlitedb.load(TEST_NEO_FILE, TEST_CAD_FILE, path)
+        self.addCleanup(db.close)
+        self.assertEqual(db.min_time, self.expected.min_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
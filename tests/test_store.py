@@ -0,0 +1,168 @@
+"""Check that a columnar store answers queries exactly like the data files do.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_store
+"""
+import contextlib
+import io
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+from extract import load_neos, load_approaches, LazyApproaches
+from database import NEODatabase
+import columnar
+import filters
+import main
+import store
+from tests.common import FILTER_SETS, summarize
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / 'test-neos-2020.csv'
+TEST_CAD_FILE = TESTS_ROOT / 'test-cad-2020.json'
+
+
+class TestStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.tmp = pathlib.Path(tempfile.mkdtemp())
+        cls.path = cls.tmp / 'neos.store'
+        store.convert(TEST_NEO_FILE, TEST_CAD_FILE, cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def open(self, columnar=False, range_indexes=False):
+        _, neos, approaches = store.open_store(self.path)
+        return NEODatabase(neos, approaches, columnar=columnar, range_indexes=range_indexes)
+
+    def test_queries_match_the_data_files(self):
+        for db in (self.open(), self.open(range_indexes=True)):
+            for args in FILTER_SETS:
+                with self.subTest(args=args, range_indexes=bool(db._range_indexes)):
+                    self.assertEqual(summarize(db.query(args)), summarize(self.db.query(args)))
+
+    @unittest.skipIf(columnar.np is None, "NumPy isn't installed.")
+    def test_columnar_queries_match_the_data_files(self):
+        db = self.open(columnar=True)
+        for args in FILTER_SETS:
+            with self.subTest(args=args):
+                self.assertEqual(summarize(db.query(args)), summarize(self.db.query(args)))
+
+    def test_batches_match_the_data_files(self):
+        for args, results in zip(FILTER_SETS, self.open().query_batch(FILTER_SETS)):
+            with self.subTest(args=args):
+                self.assertEqual(summarize(results), summarize(self.db.query(args)))
+
+    @unittest.skipIf(columnar.np is None, "NumPy isn't installed.")
+    def test_columnar_batches_match_the_data_files(self):
+        db = self.open(columnar=True)
+        for args, results in zip(FILTER_SETS, db.query_batch(FILTER_SETS)):
+            with self.subTest(args=args):
+                self.assertEqual(summarize(results), summarize(self.db.query(args)))
+
+    def test_counts_match_the_data_files(self):
+        databases = [self.open()] + ([self.open(columnar=True)] if columnar.np else [])
+        for db in databases:
+            for args in FILTER_SETS + ({filters.HAZARDOUS: True},):
+                with self.subTest(args=args, columnar=db._columns is not None):
+                    self.assertEqual(db.count(args), sum(1 for _ in self.db.query(args)))
+
+    @unittest.skipIf(columnar.np is None, "NumPy isn't installed.")
+    def test_columns_are_views_of_the_file(self):
+        columns = self.open(columnar=True)._columns
+        self.assertFalse(columns.distance.flags.owndata)
+        self.assertFalse(columns.time.flags.writeable)
+
+    def test_queries_only_build_the_approaches_they_return(self):
+        db = self.open()
+        results = list(db.query({filters.DISTANCE_MAX: 0.1}))
+        built = sum(1 for approach in db._approaches._approaches if approach is not None)
+        self.assertGreater(len(results), 0)
+        self.assertEqual(built, len(results))
+
+    def test_store_approaches_are_read_only(self):
+        _, _, approaches = store.open_store(self.path)
+        self.assertNotIsInstance(approaches, LazyApproaches)
+        self.assertFalse(hasattr(approaches, 'reorder'))
+        self.assertFalse(hasattr(approaches, 'column'))
+
+    def test_servers_keep_the_store_mapped(self):
+        argv = ['main.py', '--store', str(self.path), 'serve', '--socket', str(self.tmp / 'sock')]
+        with unittest.mock.patch('sys.argv', argv), unittest.mock.patch('server.serve'), \
+                unittest.mock.patch('main.NEODatabase', wraps=NEODatabase) as database:
+            main.main()
+        approaches = database.call_args.args[1]
+        self.assertIsInstance(approaches, store.StoreApproaches)
+        self.assertEqual(sum(1 for approach in approaches._approaches if approach is not None), 0)
+
+    def test_neos_match_the_data_files(self):
+        db = self.open()
+        self.assertEqual((db.min_time, db.max_time), (self.db.min_time, self.db.max_time))
+        neo, expected = db.get_neo_by_name('Adonis'), self.db.get_neo_by_name('Adonis')
+        self.assertEqual((neo.designation, neo.hazardous, neo.diameter),
+                         (expected.designation, expected.hazardous, expected.diameter))
+        self.assertEqual(summarize(neo.approaches), summarize(expected.approaches))
+        self.assertIsNone(db.get_neo_by_designation('2019 SC8').name)
+
+    def test_approaches_of_unknown_neos_keep_their_designation(self):
+        with open(TEST_CAD_FILE) as file:
+            document = json.load(file)
+        row = list(document['data'][0])
+        row[document['fields'].index('des')] = 'NOT AN NEO'
+        document['data'].append(row)
+        cadfile = self.tmp / 'unknown.json'
+        cadfile.write_text(json.dumps(document))
+        path = self.tmp / 'unknown.store'
+        store.convert(TEST_NEO_FILE, cadfile, path)
+        db = NEODatabase(*store.open_store(path)[1:])
+
+        unknown = [approach for approach in db.query({}) if approach.neo is None]
+        self.assertEqual([approach._designation for approach in unknown], ['NOT AN NEO'])
+        self.assertIn(unknown[0], db.query({filters.HAZARDOUS: False}))
+        self.assertNotIn(unknown[0], db.query({filters.HAZARDOUS: True}))
+        self.assertNotIn(unknown[0], db.query({filters.DIAMETER_MAX: 100,
+                                               filters.HAZARDOUS: False}))
+
+    def test_converter_script(self):
+        path = self.tmp / 'script.store'
+        subprocess.run([sys.executable, str(TESTS_ROOT.parent / 'store.py'),
+                        '--neofile', str(TEST_NEO_FILE), '--cadfile', str(TEST_CAD_FILE),
+                        str(path)], check=True)
+        header, neos, approaches = store.open_store(path)
+        self.assertEqual((header['neos'], header['approaches']), (4226, 4700))
+        self.assertEqual(len(neos), 4226)
+        self.assertEqual(len(approaches), 4700)
+
+    def test_other_files_are_rejected(self):
+        with self.assertRaises(ValueError):
+            store.open_store(TEST_CAD_FILE)
+        truncated, empty = self.tmp / 'truncated.store', self.tmp / 'empty.store'
+        truncated.write_bytes(self.path.read_bytes()[:-100])
+        empty.touch()
+        for path in (truncated, empty):
+            with self.subTest(path=path.name), self.assertRaises(ValueError):
+                store.open_store(path)
+
+    def test_bad_stores_are_usage_errors(self):
+        for path in (self.tmp / 'missing.store', TEST_CAD_FILE):
+            argv = ['main.py', '--store', str(path), 'query', '--count']
+            with self.subTest(path=path.name), unittest.mock.patch('sys.argv', argv), \
+                    contextlib.redirect_stderr(io.StringIO()) as stderr, \
+                    self.assertRaises(SystemExit) as exit:
+                main.main()
+            self.assertEqual(exit.exception.code, 2)
+            self.assertIn(path.name, stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,13 +21,14 @@ import datetime
 import io
 import json
 import pathlib
+import tempfile
 import unittest
 import unittest.mock
 
 
 from extract import load_neos, load_approaches
 from database import NEODatabase
-from write import write_to_csv, write_to_json
+from write import write_to_csv, write_to_json, write_to_ndjson
 
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -132,6 +133,68 @@ class TestWriteToCSV(unittest.TestCase):
         self.assertSetEqual(set(fieldnames), set(rows[0].keys()))
 
 
+class TestStreamingWriters(unittest.TestCase):
+    def write_while_watching(self, writer, suffix):
+        """Write 50 results to a real file, recording its size before each result is produced."""
+        results = build_results(50)
+        sizes = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / f'results{suffix}'
+
+            def stream():
+                for result in results:
+                    sizes.append(path.stat().st_size if path.exists() else 0)
+                    yield result
+
+            writer(stream(), path, flush_size=10)
+            return path.read_text(), sizes
+
+    def test_csv_rows_are_written_while_results_are_produced(self):
+        value, sizes = self.write_while_watching(write_to_csv, '.csv')
+        self.assertEqual(len(tuple(csv.DictReader(io.StringIO(value)))), 50)
+        # With a small flush size, data reaches the file before the last result is produced.
+        self.assertGreater(sizes[-1], 0)
+
+    def test_json_array_is_written_while_results_are_produced(self):
+        value, sizes = self.write_while_watching(write_to_json, '.json')
+        self.assertEqual(len(json.loads(value)), 50)
+        self.assertGreater(sizes[-1], 0)
+
+    def test_json_array_of_no_results_is_empty(self):
+        with UncloseableStringIO() as buf, unittest.mock.patch('write.open') as mock_file:
+            mock_file.return_value = buf
+            write_to_json(iter(()), None)
+            self.assertEqual(json.loads(buf.getvalue()), [])
+
+    def test_ndjson_has_one_object_per_line(self):
+        value, sizes = self.write_while_watching(write_to_ndjson, '.ndjson')
+        lines = value.splitlines()
+        self.assertEqual(len(lines), 50)
+        for line in lines:
+            approach = json.loads(line)
+            self.assertIn('datetime_utc', approach)
+            self.assertIn('designation', approach['neo'])
+        self.assertGreater(sizes[-1], 0)
+
+    def test_unknown_diameters_are_null(self):
+        results = [approach for approach in build_results(200)
+                   if approach.neo.diameter != approach.neo.diameter][:5]
+        self.assertTrue(results)
+
+        def reject(constant):
+            raise ValueError(f"{constant} isn't valid JSON")
+        for writer, suffix in ((write_to_json, '.json'), (write_to_ndjson, '.ndjson')):
+            with self.subTest(writer=writer.__name__), tempfile.TemporaryDirectory() as tmp:
+                path = pathlib.Path(tmp) / f'results{suffix}'
+                writer(results, path)
+                text = path.read_text()
+                if suffix == '.json':
+                    objs = json.loads(text, parse_constant=reject)
+                else:
+                    objs = [json.loads(line, parse_constant=reject) for line in text.splitlines()]
+                self.assertEqual([obj['neo']['diameter_km'] for obj in objs], [None] * len(results))
+
+
 class TestWriteToJSON(unittest.TestCase):
     @classmethod
     @unittest.mock.patch('write.open')
@@ -222,7 +285,8 @@ class TestWriteToJSON(unittest.TestCase):
         self.assertNotEqual(approach['neo']['name'], 'None')
         if approach['neo']['name']:
             self.assertIsInstance(approach['neo']['name'], str)
-        self.assertIsInstance(approach['neo']['diameter_km'], float)
+        # Unknown diameters are null, since JSON has no NaN.
+        self.assertIsInstance(approach['neo']['diameter_km'], (float, type(None)))
         self.assertIsInstance(approach['neo']['potentially_hazardous'], bool)
 
 
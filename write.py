@@ -1,68 +1,122 @@
+import contextlib
 import csv
 import json
+from itertools import islice
+from math import isnan
 from helpers import datetime_to_str
 
 
 
+# Streaming writers flush to disk after this many rows, bounding the memory they hold.
+FLUSH_SIZE = 10000
+
 FIELD_NAMES = ('datetime_utc', 'distance_au', 'velocity_km_s', 'designation', 
     'name', 'diameter_km', 'potentially_hazardous')
 
-def write_to_csv(results, filename):
+def csv_row(close_approach):
+    """Format a `CloseApproach` as a row of strings, in the order of `FIELD_NAMES`."""
+    neo = close_approach.neo
+    return (
+        datetime_to_str(close_approach.time),
+        str(close_approach.distance),
+        str(close_approach.velocity),
+        str(close_approach._designation),
+        neo.name if neo.name != None else '',
+        str(neo.diameter),
+        str(neo.hazardous).capitalize())
+
+
+def json_obj(close_approach):
+    """Format a `CloseApproach` as a dictionary with a nested `neo` dictionary.
+
+    An unknown (NaN) diameter is None, so that it is written as `null`: JSON has no NaN."""
+    neo = close_approach.neo
+    return {
+        FIELD_NAMES[0]: datetime_to_str(close_approach.time),
+        FIELD_NAMES[1]: close_approach.distance,
+        FIELD_NAMES[2]: close_approach.velocity,
+        'neo': {
+            FIELD_NAMES[3]: str(neo.designation),
+            FIELD_NAMES[4]: neo.name if neo.name != None else '',
+            FIELD_NAMES[5]: None if isnan(neo.diameter) else neo.diameter,
+            FIELD_NAMES[6]: neo.hazardous,
+        },
+    }
+
+
+def batches(iterable, size):
+    """Split an iterable into lists of at most `size` items, lazily."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _open(filename):
+    """Open `filename` for writing, unless it is already an open text stream."""
+    if hasattr(filename, 'write'):
+        return contextlib.nullcontext(filename)
+    return open(filename, 'w')
+
+
+def write_to_csv(results, filename, flush_size=FLUSH_SIZE):
     """Write an iterable of `CloseApproach` objects to a CSV file.
 
+    Rows are formatted and written in batches of `flush_size` as `results`
+    produces them, and the file is flushed after each batch, so memory use
+    doesn't grow with the number of results.
+
     :param results: An iterable of `CloseApproach` objects.
-    :param filename: A Path-like object pointing to where the data should be saved.
+    :param filename: A Path-like object pointing to where the data should be saved,
+    or an open text stream to write to, which is left open.
+    :param flush_size: The number of rows to write between flushes.
     """
-    
-    rows = []
-    for close_approach in results:
-        name = close_approach.neo.name
-        if close_approach.neo.name == None:
-            name = ''
-
-        name = close_approach.neo.name
-        if close_approach.neo.name == None:
-            name = ''
-        
-        curr_row = [
-            datetime_to_str(close_approach.time),
-            str(close_approach.distance),
-            str(close_approach.velocity),
-            str(close_approach._designation),
-            name,
-            str(close_approach.neo.diameter),
-            str(close_approach.neo.hazardous).capitalize()]
-        rows.append(curr_row)
-
-    with open(f"{filename}.csv", 'w') as file:
+    with _open(filename) as file:
         writer = csv.writer(file)
         writer.writerow(FIELD_NAMES)
-        for row in rows:
-            writer.writerow(row)
+        for batch in batches(map(csv_row, results), flush_size):
+            writer.writerows(batch)
+            file.flush()
 
 
-def write_to_json(results, filename):
+def write_to_json(results, filename, flush_size=FLUSH_SIZE):
     """Write an iterable of `CloseApproach` objects to a JSON file.
 
+    The file holds a single JSON array. The opening bracket is written right
+    away and each object follows as `results` produces it, flushing every
+    `flush_size` objects, so memory use doesn't grow with the number of results.
+
+    :param results: An iterable of `CloseApproach` objects.
+    :param filename: A Path-like object pointing to where the data should be saved,
+    or an open text stream to write to, which is left open.
+    :param flush_size: The number of objects to write between flushes.
+    """
+    with _open(filename) as file:
+        file.write('[')
+        separator = ''
+        for batch in batches(map(json_obj, results), flush_size):
+            for obj in batch:
+                file.write(separator)
+                file.write(json.dumps(obj))
+                separator = ', '
+            file.flush()
+        file.write(']')
+
+
+def write_to_ndjson(results, filename, flush_size=FLUSH_SIZE):
+    """Write an iterable of `CloseApproach` objects to a newline-delimited JSON file.
+
+    Each line holds one JSON object, in the same format as the elements written
+    by `write_to_json`, so consumers can read the file while it is being written.
+
     :param results: An iterable of `CloseApproach` objects.
-    :param filename: A Path-like object pointing to where the data should be saved.
+    :param filename: A Path-like object pointing to where the data should be saved,
+    or an open text stream to write to, which is left open.
+    :param flush_size: The number of lines to write between flushes.
     """
-    objs = []
-    for result in results:
-        obj = {}
-        name = str(result.neo.name)
-        if name == None:
-            name = ''
-
-        obj[FIELD_NAMES[0]] = datetime_to_str(result.time)
-        obj[FIELD_NAMES[1]] = result.distance
-        obj[FIELD_NAMES[2]] = result.velocity
-        obj['neo'] = {}
-        obj['neo'][FIELD_NAMES[3]] = str(result.neo.designation)
-        obj['neo'][FIELD_NAMES[4]] = name
-        obj['neo'][FIELD_NAMES[5]] = str(result.neo.diameter)
-        obj['neo'][FIELD_NAMES[6]] = result.neo.hazardous
-        objs.append(obj)
-
-    with open(f"{filename}.json", 'w') as file:
-        json.dump(objs, fp=file)
+    with _open(filename) as file:
+        for batch in batches(map(json_obj, results), flush_size):
+            file.writelines(json.dumps(obj) + '\n' for obj in batch)
+            file.flush()